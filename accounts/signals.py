@@ -1,53 +1,34 @@
 from __future__ import annotations
 
-from io import BytesIO
-from pathlib import Path
-
-from django.core.files.base import ContentFile
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
-from PIL import Image, ImageOps
 from wagtail.users.models import UserProfile
 
 
-@receiver(post_save, sender=UserProfile)
-def convert_avatar_to_webp(sender, instance: UserProfile, **kwargs):
-    if getattr(instance, "_processing_avatar", False):
+@receiver(pre_save, sender=UserProfile)
+def note_avatar_change(sender, instance: UserProfile, update_fields=None, raw=False, **kwargs):
+    # Profiles are saved for every preference change with update_fields=None;
+    # only a new file name means a new upload.
+    instance._avatar_changed = False
+    if raw or not instance.avatar:
         return
-    if not instance.avatar:
-        return
-
-    current_name = instance.avatar.name
-    if current_name.lower().endswith(".webp"):
+    if update_fields is not None and "avatar" not in update_fields:
         return
+    stored = UserProfile.objects.filter(pk=instance.pk).values_list("avatar", flat=True).first()
+    instance._avatar_changed = stored != instance.avatar.name
 
-    instance._processing_avatar = True
-    storage = instance.avatar.storage
-    old_name = current_name
 
-    try:
-        instance.avatar.open("rb")
-        image = Image.open(instance.avatar)
-        image = ImageOps.exif_transpose(image)
-        if image.mode in ("RGBA", "LA"):
-            image = image.convert("RGBA")
-        else:
-            image = image.convert("RGB")
-        buffer = BytesIO()
-        image.save(buffer, format="WEBP", quality=85, method=6)
-        data = buffer.getvalue()
-    finally:
-        try:
-            instance.avatar.close()
-        except Exception:
-            pass
-
-    base = Path(old_name).stem
-    folder = Path(old_name).parent
-    new_name = str(folder / f"{base}.webp")
+@receiver(post_save, sender=UserProfile)
+def convert_avatar_to_webp(sender, instance: UserProfile, **kwargs):
+    if not getattr(instance, "_avatar_changed", False):
+        return
+    instance._avatar_changed = False
 
-    instance.avatar.save(new_name, ContentFile(data), save=False)
-    instance.save(update_fields=["avatar"])
+    # Resizing and encoding run in the "avatars" task worker (see TASKS) once
+    # the upload commits; the request only pays for storing the original file.
+    # The task module (and Pillow) is only imported once an avatar is uploaded.
+    from accounts.tasks import convert_avatar_task
 
-    if storage.exists(old_name):
-        storage.delete(old_name)
+    profile_id = instance.pk
+    transaction.on_commit(lambda: convert_avatar_task.enqueue(profile_id))
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django_tasks import task
+from PIL import Image, ImageOps
+from wagtail.users.models import UserProfile
+
+# Avatars are shown at 28-64px; this leaves headroom for high-density screens.
+DEFAULT_AVATAR_MAX_SIZE = 192
+
+
+def avatar_max_size() -> int:
+    return int(getattr(settings, "AVATAR_MAX_SIZE", DEFAULT_AVATAR_MAX_SIZE))
+
+
+def needs_conversion(image: Image.Image, name: str, max_size: int) -> bool:
+    return not name.lower().endswith(".webp") or max(image.size) > max_size
+
+
+def encode_avatar(image: Image.Image, max_size: int) -> bytes:
+    image.draft("RGB", (max_size, max_size))
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+    else:
+        image = image.convert("RGB")
+    image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+    buffer = BytesIO()
+    image.save(buffer, format="WEBP", quality=85, method=4)
+    return buffer.getvalue()
+
+
+@task(backend="avatars")
+def convert_avatar_task(profile_id):
+    profile = UserProfile.objects.filter(pk=profile_id).first()
+    if not profile or not profile.avatar:
+        return
+
+    old_name = profile.avatar.name
+    storage = profile.avatar.storage
+    max_size = avatar_max_size()
+
+    try:
+        profile.avatar.open("rb")
+        with Image.open(profile.avatar) as image:
+            if not needs_conversion(image, old_name, max_size):
+                return
+            data = encode_avatar(image, max_size)
+    finally:
+        try:
+            profile.avatar.close()
+        except Exception:
+            pass
+
+    folder = Path(old_name).parent
+    new_name = storage.save(str(folder / f"{Path(old_name).stem}.webp"), ContentFile(data))
+
+    # Only swap the file if no newer upload replaced it while we were encoding.
+    updated = UserProfile.objects.filter(pk=profile_id, avatar=old_name).update(
+        avatar=new_name
+    )
+    if not updated:
+        storage.delete(new_name)
+    elif storage.exists(old_name):
+        storage.delete(old_name)
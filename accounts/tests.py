@@ -1,3 +1,62 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import BytesIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django_tasks.backends.database.models import DBTaskResult
+from PIL import Image
+from wagtail.users.models import UserProfile
+
+from accounts.tasks import convert_avatar_task
+
+
+def png_file(name="avatar.png", size=(400, 300)):
+    buffer = BytesIO()
+    Image.new("RGB", size, (200, 30, 30)).save(buffer, format="PNG")
+    return ContentFile(buffer.getvalue(), name=name)
+
+
+class AvatarConversionTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        user = get_user_model().objects.create_user(
+            username="avatar", email="avatar@example.com", password=None
+        )
+        self.profile = UserProfile.get_for_user(user)
+
+    def upload(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.avatar = png_file()
+            self.profile.save()
+
+    def test_upload_queues_conversion_for_the_worker(self):
+        self.upload()
+
+        self.assertEqual(DBTaskResult.objects.count(), 1)
+        self.profile.refresh_from_db()
+        self.assertTrue(self.profile.avatar.name.endswith(".png"))
+
+    def test_saving_other_preferences_does_not_queue_conversion(self):
+        self.upload()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.current_time_zone = "Asia/Bangkok"
+            self.profile.save()
+
+        self.assertEqual(DBTaskResult.objects.count(), 1)
+
+    def test_task_downsizes_to_webp(self):
+        self.upload()
+        original = self.profile.avatar.name
+
+        convert_avatar_task.call(self.profile.pk)
+
+        self.profile.refresh_from_db()
+        self.assertTrue(self.profile.avatar.name.endswith(".webp"))
+        self.assertFalse(self.profile.avatar.storage.exists(original))
+        with Image.open(self.profile.avatar) as image:
+            self.assertEqual(max(image.size), 192)
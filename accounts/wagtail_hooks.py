@@ -29,7 +29,10 @@ def register_bio_panel(request, user, profile):
 
 @hooks.register("insert_global_admin_css")
 def add_user_admin_css():
-    return '<link rel="stylesheet" href="/static/accounts/css/admin.css">'
+    return format_html(
+        '<link rel="stylesheet" href="{}">',
+        static("accounts/css/admin.css"),
+    )
 
 
 @hooks.register("insert_global_admin_js")
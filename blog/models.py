@@ -20,6 +20,7 @@ from wagtail.fields import RichTextField, StreamField
 from wagtail.images.blocks import ImageChooserBlock
 from wagtail.models import Page
 from wagtail.snippets.models import register_snippet
+from core.db import use_read_replica
 from core.image_utils import assign_page_images
 
 
@@ -57,10 +58,16 @@ class BlogPage(RoutablePageMixin, Page):
     def get_base_posts(self):
         return BlogPost.objects.child_of(self).live()  # type: ignore[attr-defined]
 
+    def with_card_relations(self, posts):
+        """Load everything a post card renders (image, author avatar, category, tags) up front."""
+        return posts.select_related(
+            "featured_image", "author__wagtail_userprofile", "category"
+        ).prefetch_related("tags")
+
     def get_context(self, request, *args, **kwargs):
         context = super().get_context(request, *args, **kwargs)
         all_posts = self.get_base_posts()
-        posts = all_posts.order_by("-published_date")
+        posts = self.with_card_relations(all_posts.order_by("-published_date"))
         tag_slug = request.GET.get("tag")
         category_slug = request.GET.get("category")
         author_slug = request.GET.get("author")
@@ -101,6 +108,7 @@ class BlogPage(RoutablePageMixin, Page):
             .distinct()
         )
 
+    @use_read_replica
     def serve(self, request, *args, **kwargs):
         if request.headers.get("HX-Request") == "true":
             context = self.get_context(request, *args, **kwargs)
@@ -110,8 +118,10 @@ class BlogPage(RoutablePageMixin, Page):
     @route(r"^authors/$")
     def author_index(self, request):
         context = self.get_context(request)
-        context["authors"] = self.get_author_base_queryset().order_by(
-            "first_name", "last_name", "email"
+        context["authors"] = (
+            self.get_author_base_queryset()
+            .select_related("wagtail_userprofile")
+            .order_by("first_name", "last_name", "email")
         )
         return self.render(
             request,
@@ -129,7 +139,9 @@ class BlogPage(RoutablePageMixin, Page):
         )
         if not author:
             raise Http404
-        posts = self.get_base_posts().filter(author=author).order_by("-published_date")
+        posts = self.with_card_relations(
+            self.get_base_posts().filter(author=author).order_by("-published_date")
+        )
         context = self.get_context(request)
         context["author"] = author
         context["posts"] = posts
@@ -292,6 +304,8 @@ class BlogPost(Page):
     parent_page_types = ["blog.BlogPage"]
     subpage_types = []
     template = "blog/blog_post.html"
+    search_snippet_field = "summary"
+    search_thumbnail_field = "featured_image"
 
     def save(self, *args, **kwargs):
         if self.auto_reading_time:
@@ -1,3 +1,52 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from wagtail.images import get_image_model
+from wagtail.images.tests.utils import get_test_image_file
+
+from blog.models import BlogCategory, BlogPage, BlogPost
+from core.testing import QueryScalingMixin, SitePagesMixin
+
+
+class BlogPageQueryTests(SitePagesMixin, QueryScalingMixin, TestCase):
+    index_page_class = BlogPage
+    index_title = "Blog"
+
+    def setUp(self):
+        super().setUp()
+        self.categories = [
+            BlogCategory.objects.create(title=title, slug=title.lower()) for title in ("News", "Food")
+        ]
+
+    def add_posts(self, count):
+        ImageModel = get_image_model()
+        for _ in range(count):
+            number = self.next_number()
+            author = get_user_model().objects.create_user(
+                username=f"author{number}",
+                email=f"author{number}@example.com",
+                first_name="Author",
+                last_name=str(number),
+            )
+            post = BlogPost(
+                title=f"Post {number}",
+                slug=f"post-{number}",
+                published_date=date(2024, 1, number),
+                author=author,
+                category=self.categories[number % 2],
+                featured_image=ImageModel.objects.create(
+                    title=f"Image {number}", file=get_test_image_file()
+                ),
+            )
+            post.tags.add(f"tag-{number}", "bangkok")
+            self.index.add_child(instance=post)
+
+    def test_index_queries_do_not_scale_with_posts(self):
+        self.assertQueriesDoNotScale(lambda: self.client.get(self.index.url), self.add_posts)
 
-# Create your tests here.
+    def test_htmx_results_queries_do_not_scale_with_posts(self):
+        self.assertQueriesDoNotScale(
+            lambda: self.client.get(self.index.url, {"category": "food"}, HTTP_HX_REQUEST="true"),
+            self.add_posts,
+        )
@@ -0,0 +1,80 @@
+"""
+Gunicorn settings, loaded with ``gunicorn --config config/gunicorn.py``.
+
+Each value can be overridden with a ``GUNICORN_*`` environment variable
+(command-line flags still win). ``APP_SERVER`` picks the application:
+``wsgi`` runs ``config.wsgi`` on sync workers, or on ``gthread`` workers
+when ``GUNICORN_THREADS`` is above 1; ``asgi`` runs ``config.asgi`` on Uvicorn
+workers.
+
+The application is preloaded in the master, so Django, Wagtail and the
+project modules are imported once and shared copy-on-write by the workers.
+Workers are recycled after ``max_requests`` (plus jitter, so they don't all
+restart together), which bounds memory growth from Pillow and long-lived
+per-process caches.
+"""
+
+import os
+
+
+def _env_int(name, default):
+    value = os.environ.get(name, "").strip()
+    return int(value) if value else default
+
+
+def _env_flag(name, default):
+    value = os.environ.get(name, "").strip().lower()
+    if not value:
+        return default
+    return value in {"1", "true", "yes", "on"}
+
+
+def _cpu_count():
+    # CPUs this process may run on, which respects container CPU sets.
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+app_server = os.environ.get("APP_SERVER", "wsgi")
+wsgi_app = "config.asgi:application" if app_server == "asgi" else "config.wsgi:application"
+
+bind = os.environ.get("GUNICORN_BIND", f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+
+threads = _env_int("GUNICORN_THREADS", 1)
+if app_server == "asgi":
+    worker_class = "uvicorn_worker.UvicornWorker"
+    # One event loop per worker already serves many requests at once.
+    workers = _env_int("GUNICORN_WORKERS", _cpu_count() + 1)
+elif threads > 1:
+    worker_class = "gthread"
+    workers = _env_int("GUNICORN_WORKERS", _cpu_count() + 1)
+else:
+    worker_class = "sync"
+    workers = _env_int("GUNICORN_WORKERS", _cpu_count() * 2 + 1)
+
+preload_app = _env_flag("GUNICORN_PRELOAD", True)
+
+max_requests = _env_int("GUNICORN_MAX_REQUESTS", 1000)
+max_requests_jitter = _env_int("GUNICORN_MAX_REQUESTS_JITTER", 200)
+
+timeout = _env_int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = _env_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+keepalive = _env_int("GUNICORN_KEEPALIVE", 5)
+
+# Worker heartbeats go to tmpfs; on a container's overlay filesystem they
+# can stall long enough for the master to kill healthy workers.
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+accesslog = os.environ.get("GUNICORN_ACCESSLOG", "-")
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    # With preload_app, anything the master opened while importing the
+    # project would be shared by every worker; give each its own.
+    from django.db import connections
+
+    for connection in connections.all(initialized_only=True):
+        connection.close()
@@ -47,6 +47,8 @@ INSTALLED_APPS = [
     "modelcluster",
     "taggit",
     "django_filters",
+    "django_tasks",
+    "django_tasks.backends.database",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -59,6 +61,7 @@ AUTH_USER_MODEL = "accounts.User"
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -100,7 +103,29 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
-    }
+        "OPTIONS": {
+            # Take the write lock when a transaction starts. A deferred
+            # transaction that later tries to write cannot wait for the lock
+            # and fails with "database is locked" straight away.
+            "transaction_mode": "IMMEDIATE",
+        },
+    },
+}
+DATABASE_ROUTERS = ["core.db.ReadReplicaRouter"]
+# Alias reads are routed to inside core.db.use_read_replica views; None keeps
+# them on "default". local.py defines a "replica" alias and sets this only when
+# DATABASE_REPLICA_URL points at a streaming replica.
+READ_REPLICA_DATABASE = None
+
+# Applied to every new SQLite connection by core.db.apply_sqlite_pragmas.
+# cache_size is in KiB when negative; mmap_size is in bytes.
+SQLITE_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "busy_timeout": 5000,
+    "cache_size": -20000,
+    "mmap_size": 134217728,
+    "temp_store": "memory",
 }
 
 
@@ -194,6 +219,33 @@ NAV_EXCLUDE_MODELS = ["blog.blogpost"]
 NAVIGATION_ROOT_PAGE_ID = None
 NAVIGATION_ROOT_SLUG = None
 
+# Background tasks (django-tasks, also used by Wagtail)
+# The immediate backend runs a task as soon as it is enqueued, in the same
+# process; Wagtail's search and reference index updates use it. Avatar
+# conversion has its own alias on the database backend, so the upload request
+# only stores the original file and queues a row: run
+# `manage.py db_worker --backend avatars` next to the web processes to encode
+# them.
+TASKS = {
+    "default": {
+        "BACKEND": "django_tasks.backends.immediate.ImmediateBackend",
+    },
+    "avatars": {
+        "BACKEND": "django_tasks.backends.database.DatabaseBackend",
+    },
+}
+
+# Uploaded avatars are downsized to fit this box (in pixels) and stored as WebP.
+AVATAR_MAX_SIZE = 192
+
+# Request timing (opt-in): add "core.instrumentation.RequestTimingMiddleware"
+# at the top of MIDDLEWARE. This share of requests records SQL, template and
+# rendition timings in a Server-Timing header; sampled requests slower than
+# REQUEST_TIMING_SLOW_MS are logged with their most repeated queries.
+REQUEST_TIMING_SAMPLE_RATE = 0.05
+REQUEST_TIMING_SLOW_MS = 500
+REQUEST_TIMING_SERVER_TIMING_HEADER = True
+
 # Search
 # https://docs.wagtail.org/en/stable/topics/search/backends.html
 WAGTAILSEARCH_BACKENDS = {
@@ -202,6 +254,23 @@ WAGTAILSEARCH_BACKENDS = {
     }
 }
 
+# Caches
+# The default cache is local to each process. Cached search result pages live
+# there, keyed by a version counter that is stored in the database
+# (core.versions), so a write in any process or management command retires
+# them everywhere. The same counters invalidate the per-process transit graph,
+# POI facet bitsets and suggest index. Don't move the counters to a cache
+# unless every process shares that cache (Redis, Memcached, DatabaseCache).
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+SEARCH_RESULTS_CACHE_TIMEOUT = 300
+# Per-process POI facet bitsets are also rebuilt after this many seconds, to
+# pick up writes that bypass model signals.
+FACET_INDEX_MAX_AGE = 300
+
 # Base URL to use when referring to full URLs within the Wagtail admin backend -
 # e.g. in notification emails. Don't include '/admin' or a trailing slash
 WAGTAILADMIN_BASE_URL = "http://example.com"
@@ -11,6 +11,14 @@ ALLOWED_HOSTS = ["*"]
 
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
+# A second, query_only connection to the SQLite file, to try read routing
+# locally: set READ_REPLICA_DATABASE = "replica".
+DATABASES["replica"] = {
+    "ENGINE": DATABASES["default"]["ENGINE"],
+    "NAME": DATABASES["default"]["NAME"],
+    "TEST": {"MIRROR": "default"},
+}
+
 
 try:
     from .local import *
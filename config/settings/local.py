@@ -15,6 +15,65 @@ if env_path.exists():
         os.environ.setdefault(key, value)
 
 
+def _env_int(name, default):
+    value = os.environ.get(name, "").strip()
+    return int(value) if value else default
+
+
+def _env_flag(name, default):
+    value = os.environ.get(name, "").strip().lower()
+    if not value:
+        return default
+    return value in {"1", "true", "yes", "on"}
+
+
+def _requests_per_process():
+    """
+    Requests one web process serves at once, as config/gunicorn.py runs it:
+    GUNICORN_THREADS for sync and gthread workers, None (no fixed bound) for
+    Uvicorn workers.
+    """
+    if os.environ.get("APP_SERVER", "wsgi") == "asgi":
+        return None
+    return max(1, _env_int("GUNICORN_THREADS", 1))
+
+
+def _connection_reuse():
+    """
+    Connection reuse for PostgreSQL aliases. A sync worker handles one request
+    at a time and never needs more than one connection per alias, so it keeps
+    a persistent connection for DATABASE_CONN_MAX_AGE seconds. Threaded and
+    Uvicorn workers default to a psycopg pool per process and alias, of
+    DATABASE_POOL_MIN_SIZE (1) to DATABASE_POOL_MAX_SIZE connections
+    (GUNICORN_THREADS, or 8 under ASGI). DATABASE_POOL=1/0 forces either.
+    Either way connections are checked before reuse, so one the server or a
+    proxy has dropped is replaced instead of failing the request.
+    """
+    concurrency = _requests_per_process()
+    if not _env_flag("DATABASE_POOL", concurrency != 1):
+        return {
+            "CONN_MAX_AGE": _env_int("DATABASE_CONN_MAX_AGE", 60),
+            "CONN_HEALTH_CHECKS": True,
+        }
+    return {
+        # Django refuses persistent connections on top of a pool.
+        "CONN_MAX_AGE": 0,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "pool": {
+                "min_size": _env_int("DATABASE_POOL_MIN_SIZE", 1),
+                "max_size": _env_int("DATABASE_POOL_MAX_SIZE", concurrency or 8),
+                # Seconds a request waits for a free connection.
+                "timeout": _env_int("DATABASE_POOL_TIMEOUT", 10),
+                # Idle connections above min_size close after max_idle
+                # seconds; all of them are recycled after max_lifetime.
+                "max_idle": _env_int("DATABASE_POOL_MAX_IDLE", 300),
+                "max_lifetime": _env_int("DATABASE_POOL_MAX_LIFETIME", 1800),
+            },
+        },
+    }
+
+
 def _database_from_url(url):
     parsed = urlparse(url)
     if parsed.scheme not in {"postgres", "postgresql"}:
@@ -26,6 +85,7 @@ def _database_from_url(url):
         "PASSWORD": unquote(parsed.password or ""),
         "HOST": parsed.hostname or "localhost",
         "PORT": str(parsed.port or 5432),
+        **_connection_reuse(),
     }
 
 
@@ -38,4 +98,15 @@ if env_path.exists():
         "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
         "HOST": os.environ.get("POSTGRES_HOST", "localhost"),
         "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+        **_connection_reuse(),
     }
+    # Reads from core.db.use_read_replica views go to a streaming replica, if
+    # there is one. Without it they stay on "default"; a second alias on the
+    # primary would only double the connections.
+    replica = _database_from_url(os.environ.get("DATABASE_REPLICA_URL", ""))
+    if replica:
+        DATABASES["replica"] = {**replica, "TEST": {"MIRROR": "default"}}
+        READ_REPLICA_DATABASE = "replica"
+    else:
+        # dev.py's replica is a connection to the SQLite file.
+        DATABASES.pop("replica", None)
@@ -2,11 +2,10 @@ from .base import *
 
 DEBUG = False
 
-# ManifestStaticFilesStorage is recommended in production, to prevent
-# outdated JavaScript / CSS assets being served from cache
-# (e.g. after a Wagtail upgrade).
-# See https://docs.djangoproject.com/en/5.2/ref/contrib/staticfiles/#manifeststaticfilesstorage
-STORAGES["staticfiles"]["BACKEND"] = "django.contrib.staticfiles.storage.ManifestStaticFilesStorage"
+# Fingerprinted, precompressed static files (see core.staticfiles): they are
+# served with a one-year "immutable" Cache-Control, and a deploy can't leave
+# browsers with outdated JavaScript / CSS (e.g. after a Wagtail upgrade).
+STORAGES["staticfiles"]["BACKEND"] = "core.staticfiles.StaticFilesStorage"
 
 try:
     from .local import *
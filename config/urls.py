@@ -19,6 +19,7 @@ urlpatterns = [
     path("admin/", include(wagtailadmin_urls)),
     path("documents/", include(wagtaildocs_urls)),
     path("map/", include("map.urls")),
+    path("search/suggest/", search_views.suggest, name="search_suggest"),
     path("search/", search_views.search, name="search"),
 ]
 
@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    name = "core"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from core.db import apply_sqlite_pragmas
+        from core.instrumentation import register_signal_handlers
+
+        connection_created.connect(apply_sqlite_pragmas)
+        register_signal_handlers()
@@ -0,0 +1,224 @@
+"""
+Page-rendering benchmarks.
+
+``seed_dataset`` builds a site with ``generate_load_data`` at a given scale,
+``build_scenarios`` lists the hot views against it and ``measure`` renders
+each one through the test client, recording latency, query count and peak
+allocated memory. Results are plain dicts so they can be written to JSON and
+compared across commits with ``compare``. Everything here runs against a
+throwaway test database and ``MEDIA_ROOT`` set up by the ``run_benchmarks``
+command.
+
+Search results and POI facets are cached against the search index version,
+so a warm run only times cache hits. ``cold`` scenarios bump that version
+before every request to time the rebuild as well.
+"""
+
+from __future__ import annotations
+
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from wagtail.models import Page, Site
+
+from blog.models import BlogCategory, BlogPage, BlogPost
+from core.bulk_pages import SlugAllocator, bulk_add_children
+from home.models import HomePage
+from poi.models import POICategory, POIFeature, POIIndexPage, POIPage
+from public_transport.models import (
+    PublicTransportIndexPage,
+    PublicTransportLinePage,
+    PublicTransportStationPage,
+    PublicTransportSystemPage,
+    stations_on_line,
+)
+from search.cache import bump_index_version
+
+FEATURES = ("wifi", "parking", "rooftop", "pet-friendly", "vegan", "live-music")
+# Metrics checked against a baseline, all "higher is worse". Query counts
+# are deterministic, so any increase counts as a regression.
+COMPARED_METRICS = ("median_ms", "queries", "peak_kb")
+STRICT_METRICS = {"queries"}
+
+
+@dataclass
+class Scenario:
+    name: str
+    path: str
+    headers: dict[str, str] = field(default_factory=dict)
+    cold: bool = False
+
+
+def seed_dataset(scale: int, stdout=None) -> dict:
+    """Create a site with ``scale`` blog posts and POIs and return the pages the scenarios use."""
+    root = Page.get_first_root_node()
+    home = root.add_child(instance=HomePage(title="Benchmark home", slug="benchmark-home"))
+    Site.objects.update_or_create(
+        is_default_site=True,
+        defaults={"hostname": "testserver", "port": 80, "root_page": home},
+    )
+
+    user_model = get_user_model()
+    for number in range(5):
+        user_model.objects.create_user(
+            username=f"author{number}", email=f"author{number}@example.com", password=None
+        )
+    for title in ("News", "Food", "Travel", "Culture", "Guides"):
+        BlogCategory.objects.get_or_create(slug=title.lower(), defaults={"title": title})
+    blog = home.add_child(instance=BlogPage(title="Blog", slug="blog"))
+
+    category, _ = POICategory.objects.get_or_create(title="Benchmark places")
+    for slug in FEATURES:
+        POIFeature.objects.get_or_create(slug=slug, defaults={"title": slug.replace("-", " ").title()})
+    places = home.add_child(instance=POIIndexPage(title="Places", slug="places", category=category))
+
+    call_command(
+        "generate_load_data",
+        blog_posts=scale,
+        pois=scale,
+        stations=max(60, scale // 10),
+        images=5,
+        seed=1,
+        skip_revisions=True,
+        stdout=stdout,
+    )
+
+    transport = home.add_child(instance=PublicTransportIndexPage(title="Transport", slug="transport"))
+    call_command("sync_transport_pages", index_id=transport.pk, all_systems=True, stdout=stdout)
+    system_page = PublicTransportSystemPage.objects.child_of(transport).first()
+    line_page = PublicTransportLinePage.objects.child_of(system_page).first()
+    stations = list(stations_on_line(line_page.line_id, "sequence"))
+    slugs = SlugAllocator(line_page)
+    bulk_add_children(
+        line_page,
+        [
+            PublicTransportStationPage(
+                title=station.station_label,
+                slug=slugs.allocate(station.station_label),
+                station=station,
+            )
+            for station in stations
+        ],
+        revisions=False,
+    )
+
+    # Put the two route endpoints next to either end of the line so the
+    # route scenario has a journey to find.
+    pois = list(POIPage.objects.child_of(places).order_by("pk")[:2])
+    for poi, station in zip(pois, (stations[0], stations[-1])):
+        poi.latitude = station.latitude + Decimal("0.001")
+        poi.longitude = station.longitude
+        POIPage.objects.filter(pk=poi.pk).update(latitude=poi.latitude, longitude=poi.longitude)
+
+    return {
+        "blog": blog,
+        "post": BlogPost.objects.child_of(blog).order_by("-published_date").first(),
+        "places": places,
+        "pois": pois,
+        "system_page": system_page,
+        "line_page": line_page,
+        "station_page": PublicTransportStationPage.objects.child_of(line_page).order_by("path")[1],
+    }
+
+
+def build_scenarios(pages: dict) -> list[Scenario]:
+    blog_url = pages["blog"].url
+    places_url = pages["places"].url
+    station = pages["station_page"].station
+    first_poi, second_poi = pages["pois"]
+    htmx = {"HX-Request": "true"}
+    return [
+        Scenario("blog_index", blog_url),
+        Scenario("blog_index_category", f"{blog_url}?category=food"),
+        Scenario("blog_index_htmx", f"{blog_url}?category=food", htmx),
+        Scenario("blog_post", pages["post"].url),
+        Scenario("poi_index", places_url),
+        Scenario("poi_index_features", f"{places_url}?feature=wifi&feature=parking"),
+        Scenario("poi_index_features_cold", f"{places_url}?feature=wifi&feature=parking", cold=True),
+        Scenario("poi_index_features_any", f"{places_url}?feature=wifi&feature=vegan&match=any"),
+        Scenario("poi_index_search", f"{places_url}?q=cafe"),
+        Scenario("poi_index_search_cold", f"{places_url}?q=cafe", cold=True),
+        Scenario("poi_index_nearby", f"{places_url}?near=13.7563,100.5018&radius=5"),
+        Scenario("transport_system", pages["system_page"].url),
+        Scenario("transport_line", pages["line_page"].url),
+        Scenario("transport_station", pages["station_page"].url),
+        Scenario("search", "/search/?query=station"),
+        Scenario("search_cold", "/search/?query=station", cold=True),
+        Scenario(
+            "transport_map",
+            f"/map/transport/?lat={station.latitude}&lng={station.longitude}&title=Station",
+        ),
+        Scenario("transport_route", f"/map/route/?from={first_poi.pk}&to={second_poi.pk}"),
+    ]
+
+
+def _headers(headers: dict[str, str]) -> dict[str, str]:
+    return {f"HTTP_{name.upper().replace('-', '_')}": value for name, value in headers.items()}
+
+
+def measure(client, scenario: Scenario, repeat: int) -> dict:
+    """
+    Render ``scenario`` once to warm caches, ``repeat`` times for timing
+    and once more under tracemalloc for peak memory, which would otherwise
+    skew the timings. Cold scenarios bump the search index version, outside
+    the timed part, before each of those requests.
+    """
+    headers = _headers(scenario.headers)
+    response = client.get(scenario.path, **headers)
+    status = response.status_code
+
+    timings = []
+    for _ in range(repeat):
+        if scenario.cold:
+            bump_index_version()
+        started = time.perf_counter()
+        client.get(scenario.path, **headers)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    if scenario.cold:
+        bump_index_version()
+    with CaptureQueriesContext(connection) as queries:
+        tracemalloc.start()
+        client.get(scenario.path, **headers)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "path": scenario.path,
+        "status": status,
+        "runs": repeat,
+        "min_ms": round(timings[0], 2),
+        "median_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+        "queries": len(queries),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list[str]:
+    """
+    Return one line per metric that got worse than ``baseline`` by more
+    than ``max_regression`` percent (or at all, for query counts).
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = previous.get(metric), current.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before * 100
+            allowed = 0 if metric in STRICT_METRICS else max_regression
+            if change > allowed:
+                regressions.append(f"{name}.{metric}: {before} -> {after} (+{change:.0f}%)")
+    return regressions
@@ -0,0 +1,161 @@
+"""
+Bulk page creation.
+
+``Page.add_child`` locks and re-reads the parent for every page and
+``save_revision().publish()`` adds several more queries, which is fine for
+editors and far too slow for seeding tens of thousands of pages.
+``bulk_add_children`` computes the treebeard paths and Wagtail core fields
+in memory and writes each table with batched inserts instead. Model
+``save()`` overrides and page signals do not run, so callers fill in any
+derived fields themselves and index the pages afterwards.
+"""
+
+from __future__ import annotations
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.text import slugify
+from modelcluster.models import get_all_child_m2m_relations, get_all_child_relations
+from wagtail.models import Page, Revision
+
+DEFAULT_BATCH_SIZE = 500
+
+
+class SlugAllocator:
+    """Hand out slugs that are unique among a parent's children, with one query up front."""
+
+    def __init__(self, parent: Page):
+        self.taken = set(parent.get_children().values_list("slug", flat=True))
+
+    def allocate(self, title: str, fallback: str = "page") -> str:
+        base_slug = slugify(title)[:200].strip("-") or fallback
+        slug = base_slug
+        suffix = 2
+        while slug in self.taken:
+            slug = f"{base_slug}-{suffix}"
+            suffix += 1
+        self.taken.add(slug)
+        return slug
+
+
+def _next_step(parent: Page) -> int:
+    last_child = parent.get_last_child()
+    if last_child is None:
+        return 1
+    return Page._str2int(last_child.path[-Page.steplen :]) + 1
+
+
+def bulk_add_children(
+    parent: Page,
+    pages: list[Page],
+    *,
+    revisions: bool = True,
+    user=None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> list[Page]:
+    """
+    Insert ``pages`` as live children of ``parent`` and return them with pks.
+
+    Every page must be an unsaved instance of a direct ``Page`` subclass with
+    ``title`` and ``slug`` set. With ``revisions`` each page also gets a
+    published revision built from its in-memory state; assign cluster
+    relations (``page.gallery_images = [...]``) before calling to have them
+    serialised without extra queries. Saving those relations is up to the
+    caller.
+    """
+    if not pages:
+        return pages
+    models = {type(page) for page in pages}
+    for model in models:
+        if model._meta.get_parent_list() != [Page]:
+            raise ValueError(f"{model.__name__} is not a direct Page subclass.")
+
+    now = timezone.now()
+    content_types = ContentType.objects.get_for_models(*models)
+    with transaction.atomic():
+        parent = Page.objects.select_for_update().get(pk=parent.pk)
+        step = _next_step(parent)
+        depth = parent.depth + 1
+        for offset, page in enumerate(pages):
+            page.path = Page._get_path(parent.path, depth, step + offset)
+            page.depth = depth
+            page.numchild = 0
+            page.url_path = f"{parent.url_path}{page.slug}/"
+            page.draft_title = page.draft_title or page.title
+            page.locale_id = parent.locale_id
+            page.content_type = content_types[type(page)]
+            page.live = True
+            page.has_unpublished_changes = False
+            page.first_published_at = page.first_published_at or now
+            page.last_published_at = page.last_published_at or now
+            page.owner = page.owner or user
+
+        base_fields = [field for field in Page._meta.concrete_fields if not field.primary_key]
+        bases = Page.objects.bulk_create(
+            [
+                Page(**{field.attname: getattr(page, field.attname) for field in base_fields})
+                for page in pages
+            ],
+            batch_size=batch_size,
+        )
+        for page, base in zip(pages, bases):
+            page.page_ptr_id = page.id = base.pk
+            page._state.adding = False
+            page._state.db = base._state.db
+
+        for model in models:
+            rows = [page for page in pages if type(page) is model]
+            # bulk_create() refuses multi-table models; the child table rows
+            # go in through the same internal insert that Model.save() uses.
+            fields = model._meta.local_concrete_fields
+            for start in range(0, len(rows), batch_size):
+                model._base_manager._insert(rows[start : start + batch_size], fields=fields)
+
+        Page.objects.filter(pk=parent.pk).update(numchild=F("numchild") + len(pages))
+
+        if revisions:
+            _bulk_publish_revisions(pages, bases, user, now, batch_size)
+    return pages
+
+
+def _assume_no_relations(page):
+    # The page was only just inserted, so any cluster relation the caller did
+    # not assign in memory is empty; say so instead of querying for it.
+    assigned = getattr(page, "_cluster_related_objects", {})
+    names = [relation.get_accessor_name() for relation in get_all_child_relations(page)]
+    names.extend(field.name for field in get_all_child_m2m_relations(page))
+    for name in names:
+        if name not in assigned:
+            setattr(page, name, [])
+
+
+def _bulk_publish_revisions(pages, bases, user, now, batch_size):
+    page_content_type = ContentType.objects.get_for_model(Page)
+    for page in pages:
+        _assume_no_relations(page)
+    created = Revision.objects.bulk_create(
+        [
+            Revision(
+                content_type_id=page.content_type_id,
+                base_content_type=page_content_type,
+                object_id=str(page.pk),
+                created_at=now,
+                user=user,
+                content=page.serializable_data(),
+                object_str=str(page),
+            )
+            for page in pages
+        ],
+        batch_size=batch_size,
+    )
+    for page, base, revision in zip(pages, bases, created):
+        page.latest_revision_id = page.live_revision_id = revision.pk
+        base.latest_revision_id = base.live_revision_id = revision.pk
+        page.latest_revision_created_at = base.latest_revision_created_at = now
+    Page.objects.bulk_update(
+        bases,
+        ["latest_revision", "live_revision", "latest_revision_created_at"],
+        batch_size=batch_size,
+    )
@@ -0,0 +1,114 @@
+"""
+Database connection tuning and read-replica routing.
+
+``apply_sqlite_pragmas`` runs for every new SQLite connection and applies
+``SQLITE_PRAGMAS``. The defaults switch to WAL journaling (readers no longer
+block the writer or each other), make writers wait ``busy_timeout`` ms for
+the lock instead of failing with "database is locked", relax ``synchronous``
+to NORMAL (durable with WAL except on power loss) and give each connection
+a bigger page cache and memory-mapped reads.
+
+``ReadReplicaRouter`` sends reads to ``READ_REPLICA_DATABASE`` while a view
+wrapped in ``use_read_replica`` runs; writes always go to ``default``. With
+SQLite the replica is a second, ``query_only`` connection to the same file,
+so read-heavy views cannot take the write lock; the alias can point at a
+real replica instead.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from core.instrumentation import track_render
+
+_reading_from_replica: ContextVar[bool] = ContextVar("reading_from_replica", default=False)
+
+
+def read_replica_alias() -> str | None:
+    """The configured replica alias, or ``None`` when reads stay on ``default``."""
+    alias = getattr(settings, "READ_REPLICA_DATABASE", None)
+    return alias if alias in settings.DATABASES else None
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """``connection_created`` receiver applying ``SQLITE_PRAGMAS`` to SQLite connections."""
+    if connection.vendor != "sqlite":
+        return
+    pragmas = dict(getattr(settings, "SQLITE_PRAGMAS", {}))
+    if connection.alias == read_replica_alias():
+        pragmas["query_only"] = "on"
+    for name, value in pragmas.items():
+        # Straight on the DB-API connection: this runs while Django is still
+        # setting the connection up.
+        connection.connection.execute(f"PRAGMA {name} = {value}")
+
+
+@contextmanager
+def read_replica():
+    """Route reads inside the block to the replica, if one is configured."""
+    token = _reading_from_replica.set(True)
+    try:
+        yield
+    finally:
+        _reading_from_replica.reset(token)
+
+
+def use_read_replica(view):
+    """
+    Decorator for views and ``Page.serve`` methods running them under
+    ``read_replica``; async views are supported. Template responses are
+    rendered inside the block so the template's queries go to the replica too,
+    and the render is timed for ``RequestTimingMiddleware`` there.
+    """
+    if iscoroutinefunction(view):
+
+        @wraps(view)
+        async def async_wrapped(*args, **kwargs):
+            with read_replica():
+                response = await view(*args, **kwargs)
+                if callable(getattr(response, "render", None)):
+                    with track_render():
+                        await sync_to_async(response.render)()
+            return response
+
+        return async_wrapped
+
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        with read_replica():
+            response = view(*args, **kwargs)
+            if callable(getattr(response, "render", None)):
+                with track_render():
+                    response.render()
+        return response
+
+    return wrapped
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _reading_from_replica.get():
+            return read_replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Explicit, or instances read from the replica would be saved back
+        # to it.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, read_replica_alias()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == read_replica_alias():
+            return False
+        return None
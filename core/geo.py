@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in kilometres."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat: float, lng: float, radius_km: float) -> tuple[float, float, float, float]:
+    """
+    Return ``(min_lat, max_lat, min_lng, max_lng)`` enclosing the circle.
+
+    The box is a cheap, index-friendly superset of the circle; callers still
+    check the exact distance. Longitude spans widen towards the poles and
+    are not wrapped across the antimeridian.
+    """
+    d_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(lat))
+    d_lng = 180.0 if cos_lat < 1e-6 else min(180.0, d_lat / cos_lat)
+    return (
+        max(-90.0, lat - d_lat),
+        min(90.0, lat + d_lat),
+        max(-180.0, lng - d_lng),
+        min(180.0, lng + d_lng),
+    )
+
+
+def parse_point(value: str | None) -> tuple[float, float] | None:
+    """Parse ``"lat,lng"``; returns ``None`` for missing or invalid input."""
+    if not value:
+        return None
+    try:
+        lat, lng = (float(part) for part in value.split(","))
+    except ValueError:
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
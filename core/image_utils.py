@@ -6,6 +6,27 @@ from django.db import models
 from wagtail.fields import StreamField
 from wagtail.images import get_image_model
 
+EXIF_ORIENTATION_TAG = 0x0112
+# EXIF orientations that rotate the image by 90 or 270 degrees.
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+def read_image_dimensions(fp: Any) -> tuple[int, int]:
+    """
+    Return the display dimensions of an image without decoding its pixels.
+
+    Only the header and EXIF block are parsed; the orientation tag is applied
+    so the result matches ``ImageOps.exif_transpose(image).size``.
+    """
+    from PIL import Image
+
+    with Image.open(fp) as image:
+        width, height = image.size
+        orientation = image.getexif().get(EXIF_ORIENTATION_TAG)
+    if orientation in TRANSPOSED_ORIENTATIONS:
+        return height, width
+    return width, height
+
 
 def _collect_image_ids(value: Any, image_ids: set[int]) -> None:
     if isinstance(value, dict):
@@ -0,0 +1,131 @@
+"""
+Startup import profiling.
+
+``profile_startup`` starts a fresh interpreter with ``python -X importtime``,
+runs ``django.setup()`` (and optionally loads the URLconf and template
+libraries, as a web worker does before its first response) and parses the
+report. ``summarize`` groups the modules by installed app, or by top-level
+package for everything else, and ``project_imports`` lists what the project's
+own modules pull in.
+
+``-X importtime`` charges a module to whichever importer loaded it first; a
+module that is already loaded costs nothing the second time. A project module
+is therefore only "responsible" for a dependency if nothing imported it earlier.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)\s*$")
+
+SETUP_SCRIPT = "import django; django.setup()"
+WORKER_SCRIPT = (
+    SETUP_SCRIPT
+    + "; from django.urls import get_resolver; get_resolver().url_patterns"
+    + "; from django.template import engines; engines.all()"
+)
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+    parent: str | None = None
+
+
+@dataclass
+class GroupStats:
+    name: str
+    self_us: int = 0
+    modules: int = 0
+
+
+def parse_importtime(report: str) -> list[ImportRecord]:
+    """Parse ``-X importtime`` output, linking each module to the module that imported it."""
+    records = []
+    for line in report.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            # Nesting is two spaces per level after the first.
+            depth = (len(indent) - 1) // 2
+            records.append(ImportRecord(module, int(self_us), int(cumulative_us), depth))
+
+    # The report lists children before their parent, so walking it backwards
+    # sees each parent first.
+    stack: list[ImportRecord] = []
+    for record in reversed(records):
+        while stack and stack[-1].depth >= record.depth:
+            stack.pop()
+        record.parent = stack[-1].module if stack else None
+        stack.append(record)
+    return records
+
+
+def group_for(module: str, app_names: list[str]) -> str:
+    """
+    The first app in ``app_names`` (ordered longest first) containing
+    ``module``, else its top-level package.
+    """
+    for name in app_names:
+        if module == name or module.startswith(f"{name}."):
+            return name
+    return module.partition(".")[0]
+
+
+def summarize(records: list[ImportRecord], app_names: list[str]) -> list[GroupStats]:
+    """Self time per group, slowest first."""
+    apps_longest_first = sorted(app_names, key=len, reverse=True)
+    groups: dict[str, GroupStats] = {}
+    for record in records:
+        name = group_for(record.module, apps_longest_first)
+        stats = groups.setdefault(name, GroupStats(name))
+        stats.self_us += record.self_us
+        stats.modules += 1
+    return sorted(groups.values(), key=lambda stats: stats.self_us, reverse=True)
+
+
+def project_imports(
+    records: list[ImportRecord], project_packages: set[str]
+) -> list[tuple[str, str, int]]:
+    """
+    ``(importer, module, cumulative_us)`` for each outside module first
+    imported by a project module, slowest first.
+    """
+    def is_project(module: str | None) -> bool:
+        return module is not None and module.partition(".")[0] in project_packages
+
+    found = defaultdict(int)
+    for record in records:
+        if is_project(record.parent) and not is_project(record.module):
+            found[(record.parent, record.module)] += record.cumulative_us
+    return sorted(
+        ((importer, module, us) for (importer, module), us in found.items()),
+        key=lambda item: item[2],
+        reverse=True,
+    )
+
+
+def profile_startup(script: str, settings_module: str, cwd: Path) -> list[ImportRecord]:
+    """Run ``script`` under ``-X importtime`` in a new interpreter and parse the report."""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode:
+        lines = result.stderr.strip().splitlines() or ["interpreter exited with an error"]
+        raise RuntimeError(lines[-1])
+    return parse_importtime(result.stderr)
@@ -0,0 +1,247 @@
+"""
+Sampled per-request timing.
+
+``RequestTimingMiddleware`` picks a share of requests
+(``REQUEST_TIMING_SAMPLE_RATE``) and records, for each of them, the number
+and duration of SQL queries, the template render time and the time spent
+generating image renditions. The numbers go out as a ``Server-Timing``
+header and requests slower than ``REQUEST_TIMING_SLOW_MS`` are logged with
+their most repeated queries, which is usually where an N+1 shows up.
+Requests that are not sampled only pay for one random number.
+
+The metrics live in a context variable, so code outside the request cycle
+(``track_rendition`` in ``CustomImage.generate_rendition_file``,
+``track_render`` in views that render their own template responses, the
+``before_serve_page`` hook) can add to them without being passed anything.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.models.signals import post_save
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SAMPLE_RATE = 0.0
+DEFAULT_SLOW_MS = 500
+DEFAULT_TOP_DUPLICATES = 5
+# Normalised statements are cut to this length in the slow-request log.
+SQL_PREVIEW_CHARS = 200
+
+
+@dataclass
+class RequestMetrics:
+    sql_count: int = 0
+    sql_ms: float = 0.0
+    render_ms: float = 0.0
+    rendition_count: int = 0
+    rendition_ms: float = 0.0
+    page: str = ""
+    statements: Counter = field(default_factory=Counter)
+
+    def server_timing(self, total_ms: float) -> str:
+        entries = [
+            f'sql;dur={self.sql_ms:.1f};desc="{self.sql_count} queries"',
+            f"render;dur={self.render_ms:.1f}",
+            f'img;dur={self.rendition_ms:.1f};desc="{self.rendition_count} renditions"',
+            f"total;dur={total_ms:.1f}",
+        ]
+        return ", ".join(entries)
+
+    def duplicates(self, limit: int) -> list[tuple[str, int]]:
+        return [(sql, count) for sql, count in self.statements.most_common(limit) if count > 1]
+
+
+_current: ContextVar[RequestMetrics | None] = ContextVar("request_metrics", default=None)
+
+
+def current_metrics() -> RequestMetrics | None:
+    """Metrics of the sampled request being handled, or ``None``."""
+    return _current.get()
+
+
+@contextmanager
+def track_rendition():
+    """Time a rendition being generated and add it to the current request's metrics."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.rendition_ms += (time.perf_counter() - started) * 1000
+
+
+@contextmanager
+def track_render():
+    """Time a template response rendered before it reaches the middleware."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.render_ms += (time.perf_counter() - started) * 1000
+
+
+def _count_rendition(sender, instance, created, **kwargs):
+    metrics = _current.get()
+    if created and metrics is not None:
+        metrics.rendition_count += 1
+
+
+def register_signal_handlers():
+    # Renditions are counted for every image model; generation time is only
+    # known for CustomImage, which wraps its work in ``track_rendition``.
+    from django.apps import apps
+    from wagtail.images.models import AbstractRendition
+
+    for model in apps.get_models():
+        if issubclass(model, AbstractRendition):
+            post_save.connect(_count_rendition, sender=model)
+
+
+def record_page(request, page) -> None:
+    """``before_serve_page`` hook: label the slow-request log with the page type and id."""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.page = f"{page.specific_class.__name__}#{page.pk}"
+
+
+class _QueryRecorder:
+    def __init__(self, metrics: RequestMetrics):
+        self.metrics = metrics
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.metrics.sql_count += 1
+            self.metrics.sql_ms += (time.perf_counter() - started) * 1000
+            # Parameters are left out, so the same statement with different
+            # values counts as a repeat.
+            self.metrics.statements[sql] += 1
+
+
+@contextmanager
+def _record_queries(metrics: RequestMetrics):
+    """Record queries on this thread's connections while the block runs."""
+    recorder = _QueryRecorder(metrics)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield
+
+
+class RequestTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "REQUEST_TIMING_SAMPLE_RATE", DEFAULT_SAMPLE_RATE)
+        self.slow_ms = getattr(settings, "REQUEST_TIMING_SLOW_MS", DEFAULT_SLOW_MS)
+        self.send_header = getattr(settings, "REQUEST_TIMING_SERVER_TIMING_HEADER", True)
+        self.top_duplicates = getattr(
+            settings, "REQUEST_TIMING_TOP_DUPLICATES", DEFAULT_TOP_DUPLICATES
+        )
+        # Under ASGI, async views then run without a thread hop through here.
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _sampled(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._sampled():
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with _record_queries(metrics):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            # Connections belong to the thread that runs the request's sync
+            # code (views' sync_to_async calls, sync middleware), so the
+            # recorder is attached and removed there.
+            recording = _record_queries(metrics)
+            await sync_to_async(recording.__enter__)()
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(recording.__exit__)(None, None, None)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics, started)
+
+    def _finish(self, request, response, metrics, started):
+        total_ms = (time.perf_counter() - started) * 1000
+        if self.send_header:
+            response["Server-Timing"] = metrics.server_timing(total_ms)
+        if total_ms >= self.slow_ms:
+            self._log_slow(request, response, metrics, total_ms)
+        return response
+
+    def process_template_response(self, request, response):
+        metrics = _current.get()
+        # Responses rendered inside the view (``use_read_replica``) were
+        # timed there with ``track_render``.
+        if metrics is not None and not response.is_rendered:
+            started = time.perf_counter()
+
+            def finished(rendered):
+                metrics.render_ms += (time.perf_counter() - started) * 1000
+
+            response.add_post_render_callback(finished)
+        return response
+
+    def _log_slow(self, request, response, metrics, total_ms):
+        duplicates = "".join(
+            f"\n  {count}x {sql[:SQL_PREVIEW_CHARS]}"
+            for sql, count in metrics.duplicates(self.top_duplicates)
+        )
+        logger.warning(
+            "Slow request %s %s -> %s in %.0f ms%s: %d queries (%.0f ms), render %.0f ms, "
+            "%d renditions (%.0f ms)%s",
+            request.method,
+            request.get_full_path(),
+            response.status_code,
+            total_ms,
+            f" [{metrics.page}]" if metrics.page else "",
+            metrics.sql_count,
+            metrics.sql_ms,
+            metrics.render_ms,
+            metrics.rendition_count,
+            metrics.rendition_ms,
+            duplicates,
+        )
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from wagtail.images import get_image_model
+from wagtail.users.models import UserProfile
+
+DEFAULT_PREFIXES = (
+    "images/pages/",
+    "images/unassigned/",
+    "images/cache/",
+    "avatar_images/",
+)
+
+
+def _path_key(name: str) -> bytes:
+    # 8-byte digests keep the reference set small for very large libraries.
+    return hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest()
+
+
+def _referenced_fields():
+    ImageModel = get_image_model()
+    return [
+        (ImageModel, "file"),
+        (ImageModel.get_rendition_model(), "file"),
+        (UserProfile, "avatar"),
+    ]
+
+
+def _referenced_keys() -> set[bytes]:
+    keys = set()
+    for model, field in _referenced_fields():
+        names = (
+            model.objects.exclude(**{field: ""})
+            .values_list(field, flat=True)
+            .iterator(chunk_size=5000)
+        )
+        keys.update(_path_key(name) for name in names if name)
+    return keys
+
+
+def _still_referenced(names: list[str]) -> set[str]:
+    referenced = set()
+    for model, field in _referenced_fields():
+        referenced.update(
+            model.objects.filter(**{f"{field}__in": names}).values_list(field, flat=True)
+        )
+    return referenced
+
+
+def _iter_storage(storage, prefix: str) -> Iterator[tuple[str, float | None]]:
+    """Yield ``(name, mtime)`` for every file below ``prefix`` without listing it all up front."""
+    if isinstance(storage, FileSystemStorage):
+        root = Path(storage.location)
+        base = root / prefix
+        if not base.is_dir():
+            return
+        stack = [base]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(Path(entry.path))
+                    elif entry.is_file(follow_symlinks=False):
+                        name = Path(entry.path).relative_to(root).as_posix()
+                        yield name, entry.stat(follow_symlinks=False).st_mtime
+        return
+
+    stack = [prefix.rstrip("/")]
+    while stack:
+        current = stack.pop()
+        try:
+            directories, files = storage.listdir(current)
+        except FileNotFoundError:
+            continue
+        stack.extend(f"{current}/{directory}" for directory in directories)
+        for filename in files:
+            yield f"{current}/{filename}", None
+
+
+class Command(BaseCommand):
+    help = (
+        "Find media files that no image, rendition or avatar row references "
+        "and delete or quarantine them in batches. Reports only by default."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--prefix",
+            action="append",
+            help="Storage folder to scan (repeatable). Defaults to image and avatar folders.",
+        )
+        action = parser.add_mutually_exclusive_group()
+        action.add_argument(
+            "--delete",
+            action="store_true",
+            help="Delete orphaned files.",
+        )
+        action.add_argument(
+            "--quarantine",
+            action="store_true",
+            help="Move orphaned files below --quarantine-prefix instead of deleting them.",
+        )
+        parser.add_argument(
+            "--quarantine-prefix",
+            default="orphaned",
+            help="Storage folder for quarantined files; a timestamped subfolder is used per run.",
+        )
+        parser.add_argument(
+            "--min-age",
+            type=float,
+            default=24,
+            help="Skip files modified within this many hours (protects in-flight uploads).",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("batch-size must be >= 1")
+
+        storage = default_storage
+        prefixes = options["prefix"] or list(DEFAULT_PREFIXES)
+        cutoff = time.time() - options["min_age"] * 3600
+        quarantine_root = "{}/{}".format(
+            options["quarantine_prefix"].strip("/"),
+            timezone.now().strftime("%Y%m%d-%H%M%S"),
+        )
+
+        if not (options["delete"] or options["quarantine"]):
+            self.stdout.write("Report only: pass --delete or --quarantine to act on orphans.")
+
+        referenced = _referenced_keys()
+        self.stdout.write(f"Loaded {len(referenced)} referenced paths.")
+
+        scanned = 0
+        orphaned = 0
+        removed = 0
+        orphaned_bytes = 0
+        batch: list[str] = []
+
+        for prefix in prefixes:
+            for name, mtime in _iter_storage(storage, prefix):
+                scanned += 1
+                if _path_key(name) in referenced:
+                    continue
+                if mtime is not None and mtime > cutoff:
+                    continue
+                batch.append(name)
+                if len(batch) >= options["batch_size"]:
+                    counts = self._flush(storage, batch, quarantine_root, options)
+                    orphaned += counts[0]
+                    removed += counts[1]
+                    orphaned_bytes += counts[2]
+                    batch = []
+
+        if batch:
+            counts = self._flush(storage, batch, quarantine_root, options)
+            orphaned += counts[0]
+            removed += counts[1]
+            orphaned_bytes += counts[2]
+
+        self.stdout.write(
+            "Scanned: {scanned}, orphaned: {orphaned} ({size:.1f} MB), removed: {removed}".format(
+                scanned=scanned,
+                orphaned=orphaned,
+                size=orphaned_bytes / (1024 * 1024),
+                removed=removed,
+            )
+        )
+
+    def _flush(self, storage, batch, quarantine_root, options):
+        # The reference set is a snapshot, so re-check each batch before acting.
+        referenced = _still_referenced(batch)
+        names = [name for name in batch if name not in referenced]
+        size = 0
+        removed = 0
+        for name in names:
+            try:
+                size += storage.size(name)
+            except OSError:
+                pass
+            if options["verbosity"] > 1:
+                self.stdout.write(f"Orphan: {name}")
+            if options["delete"]:
+                storage.delete(name)
+                removed += 1
+            elif options["quarantine"]:
+                self._quarantine(storage, name, f"{quarantine_root}/{name}")
+                removed += 1
+        return len(names), removed, size
+
+    def _quarantine(self, storage, name, target):
+        if isinstance(storage, FileSystemStorage):
+            target_path = Path(storage.path(target))
+            target_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(storage.path(name), target_path)
+            return
+        with storage.open(name, "rb") as source:
+            storage.save(target, source)
+        storage.delete(name)
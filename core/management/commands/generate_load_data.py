@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+import math
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+from uuid import uuid4
+
+from django.contrib.auth import get_user_model
+from django.core.files.images import ImageFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+from wagtail.blocks import StreamValue
+
+from blog.models import BlogCategory, BlogPage, BlogPost
+from core.bulk_pages import DEFAULT_BATCH_SIZE, SlugAllocator, bulk_add_children
+from poi.models import POICategory, POIFeature, POIIndexPage, POIPage, POIPageGalleryImage
+from public_transport.models import (
+    TransportLine,
+    TransportStation,
+    TransportStationLine,
+    TransportSystem,
+)
+from public_transport.routing import bump_graph_version
+from search.cache import bump_index_version
+from search.indexing import reindex_objects
+from search.suggest import bump_suggest_version, rebuild_suggest_index
+
+# Rough Bangkok bounding box for generated coordinates.
+MIN_LAT, MAX_LAT = Decimal("13.60"), Decimal("13.95")
+MIN_LNG, MAX_LNG = Decimal("100.40"), Decimal("100.75")
+STATIONS_PER_LINE = 30
+STATION_SPACING_KM = 1.2
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate large volumes of blog posts, POIs and transport stations for load "
+        "testing, using bulk inserts instead of per-page saves."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--blog-posts", type=int, default=0)
+        parser.add_argument("--pois", type=int, default=0)
+        parser.add_argument("--stations", type=int, default=0)
+        parser.add_argument(
+            "--images",
+            type=int,
+            default=10,
+            help="Size of the shared image pool used for featured, hero and gallery images.",
+        )
+        parser.add_argument("--gallery", type=int, default=3, help="Gallery images per POI.")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--locale", type=str, default="en_US")
+        parser.add_argument(
+            "--skip-revisions",
+            action="store_true",
+            help="Do not create a published revision per page (faster; editing history is empty).",
+        )
+        parser.add_argument(
+            "--skip-index",
+            action="store_true",
+            help="Do not add the generated rows to the search index.",
+        )
+
+    def handle(self, *args, **options):
+        for name in ("blog_posts", "pois", "stations", "images", "gallery"):
+            if options[name] < 0:
+                raise CommandError(f"{name.replace('_', '-')} must be >= 0")
+        if options["batch_size"] < 1:
+            raise CommandError("batch-size must be >= 1")
+        if not (options["blog_posts"] or options["pois"] or options["stations"]):
+            raise CommandError("Nothing to generate: pass --blog-posts, --pois and/or --stations.")
+
+        self.faker = Faker(options["locale"])
+        self.random = random.Random(options["seed"])
+        if options["seed"] is not None:
+            self.faker.seed_instance(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.revisions = not options["skip_revisions"]
+        self.user = get_user_model().objects.filter(is_superuser=True).order_by("pk").first()
+
+        blog_root = index_page = None
+        if options["blog_posts"]:
+            blog_root = BlogPage.objects.first()
+            if not blog_root:
+                raise CommandError("No BlogPage found. Create one first.")
+            if not BlogCategory.objects.exists() or not get_user_model().objects.exists():
+                raise CommandError("Blog posts need at least one BlogCategory and one user.")
+        if options["pois"]:
+            index_page = POIIndexPage.objects.first()
+            if not index_page:
+                raise CommandError("No POIIndexPage found. Create one first.")
+            if not index_page.category_id and not POICategory.objects.exists():
+                raise CommandError("No POICategory found. Create one first.")
+
+        generated = {}
+        images = []
+        if blog_root:
+            # Featured images use the project's image model.
+            blog_images = self._image_pool(
+                BlogPost._meta.get_field("featured_image").related_model, options["images"]
+            )
+            images.extend(blog_images)
+            generated[BlogPost] = self._timed(
+                "blog posts", self._generate_blog_posts, blog_root, options["blog_posts"], blog_images
+            )
+        if index_page:
+            # POI images point at Wagtail's stock Image model.
+            poi_images = self._image_pool(
+                POIPage._meta.get_field("hero_image").related_model, options["images"]
+            )
+            images.extend(poi_images)
+            generated[POIPage] = self._timed(
+                "POIs", self._generate_pois, index_page, options["pois"], poi_images, options["gallery"]
+            )
+        if options["stations"]:
+            generated[TransportStation] = self._timed(
+                "stations", self._generate_stations, options["stations"]
+            )
+
+        if not options["skip_index"]:
+            for model, pks in generated.items():
+                reindex_objects(model, pks, self.batch_size, progress=self._report_progress)
+            rebuild_suggest_index()
+        # Bulk inserts send no save signals; retire cached results, POI facets,
+        # suggestions and the transit graph in every process.
+        bump_index_version()
+        if options["pois"] or options["stations"]:
+            bump_suggest_version()
+        if options["stations"]:
+            bump_graph_version()
+
+        self.stdout.write(
+            "Processed: blog posts: {posts}, POIs: {pois}, stations: {stations}, images: {images}".format(
+                posts=len(generated.get(BlogPost, [])),
+                pois=len(generated.get(POIPage, [])),
+                stations=len(generated.get(TransportStation, [])),
+                images=len(images),
+            )
+        )
+
+    def _timed(self, label, generate, *args):
+        started = time.perf_counter()
+        pks = generate(*args)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"Created {len(pks)} {label} in {elapsed:.1f}s")
+        return pks
+
+    def _report_progress(self, model, done, total, last_pk):
+        self.stdout.write(f"Indexed {model._meta.label}: {done}/{total}")
+
+    def _batches(self, count):
+        for start in range(0, count, self.batch_size):
+            yield start, min(self.batch_size, count - start)
+
+    def _image_pool(self, ImageModel, count):
+        from PIL import Image as PILImage
+
+        images = []
+        for index in range(count):
+            buffer = BytesIO()
+            color = tuple(self.random.randrange(256) for _ in range(3))
+            PILImage.new("RGB", (1200, 800), color).save(buffer, format="PNG")
+            image = ImageModel(title=f"Load test image {index + 1}")
+            image.file = ImageFile(buffer, name=f"load-test-{index + 1}.png")
+            image.save()
+            images.append(image)
+        return images
+
+    def _random_point(self):
+        latitude = MIN_LAT + (MAX_LAT - MIN_LAT) * Decimal(self.random.random())
+        longitude = MIN_LNG + (MAX_LNG - MIN_LNG) * Decimal(self.random.random())
+        return latitude.quantize(Decimal("0.000001")), longitude.quantize(Decimal("0.000001"))
+
+    def _generate_blog_posts(self, blog_root, count, images):
+        users = list(get_user_model().objects.all())
+        categories = list(BlogCategory.objects.all())
+        slugs = SlugAllocator(blog_root)
+        stream_block = BlogPost._meta.get_field("body").stream_block
+        today = timezone.now().date()
+
+        pks = []
+        for start, size in self._batches(count):
+            posts = []
+            for index in range(start, start + size):
+                title = self.faker.sentence(nb_words=6).rstrip(".")
+                published_date = today - timedelta(days=index % 3650)
+                post = BlogPost(
+                    title=title,
+                    slug=slugs.allocate(title, fallback=f"post-{index + 1}"),
+                    published_date=published_date,
+                    updated_date=published_date,
+                    summary=self.faker.paragraph(nb_sentences=3),
+                    body=StreamValue(
+                        stream_block,
+                        [
+                            ("heading", self.faker.sentence(nb_words=5).rstrip(".")),
+                            ("paragraph", self.faker.paragraph(nb_sentences=4)),
+                        ],
+                        is_lazy=False,
+                    ),
+                    featured=self.random.random() < 0.05,
+                    author=self.random.choice(users),
+                    category=self.random.choice(categories),
+                    featured_image=self.random.choice(images) if images else None,
+                )
+                post.reading_time = max(1, math.ceil(post._count_words() / 200))
+                posts.append(post)
+            with transaction.atomic():
+                bulk_add_children(
+                    blog_root,
+                    posts,
+                    revisions=self.revisions,
+                    user=self.user,
+                    batch_size=self.batch_size,
+                )
+            pks.extend(post.pk for post in posts)
+        return pks
+
+    def _generate_pois(self, index_page, count, images, gallery_size):
+        categories = [index_page.category] if index_page.category_id else list(POICategory.objects.all())
+        features = list(POIFeature.objects.all())
+        slugs = SlugAllocator(index_page)
+
+        pks = []
+        for start, size in self._batches(count):
+            pois = []
+            for index in range(start, start + size):
+                title = f"{self.faker.company()} {self.faker.word().title()}"
+                latitude, longitude = self._random_point()
+                poi = POIPage(
+                    title=title,
+                    slug=slugs.allocate(title, fallback=f"place-{index + 1}"),
+                    category=self.random.choice(categories),
+                    short_description=self.faker.sentence(nb_words=14),
+                    full_description=f"<p>{self.faker.paragraph(nb_sentences=5)}</p>",
+                    address=self.faker.street_address(),
+                    district=self.faker.city(),
+                    latitude=latitude,
+                    longitude=longitude,
+                    verified=self.random.random() < 0.3,
+                    hero_image=self.random.choice(images) if images else None,
+                )
+                # Assigned in memory so revisions serialise them without queries.
+                poi.features = self.random.sample(features, k=min(len(features), self.random.randint(0, 4)))
+                poi.gallery_images = [
+                    POIPageGalleryImage(image=image, sort_order=order)
+                    for order, image in enumerate(
+                        self.random.sample(images, k=min(len(images), gallery_size))
+                    )
+                ]
+                pois.append(poi)
+
+            with transaction.atomic():
+                bulk_add_children(
+                    index_page,
+                    pois,
+                    revisions=self.revisions,
+                    user=self.user,
+                    batch_size=self.batch_size,
+                )
+                FeatureLink = POIPage.features.through
+                FeatureLink.objects.bulk_create(
+                    [
+                        FeatureLink(poipage_id=poi.pk, poifeature_id=feature.pk)
+                        for poi in pois
+                        for feature in poi.features.all()
+                    ],
+                    batch_size=self.batch_size,
+                )
+                gallery = []
+                for poi in pois:
+                    for item in poi.gallery_images.all():
+                        item.page_id = poi.pk
+                        gallery.append(item)
+                POIPageGalleryImage.objects.bulk_create(gallery, batch_size=self.batch_size)
+            pks.extend(poi.pk for poi in pois)
+        return pks
+
+    def _generate_stations(self, count):
+        run = uuid4().hex[:6]
+        system = TransportSystem.objects.create(label=f"Load Test Metro {run}")
+        line_count = math.ceil(count / STATIONS_PER_LINE)
+        lines = TransportLine.objects.bulk_create(
+            [
+                TransportLine(system=system, label=f"Load Line {number + 1}")
+                for number in range(line_count)
+            ]
+        )
+
+        pks = []
+        with transaction.atomic():
+            for number, line in enumerate(lines):
+                size = min(STATIONS_PER_LINE, count - number * STATIONS_PER_LINE)
+                prefix = f"L{number + 1}-"
+                latitude, longitude = self._random_point()
+                bearing = self.random.uniform(0, 2 * math.pi)
+                d_lat = Decimal(math.cos(bearing) * STATION_SPACING_KM / 111.0)
+                d_lng = Decimal(math.sin(bearing) * STATION_SPACING_KM / 108.0)
+                stations = TransportStation.objects.bulk_create(
+                    [
+                        TransportStation(
+                            station_label=f"{self.faker.street_name()} Station",
+                            station_qid=f"LOAD-{run}-{number + 1}-{stop + 1}",
+                            system=system,
+                            system_label=system.label,
+                            line=line,
+                            line_label=line.label,
+                            station_codes=f"{prefix}{stop + 1}",
+                            opening=self.faker.date_between(start_date="-30y", end_date="today"),
+                            latitude=(latitude + d_lat * stop).quantize(Decimal("0.000001")),
+                            longitude=(longitude + d_lng * stop).quantize(Decimal("0.000001")),
+                        )
+                        for stop in range(size)
+                    ],
+                    batch_size=self.batch_size,
+                )
+                TransportStationLine.objects.bulk_create(
+                    [
+                        TransportStationLine(
+                            station=station,
+                            line=line,
+                            code=station.station_codes,
+                            opening=station.opening,
+                            source_sequence=stop + 1,
+                        )
+                        for stop, station in enumerate(stations)
+                    ],
+                    batch_size=self.batch_size,
+                )
+                line.refresh_sequence()
+                pks.extend(station.pk for station in stations)
+        return pks
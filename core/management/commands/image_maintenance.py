@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import CharField, Q, Value
+from django.db.models.functions import Cast, Concat
+from wagtail.images import get_image_model
+
+from core.image_utils import read_image_dimensions
+from core.models import image_folder
+
+TASKS = ("dimensions", "webp", "relocate", "renditions")
+
+
+def _init_worker():
+    # Forked workers must not share the parent's database sockets.
+    if not django.apps.apps.ready:
+        django.setup()
+    connections.close_all()
+
+
+def _candidate_ids(task: str, after_id: int) -> list[int]:
+    ImageModel = get_image_model()
+    if task == "renditions":
+        queryset = ImageModel.get_rendition_model().objects.all()
+    elif task == "dimensions":
+        queryset = ImageModel.objects.filter(
+            Q(width__isnull=True) | Q(height__isnull=True) | Q(width=0) | Q(height=0)
+        )
+    elif task == "webp":
+        queryset = ImageModel.objects.exclude(file__iendswith=".webp")
+    else:
+        # Prefilter in SQL; slug normalisation is re-checked per image.
+        page_folder = Concat(
+            Value("images/pages/"),
+            Cast("source_page_id", CharField()),
+            Value("-"),
+            "source_page__slug",
+            Value("/"),
+        )
+        queryset = ImageModel.objects.filter(
+            Q(source_page__isnull=True) & ~Q(file__startswith="images/unassigned/")
+            | Q(source_page__isnull=False) & ~Q(file__startswith=page_folder)
+        )
+    return list(
+        queryset.filter(id__gt=after_id).order_by("id").values_list("id", flat=True)
+    )
+
+
+def _backfill_dimensions(ids: list[int], dry_run: bool) -> dict[str, int]:
+    ImageModel = get_image_model()
+    counts = {"updated": 0, "skipped": 0, "failed": 0}
+    changed = []
+    for image in ImageModel.objects.filter(id__in=ids):
+        if not image.file:
+            counts["skipped"] += 1
+            continue
+        try:
+            image.file.open("rb")
+            image.width, image.height = read_image_dimensions(image.file)
+        except Exception:
+            counts["failed"] += 1
+            continue
+        finally:
+            try:
+                image.file.close()
+            except Exception:
+                pass
+        changed.append(image)
+    if changed and not dry_run:
+        ImageModel.objects.bulk_update(changed, ["width", "height"])
+    counts["updated"] += len(changed)
+    return counts
+
+
+def _normalize_files(ids: list[int], dry_run: bool) -> dict[str, int]:
+    ImageModel = get_image_model()
+    counts = {"updated": 0, "skipped": 0, "failed": 0}
+    for image in ImageModel.objects.filter(id__in=ids).select_related("source_page"):
+        if not image.file:
+            counts["skipped"] += 1
+            continue
+        page_slug = image.source_page.slug if image.source_page_id else None
+        expected_folder = image_folder(image.source_page_id, page_slug)
+        in_place = str(Path(image.file.name).parent) == expected_folder
+        if in_place and image.file.name.lower().endswith(".webp"):
+            counts["skipped"] += 1
+            continue
+        if dry_run:
+            counts["updated"] += 1
+            continue
+        try:
+            image._ensure_webp_and_location()
+        except Exception:
+            counts["failed"] += 1
+            continue
+        # Bypass save() so the model does not convert the file a second time.
+        ImageModel.objects.filter(pk=image.pk).update(
+            file=image.file.name,
+            width=image.width,
+            height=image.height,
+            file_size=image.file_size,
+            file_hash=image.file_hash,
+        )
+        counts["updated"] += 1
+    return counts
+
+
+def _prune_renditions(ids: list[int], dry_run: bool) -> dict[str, int]:
+    RenditionModel = get_image_model().get_rendition_model()
+    counts = {"updated": 0, "skipped": 0, "failed": 0}
+    orphaned = []
+    for rendition in RenditionModel.objects.filter(id__in=ids).only("id", "file"):
+        name = rendition.file.name
+        if name and rendition.file.storage.exists(name):
+            counts["skipped"] += 1
+        else:
+            orphaned.append(rendition.id)
+    if orphaned and not dry_run:
+        RenditionModel.objects.filter(id__in=orphaned).delete()
+    counts["updated"] += len(orphaned)
+    return counts
+
+
+HANDLERS = {
+    "dimensions": _backfill_dimensions,
+    "webp": _normalize_files,
+    "relocate": _normalize_files,
+    "renditions": _prune_renditions,
+}
+
+
+def _process_chunk(args: tuple[str, list[int], bool]) -> tuple[int, dict[str, int]]:
+    task, ids, dry_run = args
+    return ids[-1], HANDLERS[task](ids, dry_run)
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill image dimensions, convert non-WebP originals, move images to "
+        "their source page folder and delete renditions whose files are missing. "
+        "Work is split into id-ordered batches across a process pool; progress "
+        "is checkpointed so an interrupted run resumes where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--task",
+            action="append",
+            choices=TASKS,
+            help="Task to run (repeatable). Defaults to all tasks in order.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker processes. Use 1 to run in-process.",
+        )
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument(
+            "--checkpoint",
+            default=".image_maintenance.json",
+            help="File that stores the last processed id per task.",
+        )
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Ignore an existing checkpoint and start from the first image.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would change without writing files or rows.",
+        )
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1:
+            raise CommandError("workers must be >= 1")
+        if options["batch_size"] < 1:
+            raise CommandError("batch-size must be >= 1")
+
+        tasks = options["task"] or list(TASKS)
+        checkpoint_path = Path(options["checkpoint"])
+        checkpoint = {} if options["reset"] else self._load_checkpoint(checkpoint_path)
+
+        if options["dry_run"]:
+            self.stdout.write("Dry run: no files or rows will be changed.")
+
+        for task in tasks:
+            self._run_task(task, checkpoint, checkpoint_path, options)
+
+    def _run_task(self, task, checkpoint, checkpoint_path, options):
+        after_id = int(checkpoint.get(task, 0))
+        ids = _candidate_ids(task, after_id)
+        if not ids:
+            self.stdout.write(f"[{task}] nothing to do.")
+            return
+
+        batch_size = options["batch_size"]
+        dry_run = options["dry_run"]
+        chunks = [
+            (task, ids[start : start + batch_size], dry_run)
+            for start in range(0, len(ids), batch_size)
+        ]
+        totals = {"updated": 0, "skipped": 0, "failed": 0}
+        processed = 0
+        started = time.monotonic()
+
+        self.stdout.write(
+            f"[{task}] {len(ids)} candidates in {len(chunks)} batches"
+            + (f", resuming after id {after_id}" if after_id else "")
+        )
+
+        if options["workers"] == 1:
+            results = map(_process_chunk, chunks)
+            executor = None
+        else:
+            connections.close_all()
+            executor = ProcessPoolExecutor(
+                max_workers=options["workers"],
+                initializer=_init_worker,
+            )
+            results = executor.map(_process_chunk, chunks)
+
+        try:
+            # Results arrive in submission order, so the checkpoint never
+            # skips past a batch that has not finished yet.
+            for (_, chunk_ids, _), (last_id, counts) in zip(chunks, results):
+                processed += len(chunk_ids)
+                for key, value in counts.items():
+                    totals[key] += value
+                if not dry_run:
+                    checkpoint[task] = last_id
+                    self._save_checkpoint(checkpoint_path, checkpoint)
+                elapsed = time.monotonic() - started
+                rate = processed / elapsed if elapsed else 0
+                self.stdout.write(
+                    f"[{task}] {processed}/{len(ids)} "
+                    f"({processed * 100 / len(ids):.1f}%, {rate:.0f}/s) "
+                    "updated: {updated}, skipped: {skipped}, failed: {failed}".format(**totals)
+                )
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+
+        # A finished pass starts from scratch next time so later changes are seen.
+        if not dry_run and task in checkpoint:
+            del checkpoint[task]
+            self._save_checkpoint(checkpoint_path, checkpoint)
+
+    def _load_checkpoint(self, path):
+        if not path.exists():
+            return {}
+        try:
+            return json.loads(path.read_text())
+        except json.JSONDecodeError as exc:
+            raise CommandError(f"Invalid checkpoint file {path}: {exc}") from exc
+
+    def _save_checkpoint(self, path, checkpoint):
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        tmp_path.write_text(json.dumps(checkpoint))
+        os.replace(tmp_path, path)
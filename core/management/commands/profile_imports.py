@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importtime import (
+    SETUP_SCRIPT,
+    WORKER_SCRIPT,
+    profile_startup,
+    project_imports,
+    summarize,
+)
+
+
+def _project_packages() -> set[str]:
+    base_dir = Path(settings.BASE_DIR).resolve()
+    packages = {settings.SETTINGS_MODULE.partition(".")[0]}
+    for app_config in apps.get_app_configs():
+        if Path(app_config.path).resolve().is_relative_to(base_dir):
+            packages.add(app_config.name.partition(".")[0])
+    return packages
+
+
+class Command(BaseCommand):
+    help = (
+        "Profile interpreter startup with python -X importtime and summarise import "
+        "time per installed app, plus the heaviest modules the project's own code imports."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--setup-only",
+            action="store_true",
+            help="Stop after django.setup() (what management commands pay) instead of also "
+            "loading the URLconf and template libraries (what a web worker pays).",
+        )
+        parser.add_argument("--limit", type=int, default=20, help="Rows per table.")
+
+    def handle(self, *args, **options):
+        if options["limit"] < 1:
+            raise CommandError("limit must be >= 1")
+        script = SETUP_SCRIPT if options["setup_only"] else WORKER_SCRIPT
+        try:
+            records = profile_startup(script, settings.SETTINGS_MODULE, settings.BASE_DIR)
+        except RuntimeError as exc:
+            raise CommandError(f"Profiled interpreter failed: {exc}") from exc
+
+        total_us = sum(record.self_us for record in records) or 1
+        app_names = [app_config.name for app_config in apps.get_app_configs()]
+        self.stdout.write(
+            f"{len(records)} modules imported in {total_us / 1000:.0f} ms "
+            f"({'django.setup()' if options['setup_only'] else 'setup, URLconf and templates'})"
+        )
+        self.stdout.write(f"\n{'ms':>8} {'share':>6} {'modules':>8}  app / package")
+        for stats in summarize(records, app_names)[: options["limit"]]:
+            self.stdout.write(
+                f"{stats.self_us / 1000:8.1f} {stats.self_us / total_us:6.1%} "
+                f"{stats.modules:8d}  {stats.name}"
+            )
+
+        heaviest = project_imports(records, _project_packages())[: options["limit"]]
+        if heaviest:
+            self.stdout.write(f"\n{'ms':>8}  first imported by project code")
+            for importer, module, cumulative_us in heaviest:
+                self.stdout.write(f"{cumulative_us / 1000:8.1f}  {module}  <- {importer}")
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import json
+import platform
+import subprocess
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from core.benchmarks import build_scenarios, compare, measure, seed_dataset
+
+DEFAULT_OUTPUT_DIR = "benchmark-results"
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database at the given scale and record latency, query "
+        "count and peak memory for the hot pages as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=int, default=1000, help="Blog posts and POIs to seed.")
+        parser.add_argument("--repeat", type=int, default=20, help="Timed requests per scenario.")
+        parser.add_argument(
+            "--only",
+            action="append",
+            default=[],
+            help="Run only this scenario (repeatable).",
+        )
+        parser.add_argument(
+            "--output",
+            help=f"Result file (default: {DEFAULT_OUTPUT_DIR}/<git revision>-<scale>.json).",
+        )
+        parser.add_argument("--compare", help="Baseline result file to compare against.")
+        parser.add_argument(
+            "--max-regression",
+            type=float,
+            default=20.0,
+            help="Allowed slowdown in percent for latency and memory before failing.",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep the benchmark database between runs (it is still reseeded).",
+        )
+
+    def handle(self, *args, **options):
+        if options["scale"] < 1:
+            raise CommandError("scale must be >= 1")
+        if options["repeat"] < 1:
+            raise CommandError("repeat must be >= 1")
+        baseline = None
+        if options["compare"]:
+            try:
+                baseline = json.loads(Path(options["compare"]).read_text())["results"]
+            except (OSError, ValueError, KeyError) as exc:
+                raise CommandError(f"Cannot read baseline {options['compare']}: {exc}") from exc
+
+        setup_test_environment()
+        runner = DiscoverRunner(keepdb=options["keepdb"], verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            # Seeded images and the renditions the scenarios generate stay
+            # out of the real MEDIA_ROOT.
+            with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+                results = self._run(options)
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        revision = _git_revision()
+        report = {
+            "revision": revision,
+            "created_at": timezone.now().isoformat(),
+            "scale": options["scale"],
+            "repeat": options["repeat"],
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "results": results,
+        }
+        output = Path(
+            options["output"]
+            or Path(settings.BASE_DIR) / DEFAULT_OUTPUT_DIR / f"{revision}-{options['scale']}.json"
+        )
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2) + "\n")
+        self.stdout.write(f"Wrote {output}")
+
+        if baseline is not None:
+            regressions = compare(results, baseline, options["max_regression"])
+            for line in regressions:
+                self.stderr.write(f"Regression: {line}")
+            if regressions:
+                raise CommandError(f"{len(regressions)} regression(s) against {options['compare']}")
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+
+    def _run(self, options):
+        self.stdout.write(f"Seeding scale {options['scale']}...")
+        pages = seed_dataset(
+            options["scale"], stdout=self.stdout if options["verbosity"] > 1 else StringIO()
+        )
+        scenarios = build_scenarios(pages)
+        if options["only"]:
+            unknown = set(options["only"]) - {scenario.name for scenario in scenarios}
+            if unknown:
+                raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+            scenarios = [scenario for scenario in scenarios if scenario.name in options["only"]]
+
+        client = Client()
+        results = {}
+        for scenario in scenarios:
+            result = measure(client, scenario, options["repeat"])
+            results[scenario.name] = result
+            self.stdout.write(
+                f"{scenario.name:<24} {result['status']} median {result['median_ms']:>8.2f} ms  "
+                f"p95 {result['p95_ms']:>8.2f} ms  queries {result['queries']:>4}  "
+                f"peak {result['peak_kb']:>9.1f} KiB"
+            )
+        return results
@@ -7,7 +7,6 @@ from uuid import uuid4
 from django.core.files.base import ContentFile
 from django.db import models
 from django.utils.text import slugify
-from PIL import Image, ImageOps
 from wagtail.images.models import (
     AbstractImage,
     AbstractRendition,
@@ -15,15 +14,21 @@ from wagtail.images.models import (
 )
 from wagtail.models import Page
 
+from core.image_utils import read_image_dimensions
+from core.instrumentation import track_rendition
+
+
+def image_folder(source_page_id: int | None, page_slug: str | None = None) -> str:
+    if source_page_id:
+        return f"images/pages/{source_page_id}-{slugify(page_slug or '') or 'page'}"
+    return "images/unassigned"
+
 
 def image_upload_to(instance: "CustomImage", filename: str) -> str:
     base_name = slugify(Path(filename).stem) or "image"
     unique_suffix = uuid4().hex[:8]
-    if instance.source_page_id:
-        page_slug = slugify(instance.source_page.slug) or "page"
-        folder = f"images/pages/{instance.source_page_id}-{page_slug}"
-    else:
-        folder = "images/unassigned"
+    page_slug = instance.source_page.slug if instance.source_page_id else None
+    folder = image_folder(instance.source_page_id, page_slug)
     return f"{folder}/{base_name}-{unique_suffix}.webp"
 
 
@@ -92,12 +97,12 @@ class CustomImage(AbstractImage):
         if self.file.name.lower().endswith(".webp"):
             self.file.open("rb")
             data = self.file.read()
-            self.file.seek(0)
-            image = Image.open(self.file)
-            image = ImageOps.exif_transpose(image)
-            width, height = image.size
+            width, height = read_image_dimensions(BytesIO(data))
             self.file.close()
         else:
+            # Pillow is only needed to convert non-WebP uploads.
+            from PIL import Image, ImageOps
+
             self.file.open("rb")
             image = Image.open(self.file)
             image = ImageOps.exif_transpose(image)
@@ -121,6 +126,10 @@ class CustomImage(AbstractImage):
             if storage.exists(old_name):
                 storage.delete(old_name)
 
+    def generate_rendition_file(self, filter, *, source=None):
+        with track_rendition():
+            return super().generate_rendition_file(filter, source=source)
+
     class Meta(AbstractImage.Meta):
         verbose_name = "image"
         verbose_name_plural = "images"
@@ -138,3 +147,10 @@ class CustomRendition(AbstractRendition):
 
     class Meta:
         unique_together = (("image", "filter_spec", "focal_point_key"),)
+
+
+class VersionCounter(models.Model):
+    """A named counter shared by every process; see ``core.versions``."""
+
+    key = models.CharField(max_length=100, primary_key=True)
+    value = models.BigIntegerField()
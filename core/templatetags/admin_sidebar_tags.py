@@ -3,16 +3,18 @@ from django.urls import reverse
 from django.utils.html import json_script
 from django.utils.translation import gettext_lazy as _
 
-from wagtail.admin.menu import admin_menu
-from wagtail.admin.search import admin_search_areas
-from wagtail.admin.telepath import JSContext
-from wagtail.admin.ui import sidebar
-
 register = template.Library()
 
 
 @register.simple_tag(takes_context=True)
 def custom_sidebar_props(context):
+    # Template tag libraries are loaded with every template engine, including
+    # the public site's; only admin pages need the sidebar modules.
+    from wagtail.admin.menu import admin_menu
+    from wagtail.admin.search import admin_search_areas
+    from wagtail.admin.telepath import JSContext
+    from wagtail.admin.ui import sidebar
+
     request = context["request"]
     search_areas = admin_search_areas.search_items_for_request(request)
     search_area = search_areas[0] if search_areas else None
@@ -0,0 +1,113 @@
+"""
+Test helpers shared by the apps' test suites.
+
+``QueryScalingMixin.assertQueriesDoNotScale`` catches N+1 queries: it
+renders a page, adds as many items again, renders it a second time and fails
+if the second render needed more queries. A fixed ``assertNumQueries`` breaks
+whenever a page gains one unrelated query; this only breaks when a query
+runs once per row.
+
+``SitePagesMixin`` sets up the site those page tests render: a home page as
+the default site's root, a listing page under it and a throwaway
+``MEDIA_ROOT`` for the images they upload.
+"""
+
+from __future__ import annotations
+
+import re
+import shutil
+import tempfile
+from collections import Counter
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.text import slugify
+from wagtail.models import Page, Site
+
+from home.models import HomePage
+
+_IN_LIST_RE = re.compile(r"\bIN \([^()]*\)")
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse literals and ``IN (...)`` lists so repeats of one lookup compare equal."""
+    return _IN_LIST_RE.sub("IN (...)", _LITERAL_RE.sub("?", sql))
+
+
+class QueryScalingMixin:
+    """Mix into a ``TestCase``; see ``assertQueriesDoNotScale``."""
+
+    def _capture_render(self, render) -> list[str]:
+        # The first render warms per-process caches and creates renditions;
+        # only the second one is counted.
+        render()
+        with CaptureQueriesContext(connection) as queries:
+            response = render()
+        self.assertEqual(response.status_code, 200)
+        return [query["sql"] for query in queries.captured_queries]
+
+    def _add_and_capture(self, render, add_items, count) -> list[str]:
+        # Run the on_commit callbacks that retire per-process caches (facets,
+        # transit graph, search results), which a TestCase would never fire.
+        with self.captureOnCommitCallbacks(execute=True):
+            add_items(count)
+        return self._capture_render(render)
+
+    def assertQueriesDoNotScale(self, render, add_items, count=3):
+        """
+        Fail if ``render()`` issues more queries after ``add_items(count)``
+        has been called a second time than after the first call.
+
+        ``render`` returns a response (usually ``lambda: self.client.get(url)``);
+        ``add_items(count)`` creates ``count`` more of whatever the page lists.
+        Keep ``2 * count`` within one page of a paginated listing.
+        """
+        before = self._add_and_capture(render, add_items, count)
+        after = self._add_and_capture(render, add_items, count)
+        if len(after) <= len(before):
+            return
+        grown = Counter(map(normalize_sql, after))
+        grown.subtract(Counter(map(normalize_sql, before)))
+        details = "".join(
+            f"\n  +{extra}x {sql}" for sql, extra in grown.most_common() if extra > 0
+        )
+        self.fail(
+            f"Query count grew from {len(before)} to {len(after)} when the number "
+            f"of items went from {count} to {2 * count}:{details}"
+        )
+
+
+class SitePagesMixin:
+    """
+    Mix into a ``TestCase`` (before it). ``setUp`` points ``MEDIA_ROOT`` at a
+    temporary directory, makes a ``HomePage`` the default site's root
+    (``self.home``) and adds an ``index_page_class`` page titled
+    ``index_title`` under it (``self.index``). ``add_*`` methods number what
+    they create with ``next_number()``.
+    """
+
+    index_page_class: type[Page]
+    index_title = "Index"
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+
+        root = Page.get_first_root_node()
+        self.home = root.add_child(instance=HomePage(title="Home", slug="test-home"))
+        Site.objects.update_or_create(
+            is_default_site=True,
+            defaults={"hostname": "testserver", "port": 80, "root_page": self.home},
+        )
+        self.index = self.home.add_child(
+            instance=self.index_page_class(title=self.index_title, slug=slugify(self.index_title))
+        )
+        self._created = 0
+
+    def next_number(self) -> int:
+        self._created += 1
+        return self._created
@@ -0,0 +1,375 @@
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.templatetags.static import static
+from django.test import SimpleTestCase, TestCase, override_settings
+from wagtail import hooks
+from wagtail.images import get_image_model
+from wagtail.images.tests.utils import get_test_image_file
+from wagtail.models import Page
+
+from core.db import ReadReplicaRouter, apply_sqlite_pragmas, read_replica, use_read_replica
+from core.importtime import parse_importtime, project_imports, summarize
+from core.management.commands.image_maintenance import HANDLERS
+from core.models import VersionCounter
+from core.versions import bump_version, get_version
+
+
+class SQLitePragmaTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_default_connection_is_tuned(self):
+        self.assertEqual(self.pragma("busy_timeout"), 5000)
+        self.assertEqual(self.pragma("synchronous"), 1)  # NORMAL
+        self.assertEqual(self.pragma("cache_size"), -20000)
+
+    @override_settings(SQLITE_PRAGMAS={"cache_size": -500}, READ_REPLICA_DATABASE="replica")
+    def test_replica_connection_is_query_only(self):
+        raw = sqlite3.connect(":memory:")
+        self.addCleanup(raw.close)
+        apply_sqlite_pragmas(None, SimpleNamespace(vendor="sqlite", alias="replica", connection=raw))
+        self.assertEqual(raw.execute("PRAGMA cache_size").fetchone()[0], -500)
+        self.assertEqual(raw.execute("PRAGMA query_only").fetchone()[0], 1)
+        with self.assertRaises(sqlite3.OperationalError):
+            raw.execute("CREATE TABLE t (id integer)")
+
+
+class VersionCounterTests(TestCase):
+    def test_bump_increments_the_shared_value(self):
+        version = get_version("test")
+        self.assertEqual(bump_version("test"), version + 1)
+        self.assertEqual(get_version("test"), version + 1)
+
+    def test_recreated_counter_does_not_reuse_old_versions(self):
+        version = bump_version("test")
+        VersionCounter.objects.filter(key="test").delete()
+        self.assertGreater(get_version("test"), version)
+
+
+class ReadReplicaRouterTests(SimpleTestCase):
+    router = ReadReplicaRouter()
+
+    @override_settings(READ_REPLICA_DATABASE="replica")
+    def test_reads_inside_block_go_to_replica(self):
+        self.assertIsNone(self.router.db_for_read(None))
+        with read_replica():
+            self.assertEqual(self.router.db_for_read(None), "replica")
+            self.assertEqual(self.router.db_for_write(None), "default")
+        self.assertFalse(self.router.allow_migrate("replica", "core"))
+
+    @override_settings(READ_REPLICA_DATABASE=None)
+    def test_without_replica_reads_stay_on_default(self):
+        with read_replica():
+            self.assertIsNone(self.router.db_for_read(None))
+
+    @override_settings(READ_REPLICA_DATABASE="replica")
+    def test_template_responses_render_inside_block(self):
+        rendered_from = []
+        response = SimpleNamespace(render=lambda: rendered_from.append(self.router.db_for_read(None)))
+
+        use_read_replica(lambda request: response)(None)
+        self.assertEqual(rendered_from, ["replica"])
+
+
+IMPORTTIME_REPORT = """\
+import time: self [us] | cumulative | imported package
+import time:       300 |        300 |     PIL._util
+import time:      2000 |       2300 |   PIL.Image
+import time:       100 |       2400 | core.image_utils
+import time:       500 |        500 |   wagtail.admin.menu
+import time:       200 |        700 | wagtail.admin.ui
+import time:        50 |         50 | blog
+"""
+
+
+class ImportTimeTests(SimpleTestCase):
+    def test_parse_links_modules_to_their_importer(self):
+        records = {record.module: record for record in parse_importtime(IMPORTTIME_REPORT)}
+        self.assertEqual(len(records), 6)
+        self.assertEqual(records["PIL._util"].parent, "PIL.Image")
+        self.assertEqual(records["PIL.Image"].parent, "core.image_utils")
+        self.assertIsNone(records["core.image_utils"].parent)
+        self.assertEqual(records["wagtail.admin.menu"].parent, "wagtail.admin.ui")
+        self.assertEqual(records["PIL.Image"].cumulative_us, 2300)
+
+    def test_summarize_groups_by_longest_app_name(self):
+        records = parse_importtime(IMPORTTIME_REPORT)
+        groups = summarize(records, ["wagtail", "wagtail.admin", "core", "blog"])
+        self.assertEqual(
+            [(stats.name, stats.self_us, stats.modules) for stats in groups],
+            [("PIL", 2300, 2), ("wagtail.admin", 700, 2), ("core", 100, 1), ("blog", 50, 1)],
+        )
+
+    def test_project_imports_lists_outside_modules_pulled_in_by_project_code(self):
+        records = parse_importtime(IMPORTTIME_REPORT)
+        self.assertEqual(
+            project_imports(records, {"core", "blog"}),
+            [("core.image_utils", "PIL.Image", 2300)],
+        )
+
+
+class StaticFilesTests(SimpleTestCase):
+    def setUp(self):
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root, ignore_errors=True)
+        self.enterContext(
+            override_settings(
+                STATIC_ROOT=static_root,
+                STORAGES={
+                    **settings.STORAGES,
+                    "staticfiles": {"BACKEND": "core.staticfiles.StaticFilesStorage"},
+                },
+                # Only core/static, to keep collectstatic quick.
+                STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"],
+            )
+        )
+        call_command("collectstatic", interactive=False, verbosity=0)
+
+    def test_fingerprinted_assets_are_served_compressed_and_immutable(self):
+        url = static("vite/app.js")
+        self.assertRegex(url, r"^/static/vite/app\.[0-9a-f]{12}\.js$")
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertIn("immutable", response["Cache-Control"])
+
+        response = self.client.get(url)
+        self.assertNotIn("Content-Encoding", response)
+
+
+class MissingStaticReferenceTests(SimpleTestCase):
+    def collect(self, files):
+        source, static_root = tempfile.mkdtemp(), tempfile.mkdtemp()
+        for path in (source, static_root):
+            self.addCleanup(shutil.rmtree, path, ignore_errors=True)
+        for name, text in files.items():
+            target = Path(source, name)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(text)
+        with override_settings(
+            STATIC_ROOT=static_root,
+            STATICFILES_DIRS=[source],
+            STORAGES={
+                **settings.STORAGES,
+                "staticfiles": {"BACKEND": "core.staticfiles.StaticFilesStorage"},
+            },
+            STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"],
+        ):
+            call_command("collectstatic", interactive=False, verbosity=0)
+
+    def test_known_gaps_in_vendored_leaflet_are_left_unhashed(self):
+        with self.assertLogs("core.staticfiles", level="WARNING") as logs:
+            self.collect(
+                {
+                    "map/vendor/leaflet/leaflet.css": ".a { background: url(images/layers.png); }",
+                    "map/vendor/leaflet/leaflet.js": "//# sourceMappingURL=leaflet.js.map",
+                }
+            )
+        # Logged once per post-processing pass.
+        self.assertEqual(
+            {line.split()[2] for line in logs.output},
+            {"map/vendor/leaflet/images/layers.png", "map/vendor/leaflet/leaflet.js.map"},
+        )
+
+    def test_other_missing_references_fail_the_build(self):
+        with self.assertRaisesMessage(ValueError, "css/missing.png"):
+            self.collect({"css/site.css": ".a { background: url(missing.png); }"})
+
+
+class AdminAssetHookTests(SimpleTestCase):
+    @override_settings(STATIC_URL="https://cdn.example.com/assets/")
+    def test_injected_assets_use_static_urls(self):
+        html = "".join(
+            str(fn())
+            for hook in ("insert_global_admin_css", "insert_global_admin_js", "insert_editor_js")
+            for fn in hooks.get_hooks(hook)
+        )
+        self.assertNotIn('"/static/', html)
+        for path in (
+            "accounts/css/admin.css",
+            "css/blog-admin.css",
+            "public_transport/js/station_title_sync.js",
+            "vite/app.js",
+        ):
+            self.assertIn(f"https://cdn.example.com/assets/{path}", html)
+
+
+class CleanupOrphanedMediaTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+        self.image = get_image_model().objects.create(title="Kept", file=get_test_image_file())
+        self.orphan = self.write("images/unassigned/orphan.png", age_hours=48)
+
+    def write(self, name, age_hours):
+        path = Path(self.media_root, name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"orphan")
+        modified = time.time() - age_hours * 3600
+        os.utime(path, (modified, modified))
+        return path
+
+    def cleanup(self, *args):
+        out = StringIO()
+        call_command("cleanup_orphaned_media", *args, stdout=out)
+        return out.getvalue()
+
+    def test_reports_only_by_default(self):
+        output = self.cleanup()
+        self.assertIn("orphaned: 1", output)
+        self.assertIn("removed: 0", output)
+        self.assertTrue(self.orphan.exists())
+
+    def test_delete_removes_only_orphans(self):
+        self.assertIn("removed: 1", self.cleanup("--delete"))
+        self.assertFalse(self.orphan.exists())
+        self.assertTrue(default_storage.exists(self.image.file.name))
+
+    def test_quarantine_moves_orphans_to_a_timestamped_folder(self):
+        self.cleanup("--quarantine")
+        self.assertFalse(self.orphan.exists())
+        [moved] = Path(self.media_root, "orphaned").glob("*/images/unassigned/orphan.png")
+        self.assertRegex(moved.relative_to(self.media_root).parts[1], r"^\d{8}-\d{6}$")
+        self.assertTrue(default_storage.exists(self.image.file.name))
+
+    def test_recent_files_are_skipped(self):
+        fresh = self.write("images/unassigned/uploading.png", age_hours=1)
+        self.cleanup("--delete")
+        self.assertTrue(fresh.exists())
+        self.assertFalse(self.orphan.exists())
+
+        self.cleanup("--delete", "--min-age", "0")
+        self.assertFalse(fresh.exists())
+
+    def test_batches_are_rechecked_against_the_database(self):
+        # A row saved after the reference snapshot was taken.
+        with mock.patch(
+            "core.management.commands.cleanup_orphaned_media._referenced_keys",
+            return_value=set(),
+        ):
+            output = self.cleanup("--delete", "--min-age", "0", "--batch-size", "1")
+        self.assertIn("removed: 1", output)
+        self.assertTrue(default_storage.exists(self.image.file.name))
+        self.assertFalse(self.orphan.exists())
+
+
+class ImageMaintenanceTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+        self.checkpoint = Path(self.media_root, ".image_maintenance.json")
+        self.ImageModel = get_image_model()
+        self.images = [
+            self.ImageModel.objects.create(title=f"Image {number}", file=get_test_image_file())
+            for number in range(3)
+        ]
+
+    def maintain(self, *args):
+        out = StringIO()
+        call_command(
+            "image_maintenance",
+            "--workers",
+            "1",
+            "--batch-size",
+            "1",
+            "--checkpoint",
+            str(self.checkpoint),
+            *args,
+            stdout=out,
+        )
+        return out.getvalue()
+
+    def clear_dimensions(self):
+        self.ImageModel.objects.update(width=0, height=0)
+
+    def widths(self):
+        return list(self.ImageModel.objects.order_by("pk").values_list("width", flat=True))
+
+    def test_dimensions_are_backfilled_from_the_files(self):
+        self.clear_dimensions()
+        self.maintain("--task", "dimensions")
+        self.assertEqual(self.widths(), [640, 640, 640])
+
+    def test_interrupted_run_resumes_from_the_checkpoint(self):
+        self.clear_dimensions()
+        backfill = HANDLERS["dimensions"]
+        calls = []
+
+        def interrupted(ids, dry_run):
+            if calls:
+                raise RuntimeError("interrupted")
+            calls.append(ids)
+            return backfill(ids, dry_run)
+
+        with mock.patch.dict(HANDLERS, {"dimensions": interrupted}):
+            with self.assertRaisesMessage(RuntimeError, "interrupted"):
+                self.maintain("--task", "dimensions")
+        first_id = self.images[0].pk
+        self.assertEqual(json.loads(self.checkpoint.read_text()), {"dimensions": first_id})
+        self.assertEqual(self.widths(), [640, 0, 0])
+
+        output = self.maintain("--task", "dimensions")
+        self.assertIn(f"2 candidates in 2 batches, resuming after id {first_id}", output)
+        self.assertEqual(self.widths(), [640, 640, 640])
+        # A finished pass clears its checkpoint.
+        self.assertEqual(json.loads(self.checkpoint.read_text()), {})
+
+    def test_reset_ignores_the_checkpoint(self):
+        self.clear_dimensions()
+        self.checkpoint.write_text(json.dumps({"dimensions": self.images[-1].pk}))
+        self.assertIn("[dimensions] nothing to do.", self.maintain("--task", "dimensions"))
+        self.assertEqual(self.widths(), [0, 0, 0])
+
+        self.maintain("--task", "dimensions", "--reset")
+        self.assertEqual(self.widths(), [640, 640, 640])
+
+    def test_dry_run_changes_nothing(self):
+        self.clear_dimensions()
+        output = self.maintain("--task", "dimensions", "--dry-run")
+        self.assertIn("updated: 3", output)
+        self.assertEqual(self.widths(), [0, 0, 0])
+        self.assertFalse(self.checkpoint.exists())
+
+    def test_non_webp_originals_are_converted(self):
+        image = self.images[0]
+        png_name = default_storage.save("images/unassigned/legacy.png", get_test_image_file())
+        self.ImageModel.objects.filter(pk=image.pk).update(file=png_name)
+
+        self.maintain("--task", "webp")
+
+        image.refresh_from_db()
+        self.assertRegex(image.file.name, r"^images/unassigned/legacy.*\.webp$")
+        self.assertTrue(default_storage.exists(image.file.name))
+        self.assertFalse(default_storage.exists(png_name))
+
+    def test_images_move_to_their_source_page_folder(self):
+        page = Page.get_first_root_node().add_child(instance=Page(title="Guide", slug="guide"))
+        image = self.images[0]
+        old_name = image.file.name
+        self.ImageModel.objects.filter(pk=image.pk).update(source_page=page)
+
+        self.maintain("--task", "relocate")
+
+        image.refresh_from_db()
+        self.assertTrue(image.file.name.startswith(f"images/pages/{page.pk}-guide/"))
+        self.assertTrue(default_storage.exists(image.file.name))
+        self.assertFalse(default_storage.exists(old_name))
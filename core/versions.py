@@ -0,0 +1,55 @@
+"""
+Version counters shared by every process.
+
+Per-process structures (the transit graph, POI facet bitsets, the suggest
+index) and cached search result pages are retired by bumping a counter. The
+counters live in the database rather than in the cache: ``CACHES`` defaults
+to a per-process LocMemCache, in which a bump from one Gunicorn worker,
+``manage.py`` command or cron job would never reach the others.
+
+A read is one primary-key lookup. Bumps are a single ``UPDATE value =
+value + 1``; callers run them from ``transaction.on_commit`` so readers never
+pair a new version with uncommitted data.
+"""
+
+from __future__ import annotations
+
+import time
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+
+def _initial_value() -> int:
+    # A counter that is created again (a new database, a test rollback) must
+    # not come back at a value some process has already built from.
+    return time.time_ns()
+
+
+def get_version(key: str) -> int:
+    from core.models import VersionCounter
+
+    value = VersionCounter.objects.filter(key=key).values_list("value", flat=True).first()
+    if value is None:
+        counter, _ = VersionCounter.objects.get_or_create(
+            key=key, defaults={"value": _initial_value()}
+        )
+        value = counter.value
+    return value
+
+
+def bump_version(key: str) -> int:
+    """Move ``key`` to a new version and return it."""
+    from core.models import VersionCounter
+
+    counters = VersionCounter.objects.filter(key=key)
+    with transaction.atomic():
+        if not counters.update(value=F("value") + 1):
+            try:
+                with transaction.atomic():
+                    VersionCounter.objects.create(key=key, value=_initial_value())
+            except IntegrityError:
+                counters.update(value=F("value") + 1)
+        # select_for_update() also pins the read to the primary, where the
+        # update just happened, even inside ``read_replica``.
+        return counters.select_for_update().values_list("value", flat=True).get()
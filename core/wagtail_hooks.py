@@ -0,0 +1,8 @@
+from wagtail import hooks
+
+from core.instrumentation import record_page
+
+
+@hooks.register("before_serve_page")
+def label_request_timing(page, request, serve_args, serve_kwargs):
+    record_page(request, page)
@@ -63,6 +63,7 @@ class AboutPage(Page):
     promote_panels = Page.promote_panels
     parent_page_types = ["home.HomePage"]
     subpage_types = []
+    search_snippet_field = "summary"
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
@@ -118,6 +119,7 @@ class BlankPage(Page):
     promote_panels = Page.promote_panels
     parent_page_types = ["home.HomePage"]
     subpage_types = []
+    search_snippet_field = "summary"
     template = "home/blank_page.html"
 
     def save(self, *args, **kwargs):
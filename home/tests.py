@@ -1,5 +1,15 @@
+import re
+import shutil
+import tempfile
+
+from core.instrumentation import RequestMetrics, _current
 from home.models import HomePage
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.test import override_settings
+from wagtail.images.models import Image
+from wagtail.images.tests.utils import get_test_image_file
 from wagtail.models import Page, Site
 from wagtail.test.utils import WagtailPageTestCase
 
@@ -40,3 +50,58 @@ class HomeTests(WagtailPageTestCase):
     def test_homepage_template_used(self):
         response = self.client.get(self.homepage.url)
         self.assertTemplateUsed(response, "home/home_page.html")
+
+
+TIMED_MIDDLEWARE = ["core.instrumentation.RequestTimingMiddleware", *settings.MIDDLEWARE]
+
+
+@override_settings(MIDDLEWARE=TIMED_MIDDLEWARE, REQUEST_TIMING_SAMPLE_RATE=1.0, REQUEST_TIMING_SLOW_MS=0)
+class RequestTimingTests(WagtailPageTestCase):
+    def setUp(self):
+        root_page = Page.get_first_root_node()
+        Site.objects.create(hostname="testsite", root_page=root_page, is_default_site=True)
+        self.homepage = HomePage(title="Home")
+        root_page.add_child(instance=self.homepage)
+
+    def test_sampled_request_reports_server_timing_and_logs_slow_requests(self):
+        with self.assertLogs("core.instrumentation", level="WARNING") as logs:
+            response = self.client.get(self.homepage.url)
+        timing = response["Server-Timing"]
+        self.assertRegex(timing, r'sql;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn("render;dur=", timing)
+        self.assertIn("total;dur=", timing)
+        self.assertIn(f"[HomePage#{self.homepage.pk}]", logs.output[0])
+
+    def test_renditions_of_stock_images_are_counted(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        image = Image.objects.create(title="Test", file=get_test_image_file())
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            image.get_rendition("fill-20x20")
+        finally:
+            _current.reset(token)
+        self.assertEqual(metrics.rendition_count, 1)
+
+    def test_render_inside_read_replica_view_is_timed(self):
+        # use_read_replica renders the response before the middleware sees it.
+        with self.assertLogs("core.instrumentation", level="WARNING"):
+            response = self.client.get("/search/", {"query": "home"})
+        self.assertEqual(response.status_code, 200)
+        render_ms = re.search(r"render;dur=([\d.]+)", response["Server-Timing"]).group(1)
+        self.assertGreater(float(render_ms), 0)
+
+    @override_settings(MIDDLEWARE=["core.instrumentation.RequestTimingMiddleware"])
+    async def test_async_request_records_queries(self):
+        url = await sync_to_async(lambda: self.homepage.url)()
+        with self.assertLogs("core.instrumentation", level="WARNING"):
+            response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response["Server-Timing"], r'sql;dur=[\d.]+;desc="[1-9]\d* queries"')
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_request_is_untouched(self):
+        response = self.client.get(self.homepage.url)
+        self.assertNotIn("Server-Timing", response)
@@ -1,3 +1,88 @@
-from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+from wagtail.models import Page
+
+from home.models import HomePage
+from poi.models import POICategory, POIIndexPage, POIPage
+from public_transport.models import TransportStation, TransportStationLine
+from map.views import parse_max_walk
+from public_transport.routing import MAX_WALK_KM, MAX_WALK_KM_LIMIT, bump_graph_version
+
+
+class AsyncMapViewTests(TestCase):
+    def setUp(self):
+        for number, longitude in enumerate(("100.50", "100.52", "100.54"), start=1):
+            station = TransportStation.objects.create(
+                station_label=f"S{number}",
+                station_qid=f"Q-S{number}",
+                system_label="Metro",
+                line_label="Red",
+                station_codes=f"R{number}",
+                latitude=Decimal("13.70"),
+                longitude=Decimal(longitude),
+            )
+            TransportStationLine.objects.create(station=station, line=station.line)
+        station.line.refresh_member_codes()
+        station.line.refresh_sequence()
+        bump_graph_version()
+
+        home = Page.get_first_root_node().add_child(
+            instance=HomePage(title="Home", slug="map-home")
+        )
+        index = home.add_child(instance=POIIndexPage(title="Places", slug="places"))
+        category = POICategory.objects.create(title="Cafe")
+        self.pois = [
+            index.add_child(
+                instance=POIPage(
+                    title=title,
+                    slug=title.lower(),
+                    category=category,
+                    short_description="Short description",
+                    latitude=Decimal("13.701"),
+                    longitude=Decimal(longitude),
+                )
+            )
+            for title, longitude in (("West", "100.50"), ("East", "100.54"))
+        ]
+
+    async def test_route_between_pois(self):
+        west, east = self.pois
+        response = await self.async_client.get("/map/route/", {"from": west.pk, "to": east.pk})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["from"]["title"], "West")
+        self.assertEqual([leg["kind"] for leg in data["legs"]], ["walk", "ride", "walk"])
+
+    async def test_route_ignores_unusable_max_walk(self):
+        west, east = self.pois
+        for max_walk in ("nan", "inf", "-inf", "-1", "0", "abc", "1e308"):
+            with self.subTest(max_walk=max_walk):
+                response = await self.async_client.get(
+                    "/map/route/", {"from": west.pk, "to": east.pk, "max_walk": max_walk}
+                )
+                self.assertEqual(response.status_code, 200)
+                legs = [leg["kind"] for leg in response.json()["legs"]]
+                self.assertEqual(legs, ["walk", "ride", "walk"])
+
+    async def test_route_with_unknown_poi(self):
+        response = await self.async_client.get("/map/route/", {"from": 0, "to_point": "13.7,100.5"})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_transport_map_renders_point(self):
+        response = await self.async_client.get(
+            "/map/transport/", {"lat": "13.7", "lng": "100.5", "title": "<S1>"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "&lt;S1&gt;")
+
+
+class ParseMaxWalkTests(SimpleTestCase):
+    def test_invalid_values_fall_back_to_default(self):
+        for value in (None, "", "abc", "nan", "inf", "-inf", "-1", "0"):
+            with self.subTest(value=value):
+                self.assertEqual(parse_max_walk(value), MAX_WALK_KM)
+
+    def test_clamped_to_limit(self):
+        self.assertEqual(parse_max_walk("0.5"), 0.5)
+        self.assertEqual(parse_max_walk("1e308"), MAX_WALK_KM_LIMIT)
@@ -7,4 +7,5 @@ app_name = "map"
 
 urlpatterns = [
     path("transport/", views.transport_map, name="transport_map"),
+    path("route/", views.transport_route, name="transport_route"),
 ]
@@ -1,8 +1,17 @@
+import math
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
 from django.shortcuts import render
 from django.utils.html import escape
 
+from core.db import use_read_replica
+from core.geo import parse_point
+from poi.models import POIPage
+from public_transport.routing import MAX_WALK_KM, MAX_WALK_KM_LIMIT, get_transit_graph
+
 
-def transport_map(request):
+async def transport_map(request):
     lat = request.GET.get("lat")
     lng = request.GET.get("lng")
     title = request.GET.get("title") or "Station"
@@ -28,7 +37,8 @@ def transport_map(request):
                 }
             )
 
-    return render(
+    # Templates may query (navigation menus), which the event loop must not do.
+    return await sync_to_async(render)(
         request,
         "map/transport_map.html",
         {
@@ -36,3 +46,109 @@ def transport_map(request):
             "title": title,
         },
     )
+
+
+async def _route_endpoints(request):
+    """
+    Resolve ``from``/``to`` (live POI ids) or ``from_point``/``to_point``
+    (``"lat,lng"``) to ``(label, lat, lng)``. Both POIs load in one query.
+    """
+    poi_ids = {}
+    for key in ("from", "to"):
+        value = request.GET.get(key)
+        if value and value.isdigit():
+            poi_ids[key] = int(value)
+    pois = (
+        await POIPage.objects.live()
+        .filter(latitude__isnull=False, longitude__isnull=False)
+        .ain_bulk(poi_ids.values())
+        if poi_ids
+        else {}
+    )
+
+    endpoints = {}
+    for key in ("from", "to"):
+        poi = pois.get(poi_ids.get(key))
+        if poi is not None:
+            endpoints[key] = {
+                "title": poi.title,
+                "lat": float(poi.latitude),
+                "lng": float(poi.longitude),
+            }
+            continue
+        point = parse_point(request.GET.get(f"{key}_point"))
+        if point is not None:
+            endpoints[key] = {"title": "", "lat": point[0], "lng": point[1]}
+    return endpoints
+
+
+def parse_max_walk(value) -> float:
+    """``max_walk`` in km, clamped to ``(0, MAX_WALK_KM_LIMIT]``; ``MAX_WALK_KM`` if invalid."""
+    try:
+        max_walk_km = float(value)
+    except (TypeError, ValueError):
+        return MAX_WALK_KM
+    # nan or inf would make the station grid scan span the whole globe.
+    if not math.isfinite(max_walk_km) or max_walk_km <= 0:
+        return MAX_WALK_KM
+    return min(max_walk_km, MAX_WALK_KM_LIMIT)
+
+
+def _station_json(station):
+    return {
+        "id": station.id,
+        "label": station.label,
+        "codes": station.codes,
+        "lat": station.latitude,
+        "lng": station.longitude,
+    }
+
+
+def _plan_route(origin, destination, max_walk_km):
+    # A rebuild of a stale graph queries and the A* search is CPU-bound;
+    # neither may run on the event loop.
+    return get_transit_graph().route(
+        (origin["lat"], origin["lng"]),
+        (destination["lat"], destination["lng"]),
+        max_walk_km=max_walk_km,
+    )
+
+
+@use_read_replica
+async def transport_route(request):
+    endpoints = await _route_endpoints(request)
+    missing = [key for key in ("from", "to") if key not in endpoints]
+    if missing:
+        return JsonResponse(
+            {"error": f"Unknown or missing {' and '.join(missing)}: pass a POI id or a lat,lng point."},
+            status=400,
+        )
+
+    max_walk_km = parse_max_walk(request.GET.get("max_walk"))
+    origin, destination = endpoints["from"], endpoints["to"]
+    route = await sync_to_async(_plan_route)(origin, destination, max_walk_km)
+    if route is None:
+        return JsonResponse(
+            {"from": origin, "to": destination, "error": "No route within walking distance of a station."},
+            status=404,
+        )
+
+    return JsonResponse(
+        {
+            "from": origin,
+            "to": destination,
+            "minutes": round(route.minutes, 1),
+            "legs": [
+                {
+                    "kind": leg.kind,
+                    "minutes": round(leg.minutes, 1),
+                    "distance_km": round(leg.distance_km, 2),
+                    "line": {"id": leg.line.id, "label": leg.line.label, "system": leg.line.system}
+                    if leg.line
+                    else None,
+                    "stations": [_station_json(station) for station in leg.stations],
+                }
+                for leg in route.legs
+            ],
+        }
+    )
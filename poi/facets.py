@@ -0,0 +1,166 @@
+"""
+Faceted filtering for POI index pages.
+
+Each index page keeps, per process, one bitset (a Python int) per feature and
+per category over its live POIs. Bit ``n`` stands for the ``n``-th POI in
+title order, so filtering is a handful of integer ANDs/ORs, facet counts are
+popcounts, and the matching ids come out already sorted. The bitsets are
+rebuilt with two queries whenever the shared search index version changes,
+which happens in every process once a POI, feature or category save or
+delete commits (see ``search.signal_handlers``). They are also rebuilt after
+``FACET_INDEX_MAX_AGE`` seconds, which bounds how long writes that skip
+signals (raw SQL, ``bulk_update``) stay invisible.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+from search.cache import get_index_version
+
+DEFAULT_MAX_AGE = 300
+
+MATCH_ALL = "all"
+MATCH_ANY = "any"
+
+
+def iter_bits(mask: int):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+@dataclass
+class FacetResult:
+    ids: list[int]
+    feature_counts: dict[str, int]
+    category_counts: dict[int, int]
+
+
+@dataclass
+class FacetIndex:
+    ids: list[int] = field(default_factory=list)
+    positions: dict[int, int] = field(default_factory=dict)
+    features: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    categories: dict[int, int] = field(default_factory=lambda: defaultdict(int))
+    verified: int = 0
+    # id -> (title, slug, category_id, lat, lng) for POIs with coordinates.
+    locations: dict[int, tuple] = field(default_factory=dict)
+
+    @property
+    def everything(self) -> int:
+        return (1 << len(self.ids)) - 1
+
+    @classmethod
+    def build(cls, index_page) -> FacetIndex:
+        from poi.models import POIPage
+
+        facets = cls()
+        rows = (
+            POIPage.objects.child_of(index_page)
+            .live()
+            .order_by("title", "id")
+            .values_list("id", "title", "slug", "category_id", "verified", "latitude", "longitude")
+        )
+        for position, row in enumerate(rows):
+            poi_id, title, slug, category_id, verified, latitude, longitude = row
+            bit = 1 << position
+            facets.ids.append(poi_id)
+            facets.positions[poi_id] = position
+            facets.categories[category_id] |= bit
+            if verified:
+                facets.verified |= bit
+            if latitude is not None and longitude is not None:
+                facets.locations[poi_id] = (title, slug, category_id, float(latitude), float(longitude))
+
+        memberships = POIPage.features.through.objects.filter(
+            poipage_id__in=facets.positions
+        ).values_list("poipage_id", "poifeature__slug")
+        for poi_id, slug in memberships:
+            facets.features[slug] |= 1 << facets.positions[poi_id]
+        return facets
+
+    def mask_for_ids(self, ids) -> int:
+        mask = 0
+        for poi_id in ids:
+            position = self.positions.get(poi_id)
+            if position is not None:
+                mask |= 1 << position
+        return mask
+
+    def filter(
+        self,
+        category_id=None,
+        features=(),
+        match=MATCH_ALL,
+        verified_only=False,
+        candidates=None,
+    ) -> FacetResult:
+        """
+        Apply the filters and count facets in one pass.
+
+        ``candidates`` is an optional bitmask (e.g. from a text search). Each
+        facet's counts ignore that facet's own filter, so category counts show
+        what picking another category would return; feature counts show the
+        result size after toggling the feature on under the current match mode.
+        """
+        base = self.everything if candidates is None else candidates
+        if verified_only:
+            base &= self.verified
+
+        category_mask = self.categories.get(category_id, 0) if category_id else self.everything
+
+        feature_masks = [self.features.get(slug, 0) for slug in features]
+        if not feature_masks:
+            feature_mask = self.everything
+        elif match == MATCH_ANY:
+            feature_mask = 0
+            for mask in feature_masks:
+                feature_mask |= mask
+        else:
+            feature_mask = self.everything
+            for mask in feature_masks:
+                feature_mask &= mask
+
+        result = base & category_mask & feature_mask
+
+        within_features = base & feature_mask
+        category_counts = {
+            key: (within_features & mask).bit_count() for key, mask in self.categories.items()
+        }
+        within_category = base & category_mask
+        feature_counts = {}
+        for slug, mask in self.features.items():
+            if match == MATCH_ANY and feature_masks:
+                feature_counts[slug] = (within_category & (feature_mask | mask)).bit_count()
+            else:
+                feature_counts[slug] = (result & mask).bit_count()
+
+        return FacetResult(
+            ids=[self.ids[position] for position in iter_bits(result)],
+            feature_counts=feature_counts,
+            category_counts=category_counts,
+        )
+
+
+_lock = threading.Lock()
+_indexes: dict[int, tuple[int, float, FacetIndex]] = {}
+
+
+def get_facet_index(index_page) -> FacetIndex:
+    version = get_index_version()
+    max_age = getattr(settings, "FACET_INDEX_MAX_AGE", DEFAULT_MAX_AGE)
+    cached = _indexes.get(index_page.pk)
+    if cached and cached[0] == version and time.monotonic() - cached[1] < max_age:
+        return cached[2]
+    built_at = time.monotonic()
+    facets = FacetIndex.build(index_page)
+    with _lock:
+        _indexes[index_page.pk] = (version, built_at, facets)
+    return facets
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poi', '0006_alter_poicategory_options'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='poipage',
+            index=models.Index(fields=['latitude', 'longitude'], name='poi_poipage_lat_lng_idx'),
+        ),
+    ]
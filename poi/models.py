@@ -1,6 +1,7 @@
 from urllib.parse import urlencode
 
 from django import forms
+from django.apps import apps
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
@@ -14,6 +15,16 @@ from wagtail.models import Orderable, Page
 from wagtail.search import index
 from wagtail.snippets.models import register_snippet
 
+from core.db import use_read_replica
+from core.geo import bounding_box, haversine_km, parse_point
+from poi.facets import MATCH_ALL, MATCH_ANY, get_facet_index
+from search.thai import expand_query, search_variants
+
+
+DEFAULT_RADIUS_KM = 2.0
+MAX_RADIUS_KM = 50.0
+RADIUS_OPTIONS_KM = (0.5, 1.0, 2.0, 5.0, 10.0)
+
 
 @register_snippet
 class POICategory(index.Indexed, models.Model):
@@ -159,6 +170,8 @@ class POIPage(Page):
 
     parent_page_types = ["poi.POIIndexPage"]
     subpage_types = []
+    search_snippet_field = "short_description"
+    search_thumbnail_field = "hero_image"
 
     search_fields = Page.search_fields + [
         index.SearchField("title", partial_match=True),
@@ -172,10 +185,23 @@ class POIPage(Page):
                 index.FilterField("slug"),
             ],
         ),
+        index.SearchField("search_variants"),
     ]
 
     class Meta:
         verbose_name = "POI"
+        indexes = [
+            models.Index(fields=["latitude", "longitude"], name="poi_poipage_lat_lng_idx"),
+        ]
+
+    def search_variants(self):
+        return search_variants(
+            self.title,
+            self.short_description,
+            self.address,
+            self.district,
+            self.landmark,
+        )
 
 
 class POIPageGalleryImage(Orderable):
@@ -237,56 +263,132 @@ class POIIndexPage(Page):
             self.slug = slugify(self.title)
         super().save(*args, **kwargs)
 
-    def get_filtered_pois(self, request):
-        pois = (
+    def get_distance_origin(self, request):
+        """Return ``((lat, lng), radius_km)`` from ``near``/``near_station``, or ``(None, None)``."""
+        origin = parse_point(request.GET.get("near"))
+        station_qid = request.GET.get("near_station") or ""
+        if origin is None and station_qid:
+            TransportStation = apps.get_model("public_transport", "TransportStation")
+            coordinates = (
+                TransportStation.objects.filter(station_qid=station_qid)
+                .exclude(latitude__isnull=True)
+                .exclude(longitude__isnull=True)
+                .values_list("latitude", "longitude")
+                .first()
+            )
+            if coordinates:
+                origin = (float(coordinates[0]), float(coordinates[1]))
+        if origin is None:
+            return None, None
+        try:
+            radius_km = float(request.GET.get("radius") or DEFAULT_RADIUS_KM)
+        except ValueError:
+            radius_km = DEFAULT_RADIUS_KM
+        return origin, min(max(radius_km, 0.1), MAX_RADIUS_KM)
+
+    def get_poi_distances(self, origin, radius_km) -> dict[int, float]:
+        """
+        Distances in km to live POIs within ``radius_km`` of ``origin``.
+
+        The bounding box is resolved by the latitude/longitude index; only the
+        rows inside it get the exact haversine check.
+        """
+        min_lat, max_lat, min_lng, max_lng = bounding_box(*origin, radius_km)
+        rows = (
             POIPage.objects.child_of(self)
             .live()
-            .select_related("category", "hero_image")
-            .prefetch_related("features", "gallery_images__image")
-            .order_by("title")
+            .filter(latitude__range=(min_lat, max_lat), longitude__range=(min_lng, max_lng))
+            .values_list("id", "latitude", "longitude")
         )
+        distances = {}
+        for poi_id, latitude, longitude in rows:
+            distance = haversine_km(origin[0], origin[1], float(latitude), float(longitude))
+            if distance <= radius_km:
+                distances[poi_id] = distance
+        return distances
 
+    def get_filtered_pois(self, request):
         fixed_category_id = self.category_id
         selected_category = request.GET.get("category") or ""
         if fixed_category_id:
             selected_category = str(fixed_category_id)
-        selected_features = request.GET.getlist("feature")
-        search_query = request.GET.get("q") or ""
-        verified_only = request.GET.get("verified") == "1"
+        feature_match = request.GET.get("match")
+        if feature_match != MATCH_ANY:
+            feature_match = MATCH_ALL
+        filters = {
+            "selected_category": selected_category,
+            "selected_features": request.GET.getlist("feature"),
+            "feature_match": feature_match,
+            "search_query": request.GET.get("q") or "",
+            "verified_only": request.GET.get("verified") == "1",
+        }
+
+        facets = get_facet_index(self)
+        candidates = None
+        search_order = None
+        if filters["search_query"]:
+            search_order = [
+                poi.pk
+                for poi in POIPage.objects.child_of(self)
+                .live()
+                .only("id")
+                .search(expand_query(filters["search_query"]))
+            ]
+            candidates = facets.mask_for_ids(search_order)
+
+        origin, radius_km = self.get_distance_origin(request)
+        distances = None
+        if origin is not None:
+            distances = self.get_poi_distances(origin, radius_km)
+            nearby = facets.mask_for_ids(distances)
+            candidates = nearby if candidates is None else candidates & nearby
+        filters["near_origin"] = origin
+        filters["radius_km"] = radius_km
+
+        category_id = int(selected_category) if selected_category.isdigit() else None
+        result = facets.filter(
+            category_id=category_id,
+            features=filters["selected_features"],
+            match=feature_match,
+            verified_only=filters["verified_only"],
+            candidates=candidates,
+        )
+        if distances is not None:
+            result.ids.sort(key=distances.__getitem__)
+        elif search_order is not None:
+            # Keep the search backend's relevance order.
+            matched = set(result.ids)
+            result.ids = [poi_id for poi_id in search_order if poi_id in matched]
 
-        if fixed_category_id:
-            pois = pois.filter(category_id=fixed_category_id)
-        elif selected_category:
-            pois = pois.filter(category_id=selected_category)
-        if selected_features:
-            pois = pois.filter(features__slug__in=selected_features).distinct()
-        if verified_only:
-            pois = pois.filter(verified=True)
-        if search_query:
-            pois = pois.search(search_query)
-
-        return pois, selected_category, selected_features, search_query, verified_only
+        return result, facets, distances or {}, filters
 
     def build_context(self, request):
         context = super().get_context(request)
-        pois, selected_category, selected_features, search_query, verified_only = (
-            self.get_filtered_pois(request)
-        )
-
-        map_pois = [
-            {
-                "title": poi.title,
-                "category": poi.category.title,
-                "url": poi.url,
-                "lat": float(poi.latitude),
-                "lng": float(poi.longitude),
-            }
-            for poi in pois
-            if poi.latitude is not None and poi.longitude is not None
-        ]
+        result, facets, distances, filters = self.get_filtered_pois(request)
+        selected_category = filters["selected_category"]
+
+        categories = list(POICategory.objects.all())
+        category_titles = {category.id: category.title for category in categories}
+        # POIs are direct children, so their URLs extend this page's URL.
+        base_url = self.get_url(request)
+        map_pois = []
+        for poi_id in result.ids:
+            location = facets.locations.get(poi_id)
+            if location is None:
+                continue
+            title, slug, category_id, lat, lng = location
+            map_pois.append(
+                {
+                    "title": title,
+                    "category": category_titles.get(category_id, ""),
+                    "url": f"{base_url}{slug}/" if base_url else None,
+                    "lat": lat,
+                    "lng": lng,
+                }
+            )
 
         page_number = request.GET.get("page", 1)
-        paginator = Paginator(pois, 12)
+        paginator = Paginator(result.ids, 12)
         try:
             page_obj = paginator.page(page_number)
         except PageNotAnInteger:
@@ -294,27 +396,46 @@ class POIIndexPage(Page):
         except EmptyPage:
             page_obj = paginator.page(paginator.num_pages)
 
+        # Only the POIs shown on this page are loaded as full objects.
+        page_pois = (
+            POIPage.objects.filter(id__in=page_obj.object_list)
+            .select_related("category", "hero_image")
+            .prefetch_related("features", "gallery_images__image")
+            .in_bulk()
+        )
+        page_obj.object_list = [page_pois[poi_id] for poi_id in page_obj.object_list if poi_id in page_pois]
+        for poi in page_obj.object_list:
+            poi.distance_km = distances.get(poi.pk)
+
         query_params = request.GET.copy()
         query_params.pop("page", None)
         querystring = urlencode(query_params, doseq=True)
 
+        for category in categories:
+            category.facet_count = result.category_counts.get(category.id, 0)
+        features = list(POIFeature.objects.all())
+        for feature in features:
+            feature.facet_count = result.feature_counts.get(feature.slug, 0)
+
         selected_category_obj = self.category
         if not selected_category_obj and selected_category:
-            selected_category_obj = POICategory.objects.filter(id=selected_category).first()
+            selected_category_obj = next(
+                (category for category in categories if str(category.id) == selected_category),
+                None,
+            )
 
+        context.update(filters)
         context.update(
             {
                 "pois": page_obj.object_list,
                 "page_obj": page_obj,
-                "categories": POICategory.objects.all(),
-                "features": POIFeature.objects.all(),
-                "selected_category": selected_category,
+                "result_count": len(result.ids),
+                "categories": categories,
+                "features": features,
                 "selected_category_obj": selected_category_obj,
                 "is_category_locked": bool(self.category),
-                "selected_features": selected_features,
-                "search_query": search_query,
-                "verified_only": verified_only,
                 "map_pois": map_pois,
+                "radius_options": RADIUS_OPTIONS_KM,
                 "querystring": querystring,
             }
         )
@@ -322,3 +443,7 @@ class POIIndexPage(Page):
 
     def get_context(self, request, *args, **kwargs):
         return self.build_context(request)
+
+    @use_read_replica
+    def serve(self, request, *args, **kwargs):
+        return super().serve(request, *args, **kwargs)
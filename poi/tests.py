@@ -1,9 +1,23 @@
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.test import RequestFactory, TestCase
+from django.db.models import F
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from wagtail.images.models import Image
+from wagtail.images.tests.utils import get_test_image_file
 from wagtail.models import Page
 
+from core.bulk_pages import SlugAllocator, bulk_add_children
+from core.geo import bounding_box, haversine_km, parse_point
+from core.models import VersionCounter
+from core.testing import QueryScalingMixin, SitePagesMixin
 from home.models import HomePage
-from poi.models import POICategory, POIFeature, POIIndexPage, POIPage
+from poi.facets import MATCH_ANY, FacetIndex, get_facet_index
+from poi.models import POICategory, POIFeature, POIIndexPage, POIPage, POIPageGalleryImage
+from search.cache import INDEX_VERSION_KEY, bump_index_version
 
 
 class POIAppTests(TestCase):
@@ -122,3 +136,151 @@ class POIAppTests(TestCase):
 
         self.assertEqual(len(map_pois), 1)
         self.assertEqual(map_pois[0]["title"], "With coords")
+
+
+class FacetIndexTests(SimpleTestCase):
+    def setUp(self):
+        # POIs 10, 11, 12 in title order; category 1 holds 10 and 11.
+        self.facets = FacetIndex(ids=[10, 11, 12], positions={10: 0, 11: 1, 12: 2})
+        self.facets.categories.update({1: 0b011, 2: 0b100})
+        self.facets.features.update({"wifi": 0b111, "parking": 0b101})
+        self.facets.verified = 0b001
+
+    def test_features_match_all_by_default(self):
+        result = self.facets.filter(features=["wifi", "parking"])
+        self.assertEqual(result.ids, [10, 12])
+        self.assertEqual(result.category_counts, {1: 1, 2: 1})
+
+    def test_features_match_any(self):
+        result = self.facets.filter(category_id=1, features=["parking"], match=MATCH_ANY)
+        self.assertEqual(result.ids, [10])
+        self.assertEqual(result.feature_counts, {"wifi": 2, "parking": 1})
+
+    def test_candidates_and_verified_narrow_results(self):
+        candidates = self.facets.mask_for_ids([10, 12, 99])
+        self.assertEqual(self.facets.filter(candidates=candidates).ids, [10, 12])
+        self.assertEqual(self.facets.filter(verified_only=True).ids, [10])
+
+
+@mock.patch.object(FacetIndex, "build", side_effect=lambda page: FacetIndex())
+class FacetIndexCacheTests(TestCase):
+    def setUp(self):
+        self.page = SimpleNamespace(pk=-1)
+        bump_index_version()
+
+    def test_rebuilt_when_another_process_bumps_the_version(self, build):
+        facets = get_facet_index(self.page)
+        # Neither this process's cache nor its signals are involved.
+        cache.clear()
+        self.assertIs(get_facet_index(self.page), facets)
+        VersionCounter.objects.filter(key=INDEX_VERSION_KEY).update(value=F("value") + 1)
+        self.assertIsNot(get_facet_index(self.page), facets)
+        self.assertEqual(build.call_count, 2)
+
+    @override_settings(FACET_INDEX_MAX_AGE=60)
+    def test_rebuilt_after_max_age(self, build):
+        with mock.patch("poi.facets.time.monotonic", return_value=1000.0):
+            facets = get_facet_index(self.page)
+        with mock.patch("poi.facets.time.monotonic", return_value=1059.0):
+            self.assertIs(get_facet_index(self.page), facets)
+        with mock.patch("poi.facets.time.monotonic", return_value=1061.0):
+            self.assertIsNot(get_facet_index(self.page), facets)
+
+
+class DistanceTests(SimpleTestCase):
+    def test_bounding_box_contains_radius(self):
+        min_lat, max_lat, min_lng, max_lng = bounding_box(13.75, 100.5, 2)
+        self.assertAlmostEqual(haversine_km(13.75, 100.5, max_lat, 100.5), 2, places=3)
+        self.assertAlmostEqual(haversine_km(13.75, 100.5, 13.75, max_lng), 2, places=2)
+        self.assertLess(min_lat, 13.75)
+        self.assertLess(min_lng, 100.5)
+
+    def test_parse_point(self):
+        self.assertEqual(parse_point("13.75,100.5"), (13.75, 100.5))
+        self.assertIsNone(parse_point("13.75"))
+        self.assertIsNone(parse_point("95,100"))
+
+
+class BulkAddChildrenTests(TestCase):
+    def setUp(self):
+        root = Page.get_first_root_node()
+        self.home = root.add_child(instance=HomePage(title="Home", slug="bulk-home"))
+        self.index = self.home.add_child(instance=POIIndexPage(title="Places", slug="places"))
+        self.category = POICategory.objects.create(title="Cafe")
+        self.wifi = POIFeature.objects.create(title="Rooftop", slug="bulk-rooftop")
+        self.index.add_child(
+            instance=POIPage(title="Existing", slug="existing", category=self.category, short_description="x")
+        )
+
+    def test_pages_join_the_tree_with_published_revisions(self):
+        slugs = SlugAllocator(self.index)
+        pois = []
+        for _ in range(3):
+            poi = POIPage(
+                title="Existing",
+                slug=slugs.allocate("Existing"),
+                category=self.category,
+                short_description="Generated",
+            )
+            poi.features = [self.wifi]
+            pois.append(poi)
+
+        with self.assertNumQueries(13):
+            bulk_add_children(self.index, pois, batch_size=2)
+
+        self.assertEqual([poi.slug for poi in pois], ["existing-2", "existing-3", "existing-4"])
+        self.assertEqual(Page.find_problems(), ([], [], [], [], []))
+        self.index.refresh_from_db()
+        self.assertEqual(self.index.numchild, 4)
+        children = list(POIPage.objects.child_of(self.index).live().order_by("path"))
+        self.assertEqual([page.slug for page in children][1:], ["existing-2", "existing-3", "existing-4"])
+        saved = children[-1]
+        self.assertEqual(saved.url_path, f"{self.index.url_path}existing-4/")
+        self.assertEqual(saved.live_revision_id, saved.latest_revision_id)
+        revision = saved.get_latest_revision().as_object()
+        self.assertEqual(revision.short_description, "Generated")
+        self.assertEqual(list(revision.features.all()), [self.wifi])
+
+
+class POIIndexPageQueryTests(SitePagesMixin, QueryScalingMixin, TestCase):
+    index_page_class = POIIndexPage
+    index_title = "Places"
+
+    def setUp(self):
+        super().setUp()
+        self.categories = [
+            POICategory.objects.create(title=title) for title in ("Cafe", "Market")
+        ]
+        self.features = [
+            POIFeature.objects.create(title=title, slug=f"query-{title.lower()}")
+            for title in ("WiFi", "Parking")
+        ]
+
+    def add_pois(self, count):
+        for _ in range(count):
+            number = self.next_number()
+            image = Image.objects.create(title=f"Image {number}", file=get_test_image_file())
+            poi = POIPage(
+                title=f"Place {number}",
+                slug=f"place-{number}",
+                category=self.categories[number % 2],
+                short_description="Short description",
+                latitude=Decimal("13.75") + Decimal(number) / 1000,
+                longitude=Decimal("100.50"),
+                hero_image=image,
+            )
+            poi.features = self.features
+            poi.gallery_images = [POIPageGalleryImage(image=image)]
+            self.index.add_child(instance=poi)
+
+    def test_index_queries_do_not_scale_with_pois(self):
+        # Six POIs fit on the first page of results.
+        self.assertQueriesDoNotScale(lambda: self.client.get(self.index.url), self.add_pois)
+
+    def test_filtered_index_queries_do_not_scale_with_pois(self):
+        self.assertQueriesDoNotScale(
+            lambda: self.client.get(
+                self.index.url, {"feature": "query-wifi", "near": "13.75,100.5", "radius": "5"}
+            ),
+            self.add_pois,
+        )
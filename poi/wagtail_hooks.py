@@ -1,3 +1,4 @@
+from django.core.signals import request_finished
 from django.urls import path, reverse
 from django.utils.translation import gettext_lazy as _
 
@@ -5,6 +6,8 @@ from wagtail import hooks
 from wagtail.admin.menu import MenuItem
 
 from poi.admin_views import poi_index_list
+from poi.models import POIPage
+from search.indexing import begin_suspension, end_suspension
 
 
 @hooks.register("register_admin_menu_item")  # type: ignore[operator]
@@ -22,3 +25,21 @@ def register_poi_admin_urls():
     return [
         path("poi/", poi_index_list, name="poi_index_list"),
     ]
+
+
+@hooks.register("before_bulk_action")  # type: ignore[operator]
+def suspend_poi_indexing(request, action_type, objects, action_class_instance):
+    # Bulk publish/unpublish/move saves every POI individually; index them in
+    # batches after the request instead. Ending on request_finished also
+    # covers actions that fail part-way and never reach after_bulk_action.
+    if not any(getattr(obj, "specific_class", None) is POIPage for obj in objects):
+        return
+
+    begin_suspension(POIPage)
+
+    def end(**kwargs):
+        request_finished.disconnect(dispatch_uid=dispatch_uid)
+        end_suspension(POIPage)
+
+    dispatch_uid = f"poi-bulk-indexing-{id(request)}"
+    request_finished.connect(end, weak=False, dispatch_uid=dispatch_uid)
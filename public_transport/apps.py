@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class PublicTransportConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "public_transport"
+
+    def ready(self):
+        from public_transport.routing import register_signal_handlers
+
+        register_signal_handlers()
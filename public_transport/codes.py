@@ -0,0 +1,43 @@
+"""
+Station code helpers.
+
+Imported station codes are per station, not per line: an interchange such
+as "E15, YL23" lists the code of every line it serves. These helpers pick
+the code that belongs to one line.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+
+CODE_SPLIT_RE = re.compile(r"[,;/\s]+")
+CODE_PREFIX_RE = re.compile(r"^\D*")
+
+
+def split_station_codes(value: str | None) -> list[str]:
+    return [code for code in CODE_SPLIT_RE.split(value or "") if code]
+
+
+def code_prefix(code: str) -> str:
+    return CODE_PREFIX_RE.match(code).group(0)
+
+
+def pick_line_codes(codes_by_key: dict) -> dict:
+    """
+    Choose one code per member of a line.
+
+    ``codes_by_key`` maps a member key to the station's codes. The chosen
+    code is the one whose prefix is most common on the line, so "E15, YL23"
+    becomes "E15" on the Sukhumvit Line and "YL23" on the Yellow Line. Ties
+    keep the imported order.
+    """
+    prefixes = Counter(
+        prefix
+        for codes in codes_by_key.values()
+        for prefix in {code_prefix(code) for code in codes}
+    )
+    return {
+        key: max(codes, key=lambda code: prefixes[code_prefix(code)]) if codes else ""
+        for key, codes in codes_by_key.items()
+    }
@@ -0,0 +1,115 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.backends.base.creation import TEST_DATABASE_PREFIX
+from django.db.models import Count
+
+from public_transport.models import (
+    TransportLine,
+    TransportStation,
+    TransportStationLine,
+    TransportSystem,
+    stations_on_line,
+    stations_on_system,
+)
+
+
+def _is_test_database():
+    settings_dict = connection.settings_dict
+    name = str(settings_dict["NAME"] or "")
+    return name == (settings_dict.get("TEST") or {}).get("NAME") or name.startswith(
+        TEST_DATABASE_PREFIX
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Print query plans and timings for the hot station queries "
+        "(line/system pages, station form, index form, bounding boxes)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=50, help="Timed runs per query.")
+        parser.add_argument(
+            "--without-indexes",
+            action="store_true",
+            help="Drop the station, membership and line indexes inside a rolled-back "
+            "transaction for comparison (SQLite or test databases only).",
+        )
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            raise CommandError("repeat must be >= 1")
+        if options["without_indexes"] and connection.vendor != "sqlite" and not _is_test_database():
+            # DROP INDEX holds an exclusive lock on the table until the
+            # rollback, which would stall every request using it.
+            raise CommandError(
+                "--without-indexes only runs against SQLite or a test database."
+            )
+
+        line = (
+            TransportLine.objects.annotate(total=Count("memberships"))
+            .filter(total__gt=0)
+            .order_by("-total")
+            .first()
+        )
+        if not line:
+            raise CommandError("No stations found. Run import_unified_transportation first.")
+
+        queries = self._queries(line)
+        self.stdout.write(
+            f"Database: {connection.vendor}, rows: {TransportStation.objects.count()}, "
+            f"line: {line.label} ({line.total} stations)"
+        )
+
+        if not options["without_indexes"]:
+            self._run(queries, options["repeat"])
+            return
+
+        with transaction.atomic():
+            # Plain DDL: the SQLite schema editor refuses to run inside atomic().
+            with connection.cursor() as cursor:
+                for name in self._droppable_indexes(cursor):
+                    cursor.execute(f"DROP INDEX {connection.ops.quote_name(name)}")
+            self.stdout.write("Indexes dropped for this run (rolled back afterwards).")
+            self._run(queries, options["repeat"])
+            transaction.set_rollback(True)
+
+    def _droppable_indexes(self, cursor):
+        # Plain indexes only (declared ones and those behind the foreign
+        # keys); unique constraints and primary keys stay.
+        for model in (TransportStation, TransportStationLine, TransportLine):
+            constraints = connection.introspection.get_constraints(cursor, model._meta.db_table)
+            for name, info in constraints.items():
+                if info["index"] and not info["primary_key"] and not info["unique"]:
+                    yield name
+
+    def _queries(self, line):
+        return {
+            "line page": stations_on_line(line.pk),
+            "line order": stations_on_line(line.pk, "sequence"),
+            "system page": stations_on_system(line.system_id).order_by("station_label"),
+            "station form": TransportStation.objects.filter(
+                line_memberships__line_id=line.pk
+            ).order_by("station_label"),
+            "index form": TransportSystem.objects.order_by("label").values_list("label", flat=True),
+            "bounding box": TransportStation.objects.filter(
+                latitude__range=(13.70, 13.80), longitude__range=(100.50, 100.60)
+            ),
+        }
+
+    def _run(self, queries, repeat):
+        for name, queryset in queries.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(
+                    f"{name}: median {statistics.median(timings):.2f} ms over {repeat} runs"
+                )
+            )
+            self.stdout.write(queryset.explain())
@@ -6,11 +6,20 @@ from pathlib import Path
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
-from public_transport.models import TransportStation
+from public_transport.models import (
+    TransportLine,
+    TransportStation,
+    TransportStationLine,
+    TransportSystem,
+)
+from search.indexing import suspend_indexing
 
 
 class Command(BaseCommand):
-    help = "Import unified transportation GeoJSON into TransportStation snippets."
+    help = (
+        "Import unified transportation GeoJSON into TransportStation snippets, "
+        "one station per stationQid with a line membership per feature."
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -38,49 +47,85 @@ class Command(BaseCommand):
             raise CommandError("Expected a GeoJSON FeatureCollection.")
 
         features = payload.get("features") or []
+        network_cache = {}
         created = 0
         updated = 0
         skipped = 0
 
+        # One station row per stationQid; each feature adds a line membership.
+        rows_by_station = {}
+        for feature in features:
+            props = feature.get("properties") or {}
+            geometry = feature.get("geometry") or {}
+            if geometry.get("type") != "Point":
+                skipped += 1
+                continue
+
+            station_qid = (props.get("stationQid") or "").strip()
+            line_qid = (props.get("lineQid") or "").strip()
+            if not station_qid or not line_qid:
+                skipped += 1
+                continue
+            rows_by_station.setdefault(station_qid, []).append(
+                (props, line_qid, geometry.get("coordinates"))
+            )
+
         if options["dry_run"]:
             self.stdout.write("Dry run: no rows will be written.")
 
-        with transaction.atomic():
-            for feature in features:
-                props = feature.get("properties") or {}
-                geometry = feature.get("geometry") or {}
-                if geometry.get("type") != "Point":
-                    skipped += 1
-                    continue
-
-                station_qid = (props.get("stationQid") or "").strip()
-                line_qid = (props.get("lineQid") or "").strip()
-                if not station_qid or not line_qid:
-                    skipped += 1
+        touched_lines = {}
+        # Index the imported stations in batches once the transaction has
+        # committed instead of once per row.
+        with suspend_indexing(TransportStation, progress=self._report_progress), transaction.atomic():
+            for station_qid, rows in rows_by_station.items():
+                if options["dry_run"]:
+                    created += 1
                     continue
 
-                coordinates = geometry.get("coordinates")
+                memberships = []
+                # The station's own labels and FKs describe its first line, so
+                # both come from the feature that produced that membership.
+                primary_row = rows[0]
+                for row in rows:
+                    props, line_qid, _ = row
+                    system = TransportSystem.resolve(
+                        props.get("systemLabel") or "", props.get("systemQid") or "", network_cache
+                    )
+                    line = TransportLine.resolve(
+                        system, props.get("lineLabel") or "", line_qid, network_cache
+                    )
+                    if line is not None and all(line != other for other, _, _ in memberships):
+                        if not memberships:
+                            primary_row = row
+                        memberships.append(
+                            (
+                                line,
+                                self._parse_opening(props.get("opening")),
+                                self._parse_sequence(props),
+                            )
+                        )
+
+                props, line_qid, coordinates = primary_row
                 longitude, latitude = self._parse_coordinates(coordinates)
-
+                openings = [opening for _, opening, _ in memberships if opening]
+                primary_line = memberships[0][0] if memberships else None
                 defaults = {
                     "station_label": props.get("stationLabel") or "",
+                    "system": primary_line.system if primary_line else None,
                     "system_label": props.get("systemLabel") or "",
                     "system_qid": props.get("systemQid") or "",
+                    "line": primary_line,
                     "line_label": props.get("lineLabel") or "",
-                    "opening": self._parse_opening(props.get("opening")),
+                    "line_qid": line_qid,
+                    "opening": min(openings) if openings else self._parse_opening(props.get("opening")),
                     "station_codes": props.get("stationCodes") or "",
                     "latitude": latitude,
                     "longitude": longitude,
                     "raw_properties": self._merge_raw_properties(props, coordinates),
                 }
 
-                if options["dry_run"]:
-                    created += 1
-                    continue
-
-                obj, was_created = TransportStation.objects.update_or_create(
+                station, was_created = TransportStation.objects.update_or_create(
                     station_qid=station_qid,
-                    line_qid=line_qid,
                     defaults=defaults,
                 )
                 if was_created:
@@ -88,6 +133,31 @@ class Command(BaseCommand):
                 else:
                     updated += 1
 
+                for sort_order, (line, opening, source_sequence) in enumerate(memberships):
+                    TransportStationLine.objects.update_or_create(
+                        station=station,
+                        line=line,
+                        defaults={
+                            "opening": opening,
+                            "sort_order": sort_order,
+                            "source_sequence": source_sequence,
+                        },
+                    )
+                    touched_lines[line.pk] = line
+
+                if not was_created:
+                    # Lines the station no longer serves in this file.
+                    stale = TransportStationLine.objects.filter(station=station).exclude(
+                        line__in=[line for line, _, _ in memberships]
+                    )
+                    for membership in stale.select_related("line"):
+                        touched_lines[membership.line_id] = membership.line
+                    stale.delete()
+
+            for line in touched_lines.values():
+                line.refresh_member_codes()
+                line.refresh_sequence()
+
             if options["dry_run"]:
                 transaction.set_rollback(True)
 
@@ -100,6 +170,9 @@ class Command(BaseCommand):
             )
         )
 
+    def _report_progress(self, model, done, total, last_pk):
+        self.stdout.write(f"Indexed {model._meta.label}: {done}/{total}")
+
     def _parse_opening(self, value):
         if not value:
             return None
@@ -111,6 +184,14 @@ class Command(BaseCommand):
         except ValueError:
             return None
 
+    def _parse_sequence(self, props):
+        value = props.get("sequence", props.get("stopSequence"))
+        try:
+            sequence = int(value)
+        except (TypeError, ValueError):
+            return None
+        return sequence if sequence >= 0 else None
+
     def _parse_coordinates(self, coords):
         if not coords or len(coords) < 2:
             return None, None
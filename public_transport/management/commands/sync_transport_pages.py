@@ -6,7 +6,7 @@ from public_transport.models import (
     PublicTransportIndexPage,
     PublicTransportLinePage,
     PublicTransportSystemPage,
-    TransportStation,
+    TransportSystem,
 )
 
 
@@ -53,15 +53,17 @@ class Command(BaseCommand):
         if options["dry_run"]:
             self.stdout.write("Dry run: no pages will be written.")
 
+        systems = {
+            system.label: system
+            for system in TransportSystem.objects.filter(label__in=system_labels).prefetch_related(
+                "lines"
+            )
+        }
+
         with transaction.atomic():
             for system_label in system_labels:
-                system_qid = (
-                    TransportStation.objects.filter(system_label=system_label)
-                    .exclude(system_qid="")
-                    .values_list("system_qid", flat=True)
-                    .first()
-                    or ""
-                )
+                system = systems.get(system_label)
+                system_qid = system.qid if system else ""
                 system_page = PublicTransportSystemPage.objects.child_of(
                     index_page
                 ).filter(system_label=system_label).first()
@@ -72,6 +74,7 @@ class Command(BaseCommand):
                     system_page = PublicTransportSystemPage(
                         title=system_label,
                         slug=slug,
+                        system=system,
                         system_label=system_label,
                         system_qid=system_qid,
                     )
@@ -87,6 +90,9 @@ class Command(BaseCommand):
                     if system_page.system_qid != system_qid:
                         system_page.system_qid = system_qid
                         changed = True
+                    if system_page.system_id != (system.pk if system else None):
+                        system_page.system = system
+                        changed = True
                     if changed and not options["dry_run"]:
                         system_page.save_revision().publish()
                     if changed:
@@ -95,14 +101,9 @@ class Command(BaseCommand):
                 line_slug_set = set(
                     system_page.get_children().values_list("slug", flat=True)
                 )
-                lines = (
-                    TransportStation.objects.filter(system_label=system_label)
-                    .exclude(line_label="")
-                    .values_list("line_label", "line_qid")
-                    .distinct()
-                    .order_by("line_label")
-                )
-                for line_label, line_qid in lines:
+                for line in system.lines.all() if system else []:
+                    line_label = line.label
+                    line_qid = line.qid
                     line_page = PublicTransportLinePage.objects.child_of(
                         system_page
                     ).filter(line_label=line_label).first()
@@ -113,6 +114,7 @@ class Command(BaseCommand):
                         line_page = PublicTransportLinePage(
                             title=line_label,
                             slug=slug,
+                            line=line,
                             line_label=line_label,
                             line_qid=line_qid or "",
                             system_label=system_label,
@@ -132,6 +134,9 @@ class Command(BaseCommand):
                         if line_page.system_label != system_label:
                             line_page.system_label = system_label
                             changed = True
+                        if line_page.line_id != line.pk:
+                            line_page.line = line
+                            changed = True
                         if changed and not options["dry_run"]:
                             line_page.save_revision().publish()
                         if changed:
@@ -173,12 +178,7 @@ class Command(BaseCommand):
 
     def _get_system_labels(self, index_page, all_systems):
         if all_systems:
-            return list(
-                TransportStation.objects.exclude(system_label="")
-                .values_list("system_label", flat=True)
-                .distinct()
-                .order_by("system_label")
-            )
+            return list(TransportSystem.objects.order_by("label").values_list("label", flat=True))
         return list(index_page.system_filters or [])
 
     def _unique_slug(self, base, taken_slugs):
@@ -0,0 +1,38 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("public_transport", "0016_remove_publictransportlineindexpage"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transportstation",
+            index=models.Index(
+                fields=["system_label", "line_label", "station_label"],
+                name="ts_system_line_station_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transportstation",
+            index=models.Index(
+                fields=["system_label", "station_label"],
+                name="ts_system_station_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transportstation",
+            index=models.Index(
+                fields=["line_qid", "station_label"],
+                name="ts_line_qid_station_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transportstation",
+            index=models.Index(
+                fields=["latitude", "longitude"],
+                name="ts_lat_lng_idx",
+            ),
+        ),
+    ]
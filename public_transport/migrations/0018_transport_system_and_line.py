@@ -0,0 +1,63 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('public_transport', '0017_transportstation_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransportLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(max_length=200)),
+                ('qid', models.CharField(blank=True, max_length=40)),
+            ],
+            options={
+                'ordering': ['label'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TransportSystem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(max_length=200, unique=True)),
+                ('qid', models.CharField(blank=True, max_length=40)),
+            ],
+            options={
+                'ordering': ['label'],
+            },
+        ),
+        migrations.AddField(
+            model_name='publictransportlinepage',
+            name='line',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pages', to='public_transport.transportline'),
+        ),
+        migrations.AddField(
+            model_name='transportstation',
+            name='line',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stations', to='public_transport.transportline'),
+        ),
+        migrations.AddField(
+            model_name='transportline',
+            name='system',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='public_transport.transportsystem'),
+        ),
+        migrations.AddField(
+            model_name='publictransportsystempage',
+            name='system',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pages', to='public_transport.transportsystem'),
+        ),
+        migrations.AddField(
+            model_name='transportstation',
+            name='system',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stations', to='public_transport.transportsystem'),
+        ),
+        migrations.AddConstraint(
+            model_name='transportline',
+            constraint=models.UniqueConstraint(fields=('system', 'label'), name='unique_line_per_system'),
+        ),
+    ]
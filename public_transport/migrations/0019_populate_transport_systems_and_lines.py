@@ -0,0 +1,48 @@
+from django.db import migrations
+
+
+def populate(apps, schema_editor):
+    TransportStation = apps.get_model("public_transport", "TransportStation")
+    TransportSystem = apps.get_model("public_transport", "TransportSystem")
+    TransportLine = apps.get_model("public_transport", "TransportLine")
+    SystemPage = apps.get_model("public_transport", "PublicTransportSystemPage")
+    LinePage = apps.get_model("public_transport", "PublicTransportLinePage")
+
+    systems = {}
+    for label, qid in (
+        TransportStation.objects.exclude(system_label="")
+        .values_list("system_label", "system_qid")
+        .order_by("system_label", "-system_qid")
+    ):
+        if label not in systems:
+            systems[label] = TransportSystem.objects.create(label=label, qid=qid)
+
+    lines = {}
+    for system_label, label, qid in (
+        TransportStation.objects.exclude(system_label="")
+        .exclude(line_label="")
+        .values_list("system_label", "line_label", "line_qid")
+        .order_by("system_label", "line_label", "-line_qid")
+    ):
+        key = (system_label, label)
+        if key not in lines:
+            lines[key] = TransportLine.objects.create(
+                system=systems[system_label], label=label, qid=qid
+            )
+
+    for system_label, system in systems.items():
+        TransportStation.objects.filter(system_label=system_label).update(system=system)
+        SystemPage.objects.filter(system_label=system_label).update(system=system)
+    for (system_label, label), line in lines.items():
+        TransportStation.objects.filter(system_label=system_label, line_label=label).update(line=line)
+        LinePage.objects.filter(system_label=system_label, line_label=label).update(line=line)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("public_transport", "0018_transport_system_and_line"),
+    ]
+
+    operations = [
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('public_transport', '0019_populate_transport_systems_and_lines'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransportStationLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(blank=True, max_length=20)),
+                ('opening', models.DateField(blank=True, null=True)),
+                ('sort_order', models.PositiveSmallIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['sort_order', 'pk'],
+            },
+        ),
+        migrations.RemoveConstraint(
+            model_name='transportstation',
+            name='unique_station_per_line',
+        ),
+        migrations.AddField(
+            model_name='transportstationline',
+            name='line',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='public_transport.transportline'),
+        ),
+        migrations.AddField(
+            model_name='transportstationline',
+            name='station',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='line_memberships', to='public_transport.transportstation'),
+        ),
+        migrations.AddConstraint(
+            model_name='transportstationline',
+            constraint=models.UniqueConstraint(fields=('station', 'line'), name='unique_station_line_membership'),
+        ),
+    ]
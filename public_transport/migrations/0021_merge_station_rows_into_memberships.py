@@ -0,0 +1,138 @@
+import re
+from collections import Counter
+
+from django.db import migrations
+
+# Frozen copy of public_transport.codes as of this migration, so later
+# changes to the app module don't change what it did.
+CODE_SPLIT_RE = re.compile(r"[,;/\s]+")
+CODE_PREFIX_RE = re.compile(r"^\D*")
+
+
+def split_station_codes(value):
+    return [code for code in CODE_SPLIT_RE.split(value or "") if code]
+
+
+def code_prefix(code):
+    return CODE_PREFIX_RE.match(code).group(0)
+
+
+def pick_line_codes(codes_by_key):
+    prefixes = Counter(
+        prefix
+        for codes in codes_by_key.values()
+        for prefix in {code_prefix(code) for code in codes}
+    )
+    return {
+        key: max(codes, key=lambda code: prefixes[code_prefix(code)]) if codes else ""
+        for key, codes in codes_by_key.items()
+    }
+
+
+def merge_station_rows(apps, schema_editor):
+    """
+    Collapse the per-(station, line) rows into one station per QID.
+
+    Every old row becomes a line membership of the lowest-id row for its
+    QID. Station pages are repointed to that row before the rest are deleted.
+    """
+    TransportStation = apps.get_model("public_transport", "TransportStation")
+    TransportStationLine = apps.get_model("public_transport", "TransportStationLine")
+    StationPage = apps.get_model("public_transport", "PublicTransportStationPage")
+
+    keepers = {}
+    duplicates = {}
+    memberships = []
+    seen = set()
+    line_counts = {}
+    for row in TransportStation.objects.order_by("pk").iterator():
+        keeper = keepers.setdefault(row.station_qid or f"pk:{row.pk}", row)
+        if keeper.pk != row.pk:
+            duplicates[row.pk] = keeper.pk
+        if row.line_id and (keeper.pk, row.line_id) not in seen:
+            seen.add((keeper.pk, row.line_id))
+            memberships.append(
+                TransportStationLine(
+                    station_id=keeper.pk,
+                    line_id=row.line_id,
+                    opening=row.opening,
+                    sort_order=line_counts.get(keeper.pk, 0),
+                )
+            )
+            line_counts[keeper.pk] = line_counts.get(keeper.pk, 0) + 1
+    TransportStationLine.objects.bulk_create(memberships, batch_size=500)
+
+    for duplicate_id, keeper_id in duplicates.items():
+        StationPage.objects.filter(station_id=duplicate_id).update(station_id=keeper_id)
+    TransportStation.objects.filter(pk__in=list(duplicates)).delete()
+
+    members_by_line = {}
+    for membership in TransportStationLine.objects.select_related("station"):
+        members_by_line.setdefault(membership.line_id, []).append(membership)
+    changed = []
+    for members in members_by_line.values():
+        codes = pick_line_codes(
+            {member.pk: split_station_codes(member.station.station_codes) for member in members}
+        )
+        for member in members:
+            member.code = codes[member.pk]
+            changed.append(member)
+    TransportStationLine.objects.bulk_update(changed, ["code"], batch_size=500)
+
+
+def split_station_rows(apps, schema_editor):
+    """
+    Turn memberships back into one station row per (station, line).
+
+    A station keeps its own row for its line (or its first membership's
+    line if it has none) and gets a copy, with that line's labels and
+    opening date, for each other membership. The memberships are then
+    deleted, as they were only created here. Station pages stay on the kept
+    row, which is where they all pointed after the merge.
+    """
+    TransportStation = apps.get_model("public_transport", "TransportStation")
+    TransportStationLine = apps.get_model("public_transport", "TransportStationLine")
+
+    members_by_station = {}
+    memberships = TransportStationLine.objects.select_related("line__system").order_by(
+        "sort_order", "pk"
+    )
+    for membership in memberships.iterator():
+        members_by_station.setdefault(membership.station_id, []).append(membership)
+
+    # Copied field by field: copy.copy() would unpickle as the current model.
+    copied_fields = [
+        field.attname for field in TransportStation._meta.concrete_fields if not field.primary_key
+    ]
+    for station in TransportStation.objects.filter(pk__in=members_by_station).iterator():
+        members = members_by_station[station.pk]
+        kept_line_id = station.line_id or members[0].line_id
+        for membership in members:
+            if membership.line_id != kept_line_id:
+                row = TransportStation(
+                    **{name: getattr(station, name) for name in copied_fields}
+                )
+            elif station.line_id is None:
+                row = station
+            else:
+                continue
+            line = membership.line
+            row.line_id = line.pk
+            row.line_label = line.label
+            row.line_qid = line.qid
+            row.system_id = line.system_id
+            row.system_label = line.system.label
+            row.system_qid = line.system.qid
+            row.opening = membership.opening
+            row.save()
+    TransportStationLine.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("public_transport", "0020_transportstationline"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_station_rows, split_station_rows),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("public_transport", "0021_merge_station_rows_into_memberships"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="transportstation",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("station_qid", ""), _negated=True),
+                fields=("station_qid",),
+                name="unique_station_qid",
+            ),
+        ),
+    ]
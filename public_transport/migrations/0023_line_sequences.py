@@ -0,0 +1,41 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("public_transport", "0022_transportstation_unique_station_qid"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transportline",
+            name="adjacency",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name="transportstationline",
+            name="sequence",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="transportstationline",
+            name="source_sequence",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="publictransportlinepage",
+            name="station_sort",
+            field=models.CharField(
+                choices=[
+                    ("station_label", "Station name (A-Z)"),
+                    ("-station_label", "Station name (Z-A)"),
+                    ("opening", "Opening date (oldest first)"),
+                    ("-opening", "Opening date (newest first)"),
+                    ("station_codes", "Station code (A-Z)"),
+                    ("sequence", "Line order"),
+                ],
+                default="station_label",
+                max_length=40,
+            ),
+        ),
+    ]
@@ -0,0 +1,171 @@
+import math
+import re
+from collections import Counter
+from typing import NamedTuple
+
+from django.db import migrations
+
+# Frozen copy of public_transport.sequence (and core.geo.haversine_km) as of
+# this migration, so later changes to the app modules don't change what it
+# did. See public_transport.sequence for how the order is derived.
+NUMBERED_CODE_RE = re.compile(r"^(\D+)(\d+)$")
+MAIN_PREFIX_SHARE = 0.2
+EARTH_RADIUS_KM = 6371.0088
+
+
+class Stop(NamedTuple):
+    key: int
+    code: str
+    latitude: float | None = None
+    longitude: float | None = None
+    source_sequence: int | None = None
+
+
+def parse_code(code):
+    match = NUMBERED_CODE_RE.match(code or "")
+    if not match:
+        return None
+    return match.group(1), int(match.group(2))
+
+
+def _distance(first, second):
+    phi1 = math.radians(first.latitude)
+    phi2 = math.radians(second.latitude)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(second.longitude - first.longitude)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _anchor_order(stops):
+    supplied = [stop for stop in stops if stop.source_sequence is not None]
+    if supplied:
+        return sorted(supplied, key=lambda stop: (stop.source_sequence, stop.key))
+
+    parsed = {stop.key: parse_code(stop.code) for stop in stops}
+    counts = Counter(value[0] for value in parsed.values() if value)
+    threshold = max(2, MAIN_PREFIX_SHARE * len(stops))
+    prefixes = sorted(prefix for prefix, count in counts.items() if count >= threshold)
+
+    order = []
+    seen_numbers = set()
+    for position, prefix in enumerate(prefixes):
+        branch = sorted(
+            (stop for stop in stops if parsed[stop.key] and parsed[stop.key][0] == prefix),
+            key=lambda stop: (parsed[stop.key][1], stop.key),
+            reverse=position == 0 and len(prefixes) > 1,
+        )
+        for stop in branch:
+            number = (prefix, parsed[stop.key][1])
+            if number in seen_numbers:
+                continue
+            seen_numbers.add(number)
+            order.append(stop)
+    return order
+
+
+def _insert_by_distance(order, stop):
+    if not order:
+        order.append(stop)
+        return
+    best_index = 0
+    best_cost = _distance(stop, order[0])
+    end_cost = _distance(order[-1], stop)
+    if end_cost < best_cost:
+        best_index, best_cost = len(order), end_cost
+    for index in range(1, len(order)):
+        before, after = order[index - 1], order[index]
+        cost = _distance(before, stop) + _distance(stop, after) - _distance(before, after)
+        if cost < best_cost:
+            best_index, best_cost = index, cost
+    order.insert(best_index, stop)
+
+
+def order_stops(stops):
+    anchors = _anchor_order(stops)
+    anchor_keys = {stop.key for stop in anchors}
+    located = [stop for stop in anchors if stop.latitude is not None and stop.longitude is not None]
+    unlocated = [stop for stop in anchors if stop not in located]
+
+    rest = [stop for stop in stops if stop.key not in anchor_keys]
+    if not located and len(rest) > 1:
+        candidates = [stop for stop in rest if stop.latitude is not None and stop.longitude is not None]
+        if candidates:
+            start = max(
+                candidates,
+                key=lambda stop: max(_distance(stop, other) for other in candidates),
+            )
+            located = [start]
+            rest.remove(start)
+
+    order = list(located)
+    for stop in sorted(rest, key=lambda stop: (stop.code, stop.key)):
+        if stop.latitude is None or stop.longitude is None:
+            unlocated.append(stop)
+        else:
+            _insert_by_distance(order, stop)
+    return order + unlocated
+
+
+def adjacency(ordered):
+    result = {}
+    for index, stop in enumerate(ordered):
+        previous = ordered[index - 1].key if index > 0 else None
+        following = ordered[index + 1].key if index + 1 < len(ordered) else None
+        result[str(stop.key)] = [previous, following]
+    return result
+
+
+def _coordinate(value):
+    return float(value) if value is not None else None
+
+
+def populate_line_sequences(apps, schema_editor):
+    """Derive stop sequences and adjacency for every line from its station codes."""
+    TransportLine = apps.get_model("public_transport", "TransportLine")
+    TransportStationLine = apps.get_model("public_transport", "TransportStationLine")
+
+    members_by_line = {}
+    for membership in TransportStationLine.objects.select_related("station").iterator():
+        members_by_line.setdefault(membership.line_id, {})[membership.station_id] = membership
+
+    changed = []
+    lines = []
+    for line in TransportLine.objects.filter(pk__in=members_by_line):
+        members = members_by_line[line.pk]
+        ordered = order_stops(
+            [
+                Stop(
+                    key=station_id,
+                    code=member.code,
+                    latitude=_coordinate(member.station.latitude),
+                    longitude=_coordinate(member.station.longitude),
+                    source_sequence=member.source_sequence,
+                )
+                for station_id, member in members.items()
+            ]
+        )
+        for sequence, stop in enumerate(ordered, start=1):
+            members[stop.key].sequence = sequence
+            changed.append(members[stop.key])
+        line.adjacency = adjacency(ordered)
+        lines.append(line)
+    TransportStationLine.objects.bulk_update(changed, ["sequence"], batch_size=500)
+    TransportLine.objects.bulk_update(lines, ["adjacency"], batch_size=500)
+
+
+def clear_line_sequences(apps, schema_editor):
+    TransportLine = apps.get_model("public_transport", "TransportLine")
+    TransportStationLine = apps.get_model("public_transport", "TransportStationLine")
+    TransportStationLine.objects.update(sequence=None)
+    TransportLine.objects.update(adjacency={})
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("public_transport", "0023_line_sequences"),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_line_sequences, clear_line_sequences),
+    ]
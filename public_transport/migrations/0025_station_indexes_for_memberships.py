@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # The label indexes from 0017 served line and system pages before they
+    # moved to TransportStationLine (stations_on_line/stations_on_system).
+    dependencies = [
+        ("public_transport", "0024_populate_line_sequences"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="transportstation",
+            name="ts_system_line_station_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="transportstation",
+            name="ts_system_station_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="transportstation",
+            name="ts_line_qid_station_idx",
+        ),
+        migrations.AddIndex(
+            model_name="transportstationline",
+            index=models.Index(fields=["line", "sequence"], name="tsl_line_sequence_idx"),
+        ),
+    ]
@@ -4,6 +4,7 @@ from django.core.validators import MaxValueValidator, MinValueValidator
 from django.core.exceptions import ValidationError
 from django.http import Http404
 from django.db import models
+from django.db.models import FilteredRelation
 from wagtail.admin.forms import WagtailAdminPageForm
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel
 from wagtail.fields import RichTextField
@@ -11,7 +12,10 @@ from wagtail.models import Page
 from wagtail.search import index
 from wagtail.url_routing import RouteResult
 
+from public_transport.codes import pick_line_codes, split_station_codes
 from public_transport.panels import ParentLinePanel
+from public_transport.sequence import Stop, adjacency, order_stops
+from search.thai import search_variants
 from django.utils.text import slugify
 
 class PublicTransportIndexPageForm(WagtailAdminPageForm):
@@ -22,13 +26,8 @@ class PublicTransportIndexPageForm(WagtailAdminPageForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        TransportStation = apps.get_model("public_transport", "TransportStation")
-        systems = (
-            TransportStation.objects.exclude(system_label="")
-            .values_list("system_label", flat=True)
-            .distinct()
-            .order_by("system_label")
-        )
+        TransportSystem = apps.get_model("public_transport", "TransportSystem")
+        systems = TransportSystem.objects.order_by("label").values_list("label", flat=True)
         self.fields["system_filters"].choices = [(s, s) for s in systems]
         if self.instance and self.instance.system_filters:
             self.fields["system_filters"].initial = self.instance.system_filters
@@ -53,14 +52,20 @@ class PublicTransportStationPageForm(WagtailAdminPageForm):
             if getattr(parent, "title", None) and "parent_line_display" in self.fields:
                 self.fields["parent_line_display"].initial = parent.title
                 self.instance.parent_line_display = parent.title
+            line_id = getattr(parent, "line_id", None)
+            system_id = getattr(parent, "system_id", None)
             line_label = getattr(parent, "line_label", None)
             line_qid = getattr(parent, "line_qid", None)
             system_label = getattr(parent, "system_label", None)
-            if line_qid:
+            if line_id:
+                queryset = queryset.filter(line_memberships__line_id=line_id)
+            elif system_id:
+                queryset = stations_on_system(system_id)
+            elif line_qid:
                 queryset = queryset.filter(line_qid=line_qid)
             elif line_label:
                 queryset = queryset.filter(line_label=line_label)
-            if system_label:
+            if system_label and not (line_id or system_id):
                 queryset = queryset.filter(system_label=system_label)
         if "station" in self.fields:
             self.fields["station"] = forms.ModelChoiceField(
@@ -95,6 +100,13 @@ class PublicTransportIndexPage(Page):
 
 class PublicTransportSystemPage(Page):
     intro = RichTextField(blank=True)
+    system = models.ForeignKey(
+        "public_transport.TransportSystem",
+        on_delete=models.SET_NULL,
+        related_name="pages",
+        blank=True,
+        null=True,
+    )
     system_label = models.CharField(max_length=200)
     system_qid = models.CharField(max_length=40, blank=True)
     show_stations = models.BooleanField(
@@ -118,6 +130,7 @@ class PublicTransportSystemPage(Page):
         FieldPanel("intro"),
         MultiFieldPanel(
             [
+                FieldPanel("system"),
                 FieldPanel("system_label"),
                 FieldPanel("system_qid"),
                 FieldPanel("show_stations"),
@@ -141,9 +154,11 @@ class PublicTransportSystemPage(Page):
         )
         if self.show_stations:
             sort_key = self.station_sort or "station_label"
-            stations = TransportStation.objects.filter(
-                system_label=self.system_label
-            ).order_by(sort_key)
+            if self.system_id:
+                stations = stations_on_system(self.system_id)
+            else:
+                stations = TransportStation.objects.filter(system_label=self.system_label)
+            stations = stations.order_by(sort_key)
             context["station_cards"] = build_station_cards(stations, parent_page=self)
         return context
 
@@ -169,6 +184,13 @@ class PublicTransportSystemPage(Page):
 
 class PublicTransportLinePage(Page):
     intro = RichTextField(blank=True)
+    line = models.ForeignKey(
+        "public_transport.TransportLine",
+        on_delete=models.SET_NULL,
+        related_name="pages",
+        blank=True,
+        null=True,
+    )
     line_label = models.CharField(max_length=200)
     line_qid = models.CharField(max_length=40, blank=True)
     system_label = models.CharField(max_length=200, blank=True)
@@ -181,6 +203,7 @@ class PublicTransportLinePage(Page):
             ("opening", "Opening date (oldest first)"),
             ("-opening", "Opening date (newest first)"),
             ("station_codes", "Station code (A-Z)"),
+            ("sequence", "Line order"),
         ],
     )
 
@@ -188,6 +211,7 @@ class PublicTransportLinePage(Page):
         FieldPanel("intro"),
         MultiFieldPanel(
             [
+                FieldPanel("line"),
                 FieldPanel("line_label"),
                 FieldPanel("line_qid"),
                 FieldPanel("system_label"),
@@ -201,10 +225,18 @@ class PublicTransportLinePage(Page):
 
     def get_context(self, request, *args, **kwargs):
         context = super().get_context(request, *args, **kwargs)
-        stations = TransportStation.objects.filter(
-            system_label=self.system_label,
-            line_label=self.line_label,
-        ).order_by(self.station_sort or "station_label")
+        sort_key = self.station_sort or "station_label"
+        if self.line_id:
+            stations = stations_on_line(self.line_id, sort_key)
+        else:
+            # Line order lives on the memberships of a line row; without one
+            # there is none to follow.
+            if sort_key == "sequence":
+                sort_key = "station_label"
+            stations = TransportStation.objects.filter(
+                system_label=self.system_label,
+                line_label=self.line_label,
+            ).order_by(sort_key)
         context["station_cards"] = build_station_cards(stations, parent_page=self)
         return context
 
@@ -238,6 +270,9 @@ class PublicTransportStationPage(Page):
     def get_context(self, request, *args, **kwargs):
         context = super().get_context(request, *args, **kwargs)
         context["station"] = self.station
+        context["station_lines"] = (
+            self.station.line_memberships.select_related("line__system") if self.station else []
+        )
         parent = self.get_parent()
         parent_specific = parent.specific if parent else None  # type: ignore[attr-defined]
         context["parent_line"] = (
@@ -246,6 +281,9 @@ class PublicTransportStationPage(Page):
         context["parent_system"] = (
             parent_specific if isinstance(parent_specific, PublicTransportSystemPage) else None
         )
+        context["previous_station_page"], context["next_station_page"] = self.get_neighbour_pages(
+            context["parent_line"]
+        )
         station_map_points = []
         if self.station and self.station.latitude and self.station.longitude:
             subtitle_parts = [self.station.system_label, self.station.line_label]
@@ -261,6 +299,22 @@ class PublicTransportStationPage(Page):
         context["station_map_points"] = station_map_points
         return context
 
+    def get_neighbour_pages(self, line_page):
+        """Return the live sibling pages of the previous and next stops on the line."""
+        if line_page is None or not line_page.line_id or not self.station_id:
+            return None, None
+        previous_id, next_id = line_page.line.neighbours(self.station_id)
+        neighbour_ids = [station_id for station_id in (previous_id, next_id) if station_id]
+        if not neighbour_ids:
+            return None, None
+        pages = {
+            page.station_id: page
+            for page in PublicTransportStationPage.objects.child_of(line_page)
+            .live()
+            .filter(station_id__in=neighbour_ids)
+        }
+        return pages.get(previous_id), pages.get(next_id)
+
     def clean(self):
         super().clean()
         parent = self.get_parent()
@@ -283,11 +337,168 @@ class PublicTransportStationPage(Page):
                     self.slug = slugify(self.title) or self.slug
 
 
+class TransportSystem(models.Model):
+    label = models.CharField(max_length=200, unique=True)
+    qid = models.CharField(max_length=40, blank=True)
+
+    panels = [
+        FieldPanel("label"),
+        FieldPanel("qid"),
+    ]
+
+    class Meta:
+        ordering = ["label"]
+
+    def __str__(self):
+        return self.label
+
+    @classmethod
+    def resolve(cls, label, qid="", cache=None):
+        """Return the system for ``label``, creating it or filling in its QID as needed."""
+        if not label:
+            return None
+        system = cache.get(label) if cache is not None else None
+        if system is None:
+            system, _ = cls.objects.get_or_create(label=label, defaults={"qid": qid or ""})
+        if qid and system.qid != qid:
+            system.qid = qid
+            system.save(update_fields=["qid"])
+        if cache is not None:
+            cache[label] = system
+        return system
+
+
+class TransportLine(models.Model):
+    system = models.ForeignKey(
+        TransportSystem,
+        on_delete=models.CASCADE,
+        related_name="lines",
+    )
+    label = models.CharField(max_length=200)
+    qid = models.CharField(max_length=40, blank=True)
+    # Station id (as a string) -> [previous station id, next station id],
+    # rebuilt by ``refresh_sequence``.
+    adjacency = models.JSONField(default=dict, blank=True, editable=False)
+
+    panels = [
+        FieldPanel("system"),
+        FieldPanel("label"),
+        FieldPanel("qid"),
+    ]
+
+    class Meta:
+        ordering = ["label"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["system", "label"],
+                name="unique_line_per_system",
+            ),
+        ]
+
+    def __str__(self):
+        return self.label
+
+    def refresh_member_codes(self):
+        """Recompute each member's line code from its station's codes."""
+        memberships = list(self.memberships.select_related("station"))
+        codes = pick_line_codes(
+            {
+                membership.pk: split_station_codes(membership.station.station_codes)
+                for membership in memberships
+            }
+        )
+        changed = []
+        for membership in memberships:
+            if membership.code != codes[membership.pk]:
+                membership.code = codes[membership.pk]
+                changed.append(membership)
+        TransportStationLine.objects.bulk_update(changed, ["code"])
+        return len(changed)
+
+    def refresh_sequence(self):
+        """Number the line's stops in order and rebuild ``adjacency``."""
+        memberships = {
+            membership.station_id: membership
+            for membership in self.memberships.select_related("station")
+        }
+        ordered = order_stops(
+            [
+                Stop(
+                    key=station_id,
+                    code=membership.code,
+                    latitude=float(membership.station.latitude)
+                    if membership.station.latitude is not None
+                    else None,
+                    longitude=float(membership.station.longitude)
+                    if membership.station.longitude is not None
+                    else None,
+                    source_sequence=membership.source_sequence,
+                )
+                for station_id, membership in memberships.items()
+            ]
+        )
+        changed = []
+        for sequence, stop in enumerate(ordered, start=1):
+            membership = memberships[stop.key]
+            if membership.sequence != sequence:
+                membership.sequence = sequence
+                changed.append(membership)
+        TransportStationLine.objects.bulk_update(changed, ["sequence"])
+        self.adjacency = adjacency(ordered)
+        self.save(update_fields=["adjacency"])
+
+    def neighbours(self, station_id):
+        """Return ``(previous_id, next_id)`` for a station on this line."""
+        previous, following = self.adjacency.get(str(station_id), [None, None])
+        return previous, following
+
+    @classmethod
+    def resolve(cls, system, label, qid="", cache=None):
+        """Return the line ``label`` of ``system``, creating it or filling in its QID as needed."""
+        if system is None or not label:
+            return None
+        key = (system.pk, label)
+        line = cache.get(key) if cache is not None else None
+        if line is None:
+            line, _ = cls.objects.get_or_create(
+                system=system, label=label, defaults={"qid": qid or ""}
+            )
+        if qid and line.qid != qid:
+            line.qid = qid
+            line.save(update_fields=["qid"])
+        if cache is not None:
+            cache[key] = line
+        return line
+
+
+# The label fields ``sync_network_references`` resolves, and what decides
+# whether it needs to.
+NETWORK_LABEL_FIELDS = {"system_label", "line_label"}
+NETWORK_STATE_FIELDS = ("system_id", "system_label", "line_id", "line_label")
+
+
 class TransportStation(index.Indexed, models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     station_label = models.CharField(max_length=200)
     station_qid = models.CharField(max_length=40, blank=True)
+    system = models.ForeignKey(
+        TransportSystem,
+        on_delete=models.SET_NULL,
+        related_name="stations",
+        blank=True,
+        null=True,
+    )
+    line = models.ForeignKey(
+        TransportLine,
+        on_delete=models.SET_NULL,
+        related_name="stations",
+        blank=True,
+        null=True,
+    )
+    # Denormalized copies of the system/line fields, kept for existing
+    # filters, search fields and templates. For stations on several lines
+    # they describe the first line; see ``line_memberships`` for all of them.
     system_label = models.CharField(max_length=200, blank=True)
     system_qid = models.CharField(max_length=40, blank=True)
     line_label = models.CharField(max_length=200, blank=True)
@@ -343,16 +554,24 @@ class TransportStation(index.Indexed, models.Model):
         index.SearchField("station_label", partial_match=True),
         index.SearchField("system_label", partial_match=True),
         index.SearchField("line_label", partial_match=True),
+        index.SearchField("station_codes", partial_match=True),
+        index.SearchField("search_variants"),
         index.FilterField("station_qid"),
         index.FilterField("line_qid"),
     ]
 
     class Meta:
         ordering = ["station_label", "line_label"]
+        # Line and system pages go through TransportStationLine; stations
+        # themselves are only searched by coordinate bounding boxes.
+        indexes = [
+            models.Index(fields=["latitude", "longitude"], name="ts_lat_lng_idx"),
+        ]
         constraints = [
             models.UniqueConstraint(
-                fields=["station_qid", "line_qid"],
-                name="unique_station_per_line",
+                fields=["station_qid"],
+                condition=~models.Q(station_qid=""),
+                name="unique_station_qid",
             ),
         ]
 
@@ -362,6 +581,121 @@ class TransportStation(index.Indexed, models.Model):
             return f"{label} ({self.line_label})"
         return label
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_network = instance._network_state()
+        return instance
+
+    def _network_state(self):
+        # From __dict__, so a deferred label is never fetched here.
+        return tuple(self.__dict__.get(name) for name in NETWORK_STATE_FIELDS)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or NETWORK_LABEL_FIELDS.intersection(update_fields):
+            # Resolving costs a query or two; most saves (coordinates, codes,
+            # opening dates) leave the references as they were loaded.
+            unchanged = (
+                self.system_id is not None
+                and self.line_id is not None
+                and getattr(self, "_loaded_network", None) == self._network_state()
+            )
+            if not unchanged:
+                self.sync_network_references()
+                if update_fields is not None:
+                    kwargs["update_fields"] = {*update_fields, "system", "line"}
+        super().save(*args, **kwargs)
+        self._loaded_network = self._network_state()
+
+    def sync_network_references(self, cache=None):
+        """Point ``system``/``line`` at the rows matching the label fields."""
+        if self.system_id is None or self.system.label != self.system_label:
+            self.system = TransportSystem.resolve(self.system_label, self.system_qid, cache)
+        if self.line_id is None or self.line.label != self.line_label or self.line.system_id != self.system_id:
+            self.line = TransportLine.resolve(self.system, self.line_label, self.line_qid, cache)
+
+    def search_variants(self):
+        return search_variants(self.station_label, self.station_codes)
+
+
+class TransportStationLine(models.Model):
+    """A station's membership of one line; a station has one row per line it serves."""
+
+    station = models.ForeignKey(
+        TransportStation,
+        on_delete=models.CASCADE,
+        related_name="line_memberships",
+    )
+    line = models.ForeignKey(
+        TransportLine,
+        on_delete=models.CASCADE,
+        related_name="memberships",
+    )
+    code = models.CharField(max_length=20, blank=True)
+    opening = models.DateField(blank=True, null=True)
+    sort_order = models.PositiveSmallIntegerField(default=0)
+    # Stop number along the line. ``source_sequence`` comes from the import
+    # when it has one; ``sequence`` is derived by TransportLine.refresh_sequence.
+    source_sequence = models.PositiveIntegerField(blank=True, null=True)
+    sequence = models.PositiveIntegerField(blank=True, null=True, editable=False)
+
+    panels = [
+        FieldPanel("station"),
+        FieldPanel("line"),
+        FieldPanel("code"),
+        FieldPanel("opening"),
+        FieldPanel("sort_order"),
+        FieldPanel("source_sequence"),
+    ]
+
+    class Meta:
+        ordering = ["sort_order", "pk"]
+        # stations_on_line: a line's memberships, in line order when sorted
+        # by sequence.
+        indexes = [
+            models.Index(fields=["line", "sequence"], name="tsl_line_sequence_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["station", "line"],
+                name="unique_station_line_membership",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.station.station_label} ({self.line.label})"
+
+
+def stations_on_system(system_id):
+    memberships = TransportStationLine.objects.filter(
+        station=models.OuterRef("pk"), line__system_id=system_id
+    )
+    return TransportStation.objects.filter(models.Exists(memberships))
+
+
+def stations_on_line(line_id, sort_key="station_label"):
+    """Stations of a line annotated with their per-line code, opening date and sequence."""
+    stations = (
+        TransportStation.objects.annotate(
+            membership=FilteredRelation(
+                "line_memberships", condition=models.Q(line_memberships__line_id=line_id)
+            ),
+            line_code=models.F("membership__code"),
+            line_opening=models.F("membership__opening"),
+            line_sequence=models.F("membership__sequence"),
+        )
+        .filter(membership__isnull=False)
+    )
+    descending = sort_key.startswith("-")
+    field = sort_key.lstrip("-")
+    field = {
+        "station_codes": "line_code",
+        "opening": "line_opening",
+        "sequence": "line_sequence",
+    }.get(field, field)
+    return stations.order_by(f"-{field}" if descending else field)
+
 
 def build_station_cards(stations, parent_page=None):
     pages = PublicTransportStationPage.objects.filter(
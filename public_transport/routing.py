@@ -0,0 +1,317 @@
+"""
+Shortest routes over the rail network.
+
+``TransitGraph`` holds the whole network in memory: a node per (station,
+line) membership, ride edges between neighbouring stops of a line (from
+``TransportLine.adjacency``), interchange edges between the lines of one
+station and walking transfers between stations close to each other. It is
+built with three queries, cached per process and rebuilt when the graph
+version moves, which happens after any station, line or membership change
+commits. The version is shared by every process (``core.versions``), so a
+change made by another worker or a management command is picked up too. A
+route query is an A* search over that structure and touches the database
+only for the version check.
+
+Costs are minutes. The heuristic is the straight-line distance at train
+speed, which never overestimates because walking is slower and every ride
+edge is at least as long as the straight line between its stops.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from core.geo import bounding_box, haversine_km
+from core.versions import bump_version, get_version
+
+GRAPH_VERSION_KEY = "transit:graph-version"
+
+TRAIN_SPEED_KMH = 35.0
+WALK_SPEED_KMH = 4.5
+# Time spent at each intermediate stop.
+DWELL_MINUTES = 0.5
+# Added on top of the walk whenever a route changes line.
+INTERCHANGE_MINUTES = 5.0
+# Stations this close are linked by a walking transfer (e.g. BTS Asok and
+# MRT Sukhumvit, which are separate stations in the data).
+TRANSFER_RADIUS_KM = 0.4
+# How far a rider will walk to the first station and from the last one, and
+# the most a request may ask for (the walk radius sizes the grid scan).
+MAX_WALK_KM = 1.5
+MAX_WALK_KM_LIMIT = 5.0
+GRID_CELL_DEGREES = 0.01
+
+ORIGIN = ("origin", None)
+DESTINATION = ("destination", None)
+
+
+def walk_minutes(distance_km: float) -> float:
+    return distance_km / WALK_SPEED_KMH * 60
+
+
+def ride_minutes(distance_km: float) -> float:
+    return distance_km / TRAIN_SPEED_KMH * 60
+
+
+@dataclass(frozen=True)
+class Station:
+    id: int
+    label: str
+    codes: str
+    latitude: float
+    longitude: float
+
+
+@dataclass(frozen=True)
+class Line:
+    id: int
+    label: str
+    system: str
+
+
+@dataclass
+class Leg:
+    kind: str  # "walk", "ride" or "transfer"
+    minutes: float
+    distance_km: float
+    stations: list[Station] = field(default_factory=list)
+    line: Line | None = None
+
+
+@dataclass
+class Route:
+    minutes: float
+    legs: list[Leg]
+
+
+@dataclass
+class TransitGraph:
+    stations: dict[int, Station] = field(default_factory=dict)
+    lines: dict[int, Line] = field(default_factory=dict)
+    # station id -> line ids serving it
+    station_lines: dict[int, list[int]] = field(default_factory=lambda: defaultdict(list))
+    # (station id, line id) -> [(neighbour node, minutes, distance km)]
+    edges: dict[tuple, list] = field(default_factory=lambda: defaultdict(list))
+    grid: dict[tuple[int, int], list[int]] = field(default_factory=lambda: defaultdict(list))
+
+    @classmethod
+    def build(cls) -> TransitGraph:
+        from public_transport.models import TransportLine, TransportStation, TransportStationLine
+
+        graph = cls()
+        rows = TransportStation.objects.filter(
+            latitude__isnull=False, longitude__isnull=False
+        ).values_list("id", "station_label", "station_codes", "latitude", "longitude")
+        for station_id, label, codes, latitude, longitude in rows:
+            station = Station(station_id, label, codes, float(latitude), float(longitude))
+            graph.stations[station_id] = station
+            graph.grid[graph._cell(station.latitude, station.longitude)].append(station_id)
+
+        for station_id, line_id in TransportStationLine.objects.filter(
+            station_id__in=graph.stations
+        ).values_list("station_id", "line_id"):
+            graph.station_lines[station_id].append(line_id)
+
+        for line_id, label, system, adjacency in TransportLine.objects.values_list(
+            "id", "label", "system__label", "adjacency"
+        ):
+            graph.lines[line_id] = Line(line_id, label, system or "")
+            for key, (_, following) in adjacency.items():
+                graph._add_ride(int(key), following, line_id)
+
+        graph._add_interchanges()
+        return graph
+
+    def _cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        return (
+            math.floor(latitude / GRID_CELL_DEGREES),
+            math.floor(longitude / GRID_CELL_DEGREES),
+        )
+
+    def _add_ride(self, station_id: int, following: int | None, line_id: int) -> None:
+        first = self.stations.get(station_id)
+        second = self.stations.get(following) if following else None
+        if first is None or second is None:
+            return
+        distance = haversine_km(first.latitude, first.longitude, second.latitude, second.longitude)
+        minutes = ride_minutes(distance) + DWELL_MINUTES
+        self.edges[(station_id, line_id)].append(((following, line_id), minutes, distance))
+        self.edges[(following, line_id)].append(((station_id, line_id), minutes, distance))
+
+    def _add_interchanges(self) -> None:
+        for station_id, line_ids in self.station_lines.items():
+            for line_id, other_line_id in itertools.permutations(line_ids, 2):
+                self.edges[(station_id, line_id)].append(
+                    ((station_id, other_line_id), INTERCHANGE_MINUTES, 0.0)
+                )
+            station = self.stations[station_id]
+            for other_id, distance in self.nearby(
+                station.latitude, station.longitude, TRANSFER_RADIUS_KM
+            ):
+                if other_id == station_id:
+                    continue
+                minutes = walk_minutes(distance) + INTERCHANGE_MINUTES
+                for line_id in line_ids:
+                    for other_line_id in self.station_lines.get(other_id, ()):
+                        self.edges[(station_id, line_id)].append(
+                            ((other_id, other_line_id), minutes, distance)
+                        )
+
+    def nearby(self, latitude: float, longitude: float, radius_km: float) -> list[tuple[int, float]]:
+        """Return ``(station id, distance km)`` for stations within the radius."""
+        min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_km)
+        low = self._cell(min_lat, min_lng)
+        high = self._cell(max_lat, max_lng)
+        found = []
+        for row in range(low[0], high[0] + 1):
+            for column in range(low[1], high[1] + 1):
+                for station_id in self.grid.get((row, column), ()):
+                    station = self.stations[station_id]
+                    distance = haversine_km(latitude, longitude, station.latitude, station.longitude)
+                    if distance <= radius_km:
+                        found.append((station_id, distance))
+        return found
+
+    def route(
+        self,
+        origin: tuple[float, float],
+        destination: tuple[float, float],
+        max_walk_km: float = MAX_WALK_KM,
+    ) -> Route | None:
+        """
+        Fastest route between two points, or ``None`` if the network can't
+        connect them within ``max_walk_km`` at each end. Walking the whole
+        way is returned when it is quicker than any ride.
+        """
+        dest_lat, dest_lng = destination
+        egress = {
+            station_id: distance
+            for station_id, distance in self.nearby(dest_lat, dest_lng, max_walk_km)
+            if station_id in self.station_lines
+        }
+        direct_km = haversine_km(*origin, *destination)
+
+        def heuristic(node):
+            station = self.stations[node[0]]
+            return ride_minutes(
+                haversine_km(station.latitude, station.longitude, dest_lat, dest_lng)
+            )
+
+        best = {ORIGIN: 0.0}
+        previous = {}
+        counter = itertools.count()
+        queue = []
+
+        def relax(node, cost, came_from, distance):
+            if cost < best.get(node, math.inf):
+                best[node] = cost
+                previous[node] = (came_from, distance)
+                estimate = 0.0 if node == DESTINATION else heuristic(node)
+                heapq.heappush(queue, (cost + estimate, next(counter), cost, node))
+
+        if direct_km <= max_walk_km:
+            relax(DESTINATION, walk_minutes(direct_km), ORIGIN, direct_km)
+        for station_id, distance in self.nearby(*origin, max_walk_km):
+            for line_id in self.station_lines.get(station_id, ()):
+                relax((station_id, line_id), walk_minutes(distance), ORIGIN, distance)
+
+        while queue:
+            _, _, cost, node = heapq.heappop(queue)
+            if cost > best.get(node, math.inf):
+                continue
+            if node == DESTINATION:
+                return Route(minutes=cost, legs=self._legs(previous))
+            for neighbour, minutes, distance in self.edges.get(node, ()):
+                relax(neighbour, cost + minutes, node, distance)
+            if node[0] in egress:
+                distance = egress[node[0]]
+                relax(DESTINATION, cost + walk_minutes(distance), node, distance)
+        return None
+
+    def _legs(self, previous) -> list[Leg]:
+        steps = []
+        node = DESTINATION
+        while node != ORIGIN:
+            came_from, distance = previous[node]
+            steps.append((came_from, node, distance))
+            node = came_from
+        steps.reverse()
+
+        legs: list[Leg] = []
+        for came_from, node, distance in steps:
+            if came_from == ORIGIN or node == DESTINATION:
+                kind = "walk"
+            elif came_from[1] == node[1]:
+                kind = "ride"
+            else:
+                kind = "transfer"
+            stations = [
+                self.stations[point[0]] for point in (came_from, node) if point[1] is not None
+            ]
+            if kind == "walk":
+                minutes = walk_minutes(distance)
+            elif kind == "ride":
+                minutes = ride_minutes(distance) + DWELL_MINUTES
+            else:
+                minutes = walk_minutes(distance) + INTERCHANGE_MINUTES
+            if kind == "ride" and legs and legs[-1].kind == "ride" and legs[-1].line.id == node[1]:
+                legs[-1].minutes += minutes
+                legs[-1].distance_km += distance
+                legs[-1].stations.append(stations[-1])
+                continue
+            legs.append(
+                Leg(
+                    kind=kind,
+                    minutes=minutes,
+                    distance_km=distance,
+                    stations=stations,
+                    line=self.lines.get(node[1]) if kind == "ride" else None,
+                )
+            )
+        return legs
+
+
+_lock = threading.Lock()
+_graph: tuple[int, TransitGraph] | None = None
+
+
+def get_graph_version() -> int:
+    return get_version(GRAPH_VERSION_KEY)
+
+
+def bump_graph_version() -> int:
+    return bump_version(GRAPH_VERSION_KEY)
+
+
+def get_transit_graph() -> TransitGraph:
+    global _graph
+    version = get_graph_version()
+    cached = _graph
+    if cached and cached[0] == version:
+        return cached[1]
+    with _lock:
+        if _graph and _graph[0] == version:
+            return _graph[1]
+        graph = TransitGraph.build()
+        _graph = (version, graph)
+    return graph
+
+
+def _bump_after_commit(**kwargs):
+    transaction.on_commit(bump_graph_version)
+
+
+def register_signal_handlers():
+    from public_transport.models import TransportLine, TransportStation, TransportStationLine
+
+    for model in (TransportStation, TransportLine, TransportStationLine):
+        post_save.connect(_bump_after_commit, sender=model)
+        post_delete.connect(_bump_after_commit, sender=model)
@@ -0,0 +1,129 @@
+"""
+Stop order for a line.
+
+The order comes from, in priority:
+
+1. Sequences supplied by the import (``Stop.source_sequence``).
+2. Numbered codes on the line's main prefixes: one prefix runs in
+   ascending order ("BL01", "BL02", ...). With two prefixes the first runs
+   backwards into the second, as with a line that has two branches from a
+   central station ("E2, E1" then "N1, N2").
+3. Everything else (hub codes such as "CEN", codes of other lines, missing
+   codes) is inserted where it adds the least track length, using the
+   station coordinates.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from typing import NamedTuple
+
+from core.geo import haversine_km
+
+NUMBERED_CODE_RE = re.compile(r"^(\D+)(\d+)$")
+# A prefix counts as one of the line's own when it numbers at least this
+# share of the stops, which filters out codes borrowed from other lines.
+MAIN_PREFIX_SHARE = 0.2
+
+
+class Stop(NamedTuple):
+    key: int
+    code: str
+    latitude: float | None = None
+    longitude: float | None = None
+    source_sequence: int | None = None
+
+
+def parse_code(code: str) -> tuple[str, int] | None:
+    match = NUMBERED_CODE_RE.match(code or "")
+    if not match:
+        return None
+    return match.group(1), int(match.group(2))
+
+
+def _distance(first: Stop, second: Stop) -> float:
+    return haversine_km(first.latitude, first.longitude, second.latitude, second.longitude)
+
+
+def _anchor_order(stops: list[Stop]) -> list[Stop]:
+    supplied = [stop for stop in stops if stop.source_sequence is not None]
+    if supplied:
+        return sorted(supplied, key=lambda stop: (stop.source_sequence, stop.key))
+
+    parsed = {stop.key: parse_code(stop.code) for stop in stops}
+    counts = Counter(value[0] for value in parsed.values() if value)
+    threshold = max(2, MAIN_PREFIX_SHARE * len(stops))
+    prefixes = sorted(prefix for prefix, count in counts.items() if count >= threshold)
+
+    order = []
+    seen_numbers = set()
+    for position, prefix in enumerate(prefixes):
+        branch = sorted(
+            (stop for stop in stops if parsed[stop.key] and parsed[stop.key][0] == prefix),
+            key=lambda stop: (parsed[stop.key][1], stop.key),
+            reverse=position == 0 and len(prefixes) > 1,
+        )
+        for stop in branch:
+            # A repeated code (data error) is placed geographically instead.
+            number = (prefix, parsed[stop.key][1])
+            if number in seen_numbers:
+                continue
+            seen_numbers.add(number)
+            order.append(stop)
+    return order
+
+
+def _insert_by_distance(order: list[Stop], stop: Stop) -> None:
+    if not order:
+        order.append(stop)
+        return
+    best_index = 0
+    best_cost = _distance(stop, order[0])
+    end_cost = _distance(order[-1], stop)
+    if end_cost < best_cost:
+        best_index, best_cost = len(order), end_cost
+    for index in range(1, len(order)):
+        before, after = order[index - 1], order[index]
+        cost = _distance(before, stop) + _distance(stop, after) - _distance(before, after)
+        if cost < best_cost:
+            best_index, best_cost = index, cost
+    order.insert(best_index, stop)
+
+
+def order_stops(stops: list[Stop]) -> list[Stop]:
+    """Return ``stops`` in line order."""
+    anchors = _anchor_order(stops)
+    anchor_keys = {stop.key for stop in anchors}
+    located = [stop for stop in anchors if stop.latitude is not None and stop.longitude is not None]
+    unlocated = [stop for stop in anchors if stop not in located]
+
+    rest = [stop for stop in stops if stop.key not in anchor_keys]
+    if not located and len(rest) > 1:
+        # No usable codes: start from one end of the line's longest span.
+        candidates = [stop for stop in rest if stop.latitude is not None and stop.longitude is not None]
+        if candidates:
+            start = max(
+                candidates,
+                key=lambda stop: max(_distance(stop, other) for other in candidates),
+            )
+            located = [start]
+            rest.remove(start)
+
+    order = list(located)
+    for stop in sorted(rest, key=lambda stop: (stop.code, stop.key)):
+        if stop.latitude is None or stop.longitude is None:
+            unlocated.append(stop)
+        else:
+            _insert_by_distance(order, stop)
+    return order + unlocated
+
+
+def adjacency(ordered: list[Stop]) -> dict[str, list[int | None]]:
+    """Map each stop key (as a JSON-friendly string) to ``[previous, next]``."""
+    result = {}
+    for index, stop in enumerate(ordered):
+        previous = ordered[index - 1].key if index > 0 else None
+        following = ordered[index + 1].key if index + 1 < len(ordered) else None
+        result[str(stop.key)] = [previous, following]
+    return result
@@ -1,7 +1,12 @@
 from wagtail.snippets.models import register_snippet
 from wagtail.snippets.views.snippets import SnippetViewSet
 
-from public_transport.models import TransportStation
+from public_transport.models import (
+    TransportLine,
+    TransportStation,
+    TransportStationLine,
+    TransportSystem,
+)
 
 
 class TransportStationViewSet(SnippetViewSet):
@@ -37,4 +42,30 @@ class TransportStationViewSet(SnippetViewSet):
     ordering = ["station_label", "line_label"]  # type: ignore[reportIncompatibleVariableOverride]
 
 
+class TransportSystemViewSet(SnippetViewSet):
+    model = TransportSystem
+    list_display = ("label", "qid")  # type: ignore[reportIncompatibleVariableOverride]
+    search_fields = ("label", "qid")  # type: ignore[reportIncompatibleVariableOverride]
+    ordering = ["label"]  # type: ignore[reportIncompatibleVariableOverride]
+
+
+class TransportLineViewSet(SnippetViewSet):
+    model = TransportLine
+    list_display = ("label", "system", "qid")  # type: ignore[reportIncompatibleVariableOverride]
+    list_filter = ("system",)  # type: ignore[reportIncompatibleVariableOverride]
+    search_fields = ("label", "qid")  # type: ignore[reportIncompatibleVariableOverride]
+    ordering = ["system__label", "label"]  # type: ignore[reportIncompatibleVariableOverride]
+
+
+class TransportStationLineViewSet(SnippetViewSet):
+    model = TransportStationLine
+    list_display = ("station", "line", "code", "opening", "sort_order")  # type: ignore[reportIncompatibleVariableOverride]
+    list_filter = ("line",)  # type: ignore[reportIncompatibleVariableOverride]
+    search_fields = ("station__station_label", "code")  # type: ignore[reportIncompatibleVariableOverride]
+    ordering = ["line__label", "code"]  # type: ignore[reportIncompatibleVariableOverride]
+
+
 register_snippet(TransportStationViewSet)
+register_snippet(TransportSystemViewSet)
+register_snippet(TransportLineViewSet)
+register_snippet(TransportStationLineViewSet)
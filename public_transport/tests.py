@@ -0,0 +1,336 @@
+import json
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase
+
+from core.models import VersionCounter
+from core.testing import QueryScalingMixin, SitePagesMixin
+from public_transport.models import (
+    PublicTransportIndexPage,
+    PublicTransportLinePage,
+    PublicTransportStationPage,
+    PublicTransportSystemPage,
+    TransportLine,
+    TransportStation,
+    TransportStationLine,
+    TransportSystem,
+)
+from public_transport.routing import GRAPH_VERSION_KEY, bump_graph_version, get_transit_graph
+from public_transport.sequence import Stop, adjacency, order_stops
+
+
+class OrderStopsTests(SimpleTestCase):
+    def codes(self, stops):
+        return [stop.code for stop in order_stops(stops)]
+
+    def test_numbered_codes_run_in_order(self):
+        stops = [
+            Stop(3, "BL10", 13.0, 100.2),
+            Stop(1, "BL02", 13.0, 100.0),
+            Stop(2, "BL03", 13.0, 100.1),
+        ]
+        self.assertEqual(self.codes(stops), ["BL02", "BL03", "BL10"])
+
+    def test_two_branches_meet_at_unnumbered_hub(self):
+        stops = [
+            Stop(1, "N1", 13.1, 100.0),
+            Stop(2, "E1", 12.9, 100.0),
+            Stop(3, "CEN", 13.0, 100.0),
+            Stop(4, "E2", 12.8, 100.0),
+            Stop(5, "N2", 13.2, 100.0),
+        ]
+        self.assertEqual(self.codes(stops), ["E2", "E1", "CEN", "N1", "N2"])
+
+    def test_import_sequence_wins_over_codes(self):
+        stops = [
+            Stop(1, "A1", 13.0, 100.0, source_sequence=2),
+            Stop(2, "A2", 13.0, 100.1, source_sequence=1),
+        ]
+        self.assertEqual(self.codes(stops), ["A2", "A1"])
+
+    def test_stops_without_codes_follow_geography(self):
+        stops = [
+            Stop(1, "", 13.0, 100.0),
+            Stop(2, "", 13.0, 100.2),
+            Stop(3, "", 13.0, 100.1),
+            Stop(4, ""),
+        ]
+        keys = [stop.key for stop in order_stops(stops)]
+        self.assertIn(keys[:3], ([1, 3, 2], [2, 3, 1]))
+        self.assertEqual(keys[3], 4)
+
+    def test_adjacency(self):
+        ordered = [Stop(7, "A1"), Stop(8, "A2"), Stop(9, "A3")]
+        self.assertEqual(
+            adjacency(ordered),
+            {"7": [None, 8], "8": [7, 9], "9": [8, None]},
+        )
+
+
+class TransitRoutingTests(TestCase):
+    def add_station(self, label, line_label, code, latitude, longitude, lines=()):
+        station = TransportStation.objects.create(
+            station_label=label,
+            station_qid=f"Q-{label}",
+            system_label="Metro",
+            line_label=line_label,
+            station_codes=code,
+            latitude=Decimal(str(latitude)),
+            longitude=Decimal(str(longitude)),
+        )
+        for line in (station.line, *lines):
+            TransportStationLine.objects.create(station=station, line=line)
+        return station
+
+    def setUp(self):
+        # Red runs west to east along latitude 13.70, Blue north from the
+        # interchange at Hub.
+        self.add_station("R1", "Red", "R1", 13.70, 100.50)
+        self.add_station("R2", "Red", "R2", 13.70, 100.52)
+        red = TransportStation.objects.get(station_label="R1").line
+        self.hub = self.add_station("Hub", "Blue", "B1", 13.70, 100.54, lines=[red])
+        self.add_station("B2", "Blue", "B2", 13.72, 100.54)
+        self.add_station("B3", "Blue", "B3", 13.74, 100.54)
+        for line in (red, self.hub.line):
+            line.refresh_member_codes()
+            line.refresh_sequence()
+        # Test transactions never commit, so retire graphs from earlier tests.
+        bump_graph_version()
+
+    def test_route_changes_line_at_interchange(self):
+        graph = get_transit_graph()
+        # The cached graph costs only the shared version check.
+        with self.assertNumQueries(1):
+            self.assertIs(get_transit_graph(), graph)
+        with self.assertNumQueries(0):
+            route = graph.route((13.701, 100.50), (13.741, 100.54))
+        self.assertEqual(
+            [(leg.kind, leg.line.label if leg.line else None) for leg in route.legs],
+            [("walk", None), ("ride", "Red"), ("transfer", None), ("ride", "Blue"), ("walk", None)],
+        )
+        self.assertEqual([station.label for station in route.legs[1].stations], ["R1", "R2", "Hub"])
+
+    def test_graph_rebuilds_after_changes_commit(self):
+        get_transit_graph()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_station("B4", "Blue", "B4", 13.76, 100.54)
+            self.hub.line.refresh_sequence()
+        graph = get_transit_graph()
+        self.assertIn("B4", {station.label for station in graph.stations.values()})
+
+    def test_graph_rebuilds_after_version_bump_elsewhere(self):
+        graph = get_transit_graph()
+        # Another process bumps the shared counter directly.
+        VersionCounter.objects.filter(key=GRAPH_VERSION_KEY).update(value=F("value") + 1)
+        self.assertIsNot(get_transit_graph(), graph)
+
+    def test_no_route_far_from_stations(self):
+        self.assertIsNone(get_transit_graph().route((14.5, 100.5), (13.741, 100.54)))
+
+
+class TransportStationSaveTests(TestCase):
+    def setUp(self):
+        TransportStation.objects.create(
+            station_label="Siam", station_qid="Q-SIAM", system_label="BTS", line_label="Sukhumvit"
+        )
+        self.station = TransportStation.objects.get(station_qid="Q-SIAM")
+
+    def test_unchanged_labels_skip_resolving(self):
+        with mock.patch.object(TransportStation, "sync_network_references") as sync:
+            self.station.station_codes = "CEN"
+            self.station.save()
+            self.station.line_label = "Silom"
+            self.station.save(update_fields=["station_codes"])
+        sync.assert_not_called()
+
+    def test_changed_label_is_resolved_and_saved(self):
+        self.station.line_label = "Silom"
+        self.station.save(update_fields=["line_label"])
+        self.station.refresh_from_db()
+        self.assertEqual(self.station.line.label, "Silom")
+        self.assertEqual(self.station.line.system, self.station.system)
+
+
+class ExplainStationQueriesTests(TestCase):
+    def setUp(self):
+        station = TransportStation.objects.create(
+            station_label="Siam", station_qid="Q-SIAM", system_label="BTS", line_label="Sukhumvit"
+        )
+        TransportStationLine.objects.create(station=station, line=station.line)
+
+    def explain(self, *args):
+        out = StringIO()
+        call_command("explain_station_queries", "--repeat", "1", *args, stdout=out)
+        return out.getvalue()
+
+    def test_reports_each_query(self):
+        output = self.explain()
+        self.assertIn("line: Sukhumvit (1 stations)", output)
+        for name in (
+            "line page",
+            "line order",
+            "system page",
+            "station form",
+            "index form",
+            "bounding box",
+        ):
+            self.assertIn(f"{name}: median", output)
+
+    def test_without_indexes_rolls_back(self):
+        with connection.cursor() as cursor:
+            before = connection.introspection.get_constraints(
+                cursor, TransportStationLine._meta.db_table
+            )
+        self.assertIn("Indexes dropped", self.explain("--without-indexes"))
+        with connection.cursor() as cursor:
+            after = connection.introspection.get_constraints(
+                cursor, TransportStationLine._meta.db_table
+            )
+        self.assertEqual(after.keys(), before.keys())
+
+    def test_without_indexes_refused_on_other_databases(self):
+        settings_dict = {**connection.settings_dict, "NAME": "krungthep", "TEST": {}}
+        with (
+            mock.patch.object(connection, "vendor", "postgresql"),
+            mock.patch.object(connection, "settings_dict", settings_dict),
+        ):
+            with self.assertRaisesMessage(CommandError, "SQLite or a test database"):
+                self.explain("--without-indexes")
+
+
+def station_feature(station_qid, line_label, line_qid, system_label="BTS", **props):
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [100.534, 13.745]},
+        "properties": {
+            "stationQid": station_qid,
+            "stationLabel": "Siam",
+            "systemLabel": system_label,
+            "systemQid": f"Q-{system_label}",
+            "lineLabel": line_label,
+            "lineQid": line_qid,
+            **props,
+        },
+    }
+
+
+class ImportUnifiedTransportationTests(TestCase):
+    def run_import(self, *features):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / "stations.geojson"
+        path.write_text(json.dumps({"type": "FeatureCollection", "features": list(features)}))
+        call_command("import_unified_transportation", "--path", str(path), stdout=StringIO())
+
+    def test_lines_dropped_from_the_file_lose_the_station(self):
+        self.run_import(
+            station_feature("Q-SIAM", "Sukhumvit", "Q-SUK"),
+            station_feature("Q-SIAM", "Silom", "Q-SIL"),
+        )
+        self.run_import(station_feature("Q-SIAM", "Sukhumvit", "Q-SUK"))
+
+        station = TransportStation.objects.get(station_qid="Q-SIAM")
+        self.assertEqual(
+            list(station.line_memberships.values_list("line__label", flat=True)), ["Sukhumvit"]
+        )
+
+    def test_labels_and_references_come_from_the_same_line(self):
+        # The first feature's line cannot be resolved, so the second one is
+        # the station's primary line for both its labels and its FKs.
+        self.run_import(
+            station_feature("Q-SIAM", "", "Q-NONE", system_label=""),
+            station_feature("Q-SIAM", "Silom", "Q-SIL"),
+        )
+
+        station = TransportStation.objects.get(station_qid="Q-SIAM")
+        self.assertEqual(station.line.label, "Silom")
+        self.assertEqual(
+            (station.line_label, station.line_qid, station.system_label),
+            ("Silom", "Q-SIL", "BTS"),
+        )
+
+
+class TransportPageQueryTests(SitePagesMixin, QueryScalingMixin, TestCase):
+    index_page_class = PublicTransportIndexPage
+    index_title = "Transport"
+
+    def setUp(self):
+        super().setUp()
+        self.system = TransportSystem.objects.create(label="Metro")
+        self.line = TransportLine.objects.create(system=self.system, label="Red")
+        self.system_page = self.index.add_child(
+            instance=PublicTransportSystemPage(
+                title="Metro", slug="metro", system=self.system, system_label="Metro"
+            )
+        )
+        self.line_page = self.system_page.add_child(
+            instance=PublicTransportLinePage(
+                title="Red", slug="red", line=self.line, line_label="Red", system_label="Metro"
+            )
+        )
+
+    def add_stations(self, count):
+        for _ in range(count):
+            number = self.next_number()
+            station = TransportStation.objects.create(
+                station_label=f"Station {number}",
+                station_qid=f"Q-{number}",
+                system_label="Metro",
+                line_label="Red",
+                station_codes=f"R{number}",
+                latitude=Decimal("13.70"),
+                longitude=Decimal("100.50") + Decimal(number) / 100,
+            )
+            TransportStationLine.objects.create(station=station, line=self.line, code=f"R{number}")
+            # Every other station has its own page; the rest link to the map.
+            if number % 2:
+                self.line_page.add_child(
+                    instance=PublicTransportStationPage(
+                        title=station.station_label, slug=f"station-{number}", station=station
+                    )
+                )
+        self.line.refresh_sequence()
+
+    def test_line_page_without_line_falls_back_from_line_order(self):
+        line_page = self.system_page.add_child(
+            instance=PublicTransportLinePage(
+                title="Blue", slug="blue", line_label="Red", system_label="Metro", station_sort="sequence"
+            )
+        )
+        self.add_stations(2)
+        response = self.client.get(line_page.url)
+        self.assertEqual(response.status_code, 200)
+        labels = [card["station"].station_label for card in response.context["station_cards"]]
+        self.assertEqual(labels, ["Station 1", "Station 2"])
+
+    def add_line_pages(self, count):
+        for _ in range(count):
+            number = self.next_number()
+            line = TransportLine.objects.create(system=self.system, label=f"Line {number}")
+            self.system_page.add_child(
+                instance=PublicTransportLinePage(
+                    title=line.label, slug=f"line-{number}", line=line, line_label=line.label
+                )
+            )
+
+    def test_line_page_queries_do_not_scale_with_stations(self):
+        self.assertQueriesDoNotScale(lambda: self.client.get(self.line_page.url), self.add_stations)
+
+    def test_system_page_queries_do_not_scale_with_lines(self):
+        self.assertQueriesDoNotScale(
+            lambda: self.client.get(self.system_page.url), self.add_line_pages
+        )
+
+    def test_system_station_view_queries_do_not_scale_with_stations(self):
+        self.system_page.show_stations = True
+        self.system_page.save()
+        self.assertQueriesDoNotScale(
+            lambda: self.client.get(self.system_page.url), self.add_stations
+        )
@@ -1,3 +1,6 @@
+from django.templatetags.static import static
+from django.utils.html import format_html
+
 from wagtail import hooks
 
 from public_transport import snippets  # noqa: F401
@@ -5,4 +8,7 @@ from public_transport import snippets  # noqa: F401
 
 @hooks.register("insert_editor_js")
 def station_title_sync_js():
-    return '<script src="/static/public_transport/js/station_title_sync.js"></script>'
+    return format_html(
+        '<script src="{}"></script>',
+        static("public_transport/js/station_title_sync.js"),
+    )
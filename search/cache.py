@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import hashlib
+
+from django.conf import settings
+
+from core.versions import bump_version, get_version
+
+INDEX_VERSION_KEY = "search:index-version"
+DEFAULT_RESULTS_TIMEOUT = 300
+
+
+def get_index_version() -> int:
+    return get_version(INDEX_VERSION_KEY)
+
+
+def bump_index_version() -> int:
+    """
+    Invalidate every cached result set by moving to a new index version.
+
+    The version is shared by all processes (see ``core.versions``); the
+    result pages themselves stay in each process's own cache, keyed by it.
+    """
+    return bump_version(INDEX_VERSION_KEY)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.casefold().split())
+
+
+def normalize_page(page_number) -> int:
+    """
+    The page number as the paginator reads it: ``"01"`` is 1, and a missing or
+    non-numeric page is 1 too.
+    """
+    try:
+        return int(page_number)
+    except (TypeError, ValueError):
+        return 1
+
+
+def results_cache_key(query: str, page_number, site_key: str = "") -> str:
+    digest = hashlib.sha1(
+        f"{site_key}\n{normalize_query(query)}".encode("utf-8")
+    ).hexdigest()
+    return f"search:results:{get_index_version()}:{digest}:{normalize_page(page_number)}"
+
+
+def results_timeout() -> int:
+    return getattr(settings, "SEARCH_RESULTS_CACHE_TIMEOUT", DEFAULT_RESULTS_TIMEOUT)
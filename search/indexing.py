@@ -0,0 +1,110 @@
+"""
+Batch search indexing.
+
+``suspend_indexing`` switches off per-save index updates for the given
+models, records which rows were saved meanwhile and indexes them in
+batches once the last suspension ends. Saves from other threads during the
+suspension are recorded too, so nothing is left out of the index.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db.models.signals import post_save
+from modelsearch.signal_handlers import post_save_signal_handler
+from wagtail.search.backends import get_search_backends
+
+from search import signal_handlers
+from search.cache import bump_index_version
+from search.suggest import bump_suggest_version, rebuild_suggest_index
+
+DEFAULT_BATCH_SIZE = 500
+
+_lock = threading.Lock()
+_suspended: dict[type, int] = defaultdict(int)
+_pending: dict[type, set] = defaultdict(set)
+
+
+def _per_save_handlers(model):
+    # Reconnected in this order, as register_signal_handlers connects them.
+    handlers = [post_save_signal_handler, signal_handlers.index_changed_handler]
+    handlers.extend(
+        saved_handler
+        for suggest_model, saved_handler, _ in signal_handlers.suggest_handlers()
+        if suggest_model is model
+    )
+    return handlers
+
+
+def _record_save(sender, instance, **kwargs):
+    with _lock:
+        _pending[sender].add(instance.pk)
+
+
+def begin_suspension(*models) -> None:
+    with _lock:
+        for model in models:
+            _suspended[model] += 1
+            if _suspended[model] == 1:
+                for handler in _per_save_handlers(model):
+                    post_save.disconnect(handler, sender=model)
+                post_save.connect(_record_save, sender=model)
+
+
+def end_suspension(*models, reindex=True, batch_size=DEFAULT_BATCH_SIZE, progress=None) -> int:
+    """End a suspension; returns the number of rows reindexed."""
+    released = {}
+    with _lock:
+        for model in models:
+            _suspended[model] -= 1
+            if _suspended[model] > 0:
+                continue
+            del _suspended[model]
+            post_save.disconnect(_record_save, sender=model)
+            for handler in _per_save_handlers(model):
+                post_save.connect(handler, sender=model)
+            released[model] = _pending.pop(model, set())
+
+    if not reindex or not any(released.values()):
+        return 0
+    total = 0
+    for model, pks in released.items():
+        total += reindex_objects(model, sorted(pks), batch_size=batch_size, progress=progress)
+    bump_index_version()
+    # The suggest handlers were disconnected too.
+    suggest_models = {model for model, _, _ in signal_handlers.suggest_handlers()}
+    if suggest_models.intersection(released):
+        bump_suggest_version()
+        rebuild_suggest_index()
+    return total
+
+
+@contextmanager
+def suspend_indexing(*models, reindex=True, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    begin_suspension(*models)
+    try:
+        yield
+    finally:
+        end_suspension(*models, reindex=reindex, batch_size=batch_size, progress=progress)
+
+
+def reindex_objects(model, pks, batch_size=DEFAULT_BATCH_SIZE, progress=None) -> int:
+    """Index ``pks`` of ``model`` in chunks with one bulk write per backend and chunk."""
+    backends = list(get_search_backends(with_auto_update=True))
+    done = 0
+    for start in range(0, len(pks), batch_size):
+        chunk = pks[start : start + batch_size]
+        objects = list(model.get_indexed_objects().filter(pk__in=chunk))
+        for backend in backends:
+            index = backend.get_index_for_model(model)
+            if index:
+                index.add_items(model, objects)
+            else:
+                backend.add_bulk(model, objects)
+        done += len(chunk)
+        if progress:
+            progress(model, done, len(pks), chunk[-1])
+    return done
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from wagtail.search import index
+
+from search.cache import bump_index_version
+from search.indexing import DEFAULT_BATCH_SIZE, reindex_objects
+from search.suggest import rebuild_suggest_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Reindex search models in batches with progress output. The last "
+        "indexed id per model is checkpointed so an interrupted run resumes "
+        "where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "labels",
+            nargs="*",
+            metavar="app_label[.ModelName]",
+            help="Apps or models to reindex. Defaults to every indexed model.",
+        )
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            "--checkpoint",
+            default=".reindex_search.json",
+            help="File that stores the last indexed id per model.",
+        )
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Ignore an existing checkpoint and start from the first row.",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("batch-size must be >= 1")
+
+        models = self._resolve_models(options["labels"])
+        checkpoint_path = Path(options["checkpoint"])
+        checkpoint = {} if options["reset"] else self._load_checkpoint(checkpoint_path)
+
+        total = 0
+        for model in models:
+            total += self._reindex_model(model, checkpoint, checkpoint_path, options)
+
+        bump_index_version()
+        rebuild_suggest_index()
+        self.stdout.write(f"Indexed: {total} rows in {len(models)} models")
+
+    def _resolve_models(self, labels):
+        indexed = index.get_indexed_models()
+        if not labels:
+            return indexed
+        models = []
+        for label in labels:
+            try:
+                if "." in label:
+                    selected = [apps.get_model(label)]
+                else:
+                    selected = list(apps.get_app_config(label).get_models())
+            except LookupError as exc:
+                raise CommandError(str(exc)) from exc
+            selected = [model for model in selected if model in indexed]
+            if not selected:
+                raise CommandError(f"No indexed models in {label}")
+            models.extend(model for model in selected if model not in models)
+        return models
+
+    def _reindex_model(self, model, checkpoint, checkpoint_path, options):
+        label = model._meta.label
+        after_id = checkpoint.get(label)
+        queryset = model.get_indexed_objects().order_by("pk")
+        if after_id is not None:
+            queryset = queryset.filter(pk__gt=after_id)
+        pks = list(queryset.values_list("pk", flat=True))
+        if not pks:
+            self.stdout.write(f"[{label}] nothing to do.")
+            return 0
+
+        self.stdout.write(
+            f"[{label}] {len(pks)} rows"
+            + (f", resuming after id {after_id}" if after_id is not None else "")
+        )
+        started = time.monotonic()
+
+        def progress(model, done, count, last_pk):
+            checkpoint[label] = last_pk
+            self._save_checkpoint(checkpoint_path, checkpoint)
+            elapsed = time.monotonic() - started
+            rate = done / elapsed if elapsed else 0
+            self.stdout.write(f"[{label}] {done}/{count} ({done * 100 / count:.1f}%, {rate:.0f}/s)")
+
+        done = reindex_objects(model, pks, batch_size=options["batch_size"], progress=progress)
+
+        # A finished model starts from scratch next time.
+        del checkpoint[label]
+        self._save_checkpoint(checkpoint_path, checkpoint)
+        return done
+
+    def _load_checkpoint(self, path):
+        if not path.exists():
+            return {}
+        try:
+            return json.loads(path.read_text())
+        except json.JSONDecodeError as exc:
+            raise CommandError(f"Invalid checkpoint file {path}: {exc}") from exc
+
+    def _save_checkpoint(self, path, checkpoint):
+        if not checkpoint:
+            path.unlink(missing_ok=True)
+            return
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        tmp_path.write_text(json.dumps(checkpoint))
+        os.replace(tmp_path, path)
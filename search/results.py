@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+
+from django.contrib.contenttypes.models import ContentType
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+THUMBNAIL_FILTER = "fill-160x120"
+SNIPPET_WORDS = 30
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    title: str
+    url: str
+    snippet: str
+    type: str
+    thumbnail: str | None = None
+
+
+def _snippet(page) -> str:
+    text = page.search_description
+    field_name = getattr(page, "search_snippet_field", None)
+    if not text and field_name:
+        text = getattr(page, field_name, "") or ""
+    return Truncator(strip_tags(str(text))).words(SNIPPET_WORDS)
+
+
+def _load_specific(pages) -> dict[int, object]:
+    """Fetch the specific instance of every page with one query per page type."""
+    ids_by_type = defaultdict(list)
+    for page in pages:
+        ids_by_type[page.content_type_id].append(page.id)
+
+    specific = {}
+    for content_type_id, ids in ids_by_type.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is None:
+            continue
+        specific.update(
+            (page.id, page) for page in model._default_manager.filter(id__in=ids)
+        )
+    return specific
+
+
+def _thumbnail_urls(pages) -> dict[int, str]:
+    """Resolve thumbnail renditions for all pages, prefetching per image model."""
+    page_ids_by_image = defaultdict(lambda: defaultdict(list))
+    for page in pages:
+        field_name = getattr(page, "search_thumbnail_field", None)
+        if not field_name:
+            continue
+        field = page._meta.get_field(field_name)
+        image_id = getattr(page, field.attname)
+        if image_id:
+            page_ids_by_image[field.related_model][image_id].append(page.id)
+
+    urls = {}
+    for image_model, page_ids in page_ids_by_image.items():
+        images = image_model.objects.filter(id__in=page_ids).prefetch_renditions(
+            THUMBNAIL_FILTER
+        )
+        for image in images:
+            try:
+                url = image.get_rendition(THUMBNAIL_FILTER).url
+            except Exception:
+                # A missing source file should not break the results page.
+                continue
+            for page_id in page_ids[image.id]:
+                urls[page_id] = url
+    return urls
+
+
+def build_search_results(pages, request=None) -> list[SearchResult]:
+    """
+    Turn a page of search hits into lightweight records.
+
+    Query cost is bounded by the number of distinct page types and image
+    models on the page rather than by the number of hits.
+    """
+    pages = list(pages)
+    specific = _load_specific(pages)
+    thumbnails = _thumbnail_urls(specific.values())
+
+    results = []
+    for page in pages:
+        page = specific.get(page.id, page)
+        results.append(
+            SearchResult(
+                title=page.title,
+                url=page.get_url(request) or "",
+                snippet=_snippet(page),
+                type=page._meta.verbose_name.title(),
+                thumbnail=thumbnails.get(page.id),
+            )
+        )
+    return results
@@ -0,0 +1,83 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from wagtail.search import index
+
+from search import suggest
+from search.cache import bump_index_version
+
+
+def index_changed_handler(**kwargs):
+    # After commit, or a reader could cache the old results under the new
+    # version before the change is visible.
+    transaction.on_commit(bump_index_version)
+
+
+def _apply_after_commit(key, build_entry=None):
+    # A rolled-back save must not stay suggestible, so the local index only
+    # follows changes once they commit, right after the suggest version bump
+    # that tells the other processes to rebuild.
+    transaction.on_commit(suggest.bump_suggest_version)
+    transaction.on_commit(lambda: suggest.apply_change(key, build_entry))
+
+
+def station_saved_handler(instance, **kwargs):
+    from public_transport.models import PublicTransportStationPage
+
+    def build_entry():
+        page = PublicTransportStationPage.objects.live().filter(station=instance).first()
+        return suggest.station_entry(instance, page.url if page else None)
+
+    _apply_after_commit(suggest.station_key(instance), build_entry)
+
+
+def station_deleted_handler(instance, **kwargs):
+    _apply_after_commit(suggest.station_key(instance))
+
+
+def poi_saved_handler(instance, **kwargs):
+    build_entry = (lambda: suggest.poi_entry(instance)) if instance.live else None
+    _apply_after_commit(f"poi:{instance.pk}", build_entry)
+
+
+def poi_deleted_handler(instance, **kwargs):
+    _apply_after_commit(f"poi:{instance.pk}")
+
+
+def category_saved_handler(instance, **kwargs):
+    from poi.models import POIIndexPage
+
+    def build_entry():
+        index_page = POIIndexPage.objects.live().filter(category=instance).first()
+        return suggest.category_entry(instance, index_page.url if index_page else "")
+
+    _apply_after_commit(f"category:{instance.pk}", build_entry)
+
+
+def category_deleted_handler(instance, **kwargs):
+    _apply_after_commit(f"category:{instance.pk}")
+
+
+def suggest_handlers():
+    """Return ``(model, saved_handler, deleted_handler)`` for the suggest index."""
+    from poi.models import POICategory, POIPage
+    from public_transport.models import TransportStation
+
+    return [
+        (TransportStation, station_saved_handler, station_deleted_handler),
+        (POIPage, poi_saved_handler, poi_deleted_handler),
+        (POICategory, category_saved_handler, category_deleted_handler),
+    ]
+
+
+def register_signal_handlers():
+    # Mirror the search backend's own handlers: anything that reindexes a
+    # model also retires the cached result sets.
+    for model in index.get_indexed_models():
+        post_save.connect(index_changed_handler, sender=model)
+        post_delete.connect(index_changed_handler, sender=model)
+
+    # Each of these bumps the suggest version and then applies the change,
+    # so the local suggest index follows it instead of rebuilding.
+    for model, saved_handler, deleted_handler in suggest_handlers():
+        post_save.connect(saved_handler, sender=model)
+        post_delete.connect(deleted_handler, sender=model)
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import re
+import threading
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from urllib.parse import urlencode
+
+from core.versions import bump_version, get_version
+from search.thai import contains_thai, romanize
+
+MIN_QUERY_LENGTH = 1
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+TERM_SPLIT_RE = re.compile(r"[\s,/()·-]+")
+# Separate from the search index version: only station, POI and category
+# changes move it, so other saves don't make every process rebuild the index.
+SUGGEST_VERSION_KEY = "search:suggest-version"
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    label: str
+    kind: str
+    url: str
+    detail: str = ""
+
+
+def normalize_term(value: str) -> str:
+    return " ".join(value.casefold().split())
+
+
+def word_suffixes(label: str) -> list[str]:
+    """Return the label starting at each word, so "Thap" finds "Ban Thap Chang"."""
+    words = [word for word in TERM_SPLIT_RE.split(normalize_term(label)) if word]
+    suffixes = [" ".join(words[index:]) for index in range(len(words))]
+    # Thai labels are also reachable by their romanized form.
+    return suffixes + [romanize(suffix) for suffix in suffixes if contains_thai(suffix)]
+
+
+class PrefixIndex:
+    """
+    Sorted-array prefix index.
+
+    Terms are kept in one sorted list of ``(term, key)`` tuples; a lookup is
+    a single bisect followed by a short forward scan. The first term of each
+    entry is its primary term and ranks ahead of the others.
+    """
+
+    def __init__(self):
+        self._terms: list[tuple[str, str]] = []
+        self._entries: dict[str, tuple[Suggestion, str, list[str]]] = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _prepare(terms) -> tuple[str, list[str]]:
+        normalized = [normalize_term(term) for term in terms if term]
+        primary = normalized[0] if normalized else ""
+        return primary, sorted(set(normalized))
+
+    def add(self, key: str, suggestion: Suggestion, terms) -> None:
+        self.remove(key)
+        primary, unique_terms = self._prepare(terms)
+        self._entries[key] = (suggestion, primary, unique_terms)
+        for term in unique_terms:
+            insort(self._terms, (term, key))
+
+    def bulk_load(self, items) -> None:
+        """Replace the index contents with ``(key, suggestion, terms)`` items."""
+        terms = []
+        entries = {}
+        for key, suggestion, raw_terms in items:
+            primary, unique_terms = self._prepare(raw_terms)
+            entries[key] = (suggestion, primary, unique_terms)
+            terms.extend((term, key) for term in unique_terms)
+        terms.sort()
+        self._terms = terms
+        self._entries = entries
+
+    def remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if not entry:
+            return
+        for term in entry[2]:
+            position = bisect_left(self._terms, (term, key))
+            if position < len(self._terms) and self._terms[position] == (term, key):
+                del self._terms[position]
+
+    def search(self, prefix: str, limit: int = DEFAULT_LIMIT) -> list[Suggestion]:
+        prefix = normalize_term(prefix)
+        if len(prefix) < MIN_QUERY_LENGTH:
+            return []
+        primary_matches, other_matches = [], []
+        seen = set()
+        position = bisect_left(self._terms, (prefix, ""))
+        while position < len(self._terms) and len(primary_matches) < limit:
+            term, key = self._terms[position]
+            if not term.startswith(prefix):
+                break
+            position += 1
+            if key in seen:
+                continue
+            seen.add(key)
+            suggestion, primary, _ = self._entries[key]
+            if term == primary:
+                primary_matches.append(suggestion)
+            else:
+                other_matches.append(suggestion)
+        return (primary_matches + other_matches)[:limit]
+
+
+def station_key(station) -> str:
+    return f"station:{station.station_qid or station.pk}"
+
+
+def station_entry(station, page_url=None):
+    from django.urls import reverse
+
+    url = page_url or ""
+    if not url and station.latitude is not None and station.longitude is not None:
+        url = "{}?{}".format(
+            reverse("map:transport_map"),
+            urlencode(
+                {
+                    "lat": station.latitude,
+                    "lng": station.longitude,
+                    "title": station.station_label,
+                    "system": station.system_label,
+                    "line": station.line_label,
+                }
+            ),
+        )
+    codes = [code for code in TERM_SPLIT_RE.split(station.station_codes or "") if code]
+    codes += [romanize(code).strip(".") for code in codes if contains_thai(code)]
+    suggestion = Suggestion(
+        label=station.station_label,
+        kind="station",
+        url=url,
+        detail=" · ".join(filter(None, [station.line_label, station.station_codes])),
+    )
+    return station_key(station), suggestion, word_suffixes(station.station_label) + codes
+
+
+def poi_entry(poi):
+    suggestion = Suggestion(
+        label=poi.title,
+        kind="poi",
+        url=poi.url or "",
+        detail=poi.category.title if poi.category_id else "",
+    )
+    return f"poi:{poi.pk}", suggestion, word_suffixes(poi.title)
+
+
+def category_entry(category, url=""):
+    suggestion = Suggestion(label=category.title, kind="category", url=url)
+    return f"category:{category.pk}", suggestion, word_suffixes(category.title)
+
+
+def iter_entries():
+    from poi.models import POICategory, POIIndexPage, POIPage
+    from public_transport.models import PublicTransportStationPage, TransportStation
+
+    station_urls = {}
+    for page in PublicTransportStationPage.objects.live().exclude(station__isnull=True):
+        station_urls.setdefault(page.station_id, page.url)
+    for station in TransportStation.objects.order_by("station_label", "pk"):
+        yield station_entry(station, station_urls.get(station.pk))
+
+    for poi in POIPage.objects.live().select_related("category"):
+        yield poi_entry(poi)
+
+    index_urls = {
+        page.category_id: page.url
+        for page in POIIndexPage.objects.live().exclude(category__isnull=True)
+    }
+    for category in POICategory.objects.all():
+        yield category_entry(category, index_urls.get(category.pk, ""))
+
+
+def get_suggest_version() -> int:
+    return get_version(SUGGEST_VERSION_KEY)
+
+
+def bump_suggest_version() -> int:
+    """Make every process rebuild (or incrementally update) its suggest index."""
+    return bump_version(SUGGEST_VERSION_KEY)
+
+
+_lock = threading.Lock()
+_index = PrefixIndex()
+_built_version = None
+
+
+def get_suggest_index() -> PrefixIndex:
+    """
+    Return this process's index, rebuilding it when the shared suggest
+    version has moved since it was built (a write committed in another
+    process, or one this process could not apply incrementally).
+    """
+    global _built_version
+    version = get_suggest_version()
+    if _built_version != version:
+        with _lock:
+            if _built_version != version:
+                _index.bulk_load(iter_entries())
+                _built_version = version
+    return _index
+
+
+def rebuild_suggest_index() -> PrefixIndex:
+    global _built_version
+    with _lock:
+        _index.bulk_load(iter_entries())
+        _built_version = get_suggest_version()
+    return _index
+
+
+def apply_change(key: str, build_entry=None) -> None:
+    """
+    Apply one saved or deleted object to the local index.
+
+    Runs on commit, right after the suggest version bump for the same save, so a
+    local index that was current stays current without a rebuild; a stale
+    one, or one that missed a bump from another process, is left for the
+    next lookup to rebuild. ``build_entry`` is only called when the change
+    is applied; pass ``None`` to remove the key.
+    """
+    global _built_version
+    with _lock:
+        version = get_suggest_version()
+        if _built_version is None or version != _built_version + 1:
+            _built_version = None
+            return
+        entry = build_entry() if build_entry else None
+        if entry is None:
+            _index.remove(key)
+        else:
+            _index.add(*entry)
+        _built_version = version
@@ -0,0 +1,193 @@
+from unittest import mock
+
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase
+from wagtail.models import Page, Site
+
+from core.models import VersionCounter
+from home.models import HomePage
+from public_transport.models import TransportStation
+from search.cache import (
+    INDEX_VERSION_KEY,
+    bump_index_version,
+    get_index_version,
+    results_cache_key,
+)
+from search.indexing import suspend_indexing
+from search.suggest import (
+    SUGGEST_VERSION_KEY,
+    PrefixIndex,
+    Suggestion,
+    bump_suggest_version,
+    get_suggest_index,
+    get_suggest_version,
+    word_suffixes,
+)
+from search.thai import expand_query, romanize, segment
+
+
+class PrefixIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = PrefixIndex()
+        self.index.bulk_load(
+            [
+                (
+                    "station:1",
+                    Suggestion("Ban Thap Chang Station", "station", "/a/"),
+                    word_suffixes("Ban Thap Chang Station") + ["A3"],
+                ),
+                (
+                    "station:2",
+                    Suggestion("Thong Lo", "station", "/b/"),
+                    word_suffixes("Thong Lo"),
+                ),
+            ]
+        )
+
+    def test_primary_label_ranks_first(self):
+        labels = [s.label for s in self.index.search("th")]
+        self.assertEqual(labels, ["Thong Lo", "Ban Thap Chang Station"])
+
+    def test_code_and_case_insensitive_match(self):
+        self.assertEqual(self.index.search("a3")[0].url, "/a/")
+        self.assertEqual(self.index.search("BAN")[0].url, "/a/")
+
+    def test_incremental_add_and_remove(self):
+        self.index.add("poi:1", Suggestion("Thonglor Cafe", "poi", "/c/"), ["Thonglor Cafe"])
+        self.assertIn("Thonglor Cafe", [s.label for s in self.index.search("thong")])
+        self.index.remove("station:2")
+        self.assertEqual([s.label for s in self.index.search("thong")], ["Thonglor Cafe"])
+        self.assertEqual(len(self.index), 2)
+
+
+class ThaiTextTests(SimpleTestCase):
+    def test_segment_into_bigrams(self):
+        self.assertEqual(segment("สยาม"), ["สย", "ยา", "าม"])
+        self.assertEqual(segment("Siam"), [])
+
+    def test_romanize(self):
+        self.assertEqual(romanize("ทช."), "thch.")
+        self.assertEqual(romanize("สยาม"), "sayam")
+        self.assertEqual(romanize("เพลินจิต"), "phloenchit")
+
+    def test_romanize_syllable_rules(self):
+        cases = {
+            "ถนนสีลม": "thanonsilom",  # inherent a and o
+            "คลองเตย": "khlongtoei",  # cluster, final ย
+            "พหลโยธิน": "phahonyothin",  # ห closing its own syllable
+            "ห้วยขวาง": "huaikhwang",  # medial ว, tone mark
+            "หมอชิต": "mochit",  # silent ห
+            "จตุจักร": "chatuchak",  # silent final ร
+            "ไปรษณีย์": "praisani",  # thanthakhat
+            "สถานี BTS อโศก": "sathani BTS asok",
+        }
+        for thai, expected in cases.items():
+            with self.subTest(thai=thai):
+                self.assertEqual(romanize(thai), expected)
+
+    def test_expand_query_only_for_thai(self):
+        self.assertEqual(expand_query("Siam"), "Siam")
+        self.assertEqual(expand_query("สยาม"), "สยาม สย ยา าม sayam")
+
+
+class SuspendIndexingTests(TestCase):
+    def test_saves_are_indexed_in_one_batch_after_suspension(self):
+        with mock.patch("search.indexing.reindex_objects", return_value=2) as reindex:
+            with suspend_indexing(TransportStation):
+                first = TransportStation.objects.create(station_qid="Q1", line_qid="L1")
+                second = TransportStation.objects.create(station_qid="Q2", line_qid="L1")
+                first.save()
+                reindex.assert_not_called()
+
+        reindex.assert_called_once()
+        self.assertEqual(reindex.call_args.args[:2], (TransportStation, [first.pk, second.pk]))
+
+
+class IndexVersionTests(TestCase):
+    def test_bump_from_another_process_retires_cached_results(self):
+        key = results_cache_key("lumphini", 1)
+        # What a worker or management command elsewhere does on commit.
+        VersionCounter.objects.filter(key=INDEX_VERSION_KEY).update(value=F("value") + 1)
+        self.assertNotEqual(results_cache_key("lumphini", 1), key)
+
+    def test_equivalent_page_numbers_share_a_key(self):
+        key = results_cache_key("lumphini", 1)
+        for page in ("1", "01", " 1", None, "", "abc"):
+            with self.subTest(page=page):
+                self.assertEqual(results_cache_key("lumphini", page), key)
+        self.assertNotEqual(results_cache_key("lumphini", "2"), key)
+
+    def test_saves_bump_the_version_after_commit(self):
+        version = get_index_version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            TransportStation.objects.create(station_label="Siam", station_qid="Q-SIAM")
+        self.assertEqual(get_index_version(), version)
+        for callback in callbacks:
+            callback()
+        self.assertGreater(get_index_version(), version)
+
+
+class SuggestIndexTests(TestCase):
+    def labels(self, prefix):
+        return [suggestion.label for suggestion in get_suggest_index().search(prefix)]
+
+    def test_changes_apply_on_commit_only(self):
+        bump_suggest_version()
+        self.assertEqual(self.labels("ratcha"), [])
+        with self.captureOnCommitCallbacks() as callbacks:
+            TransportStation.objects.create(station_label="Ratchathewi", station_qid="Q-RCT")
+        # Still uncommitted (and, if the callbacks are dropped, rolled back).
+        self.assertEqual(self.labels("ratcha"), [])
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.labels("ratcha"), ["Ratchathewi"])
+
+    def test_rebuilds_after_a_bump_from_another_process(self):
+        self.assertEqual(self.labels("ari"), [])
+        # Rows written without signals, then the version moved elsewhere.
+        TransportStation.objects.bulk_create(
+            [TransportStation(station_label="Ari", station_qid="Q-ARI")]
+        )
+        VersionCounter.objects.filter(key=SUGGEST_VERSION_KEY).update(value=F("value") + 1)
+        self.assertEqual(self.labels("ari"), ["Ari"])
+
+    def test_other_searchable_saves_keep_the_suggest_version(self):
+        version = get_suggest_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            Page.get_first_root_node().add_child(instance=HomePage(title="Guide", slug="guide"))
+        self.assertEqual(get_suggest_version(), version)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TransportStation.objects.create(station_label="Ari", station_qid="Q-ARI")
+        self.assertGreater(get_suggest_version(), version)
+
+
+class AsyncSearchViewTests(TestCase):
+    def setUp(self):
+        # Pages are indexed once the save commits.
+        with self.captureOnCommitCallbacks(execute=True):
+            home = Page.get_first_root_node().add_child(
+                instance=HomePage(title="Lumphini Park guide", slug="lumphini")
+            )
+        Site.objects.update_or_create(
+            is_default_site=True,
+            defaults={"hostname": "testserver", "port": 80, "root_page": home},
+        )
+        TransportStation.objects.create(station_label="Lumphini", station_qid="Q-LUM")
+        # Retire results and suggestions cached by earlier tests.
+        bump_index_version()
+        bump_suggest_version()
+
+    async def test_search_results_are_cached(self):
+        response = await self.async_client.get("/search/", {"query": "lumphini"})
+        self.assertContains(response, "Lumphini Park guide")
+        with mock.patch("search.views._search_page") as search_page:
+            cached = await self.async_client.get("/search/", {"query": "lumphini"})
+        search_page.assert_not_called()
+        self.assertContains(cached, "Lumphini Park guide")
+
+    async def test_suggest(self):
+        response = await self.async_client.get("/search/suggest/", {"q": "lum"})
+        self.assertEqual(response.status_code, 200)
+        labels = [suggestion["label"] for suggestion in response.json()["suggestions"]]
+        self.assertIn("Lumphini", labels)
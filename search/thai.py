@@ -0,0 +1,281 @@
+"""
+Thai text helpers for search indexing.
+
+Thai is written without spaces between words, so the search backend sees a
+whole phrase as one token. Without a dictionary segmenter we index
+overlapping character bigrams of every Thai run (the usual approach for
+unsegmented scripts) plus an approximate RTGS romanization, and expand
+queries the same way so Thai and Latin input both reach the index.
+
+The romanization splits each run into syllables by spelling rules: initial
+clusters, the unwritten inherent vowel ("a" in an open syllable, "o" in a
+closed one), compound vowels and the sound of final consonants. Without a
+dictionary, some syllable boundaries are guessed (มหานคร comes out as
+"mahankhon", not "mahanakhon"), which is close enough to match typed Latin
+queries.
+"""
+
+from __future__ import annotations
+
+import re
+
+THAI_RUN_RE = re.compile(r"[ก-๛]+")
+THAI_TONE_AND_SIGN_RE = re.compile(r"[็-๎]")
+
+# Leading vowels are written before the consonant they follow in speech.
+LEADING_VOWELS = set("เแโใไ")
+# Vowel signs written after (or above/below) the initial consonant.
+FOLLOWING_VOWELS = set("ะัาำิีึืุู")
+
+CONSONANTS = {
+    "ก": "k", "ข": "kh", "ฃ": "kh", "ค": "kh", "ฅ": "kh", "ฆ": "kh", "ง": "ng",
+    "จ": "ch", "ฉ": "ch", "ช": "ch", "ซ": "s", "ฌ": "ch", "ญ": "y", "ฎ": "d",
+    "ฏ": "t", "ฐ": "th", "ฑ": "th", "ฒ": "th", "ณ": "n", "ด": "d", "ต": "t",
+    "ถ": "th", "ท": "th", "ธ": "th", "น": "n", "บ": "b", "ป": "p", "ผ": "ph",
+    "ฝ": "f", "พ": "ph", "ฟ": "f", "ภ": "ph", "ม": "m", "ย": "y", "ร": "r",
+    "ฤ": "rue", "ล": "l", "ฦ": "lue", "ว": "w", "ศ": "s", "ษ": "s", "ส": "s",
+    "ห": "h", "ฬ": "l", "อ": "", "ฮ": "h",
+}
+
+# Value of a consonant closing a syllable. The others never do; ย and ว
+# become part of the vowel (see ``_close``).
+FINALS = {
+    **dict.fromkeys("กขคฆ", "k"),
+    **dict.fromkeys("จชซฌฎฏฐฑฒดตถทธศษส", "t"),
+    **dict.fromkeys("บปพฟภ", "p"),
+    **dict.fromkeys("ญณนรลฬ", "n"),
+    "ง": "ng",
+    "ม": "m",
+    "ย": "i",
+    "ว": "o",
+}
+
+# Initial consonant clusters (กร, ขล, คว, ...).
+CLUSTERS = {first + second for first in "กขคปพตบดฟ" for second in "รลว"} - {
+    "ตล", "ตว", "ปว", "พว", "บว", "ดล", "ดว", "ฟว",
+}
+
+# A leading ห (or อ before ย) is silent and only sets the tone.
+SILENT_LEADS = {"ห": set("งญนมยรลว"), "อ": {"ย"}}
+
+# Single vowel signs, for stray ones the syllable rules don't consume.
+VOWELS = {
+    "ะ": "a", "ั": "a", "า": "a", "ำ": "am", "ิ": "i", "ี": "i", "ึ": "ue",
+    "ื": "ue", "ุ": "u", "ู": "u", "เ": "e", "แ": "ae", "โ": "o", "ใ": "ai",
+    "ไ": "ai", "ๅ": "",
+}
+
+# Vowels spelled with a leading เ, longest first: (spelling after the
+# initial, value, takes a final consonant).
+E_VOWELS = (
+    ("ียะ", "ia", False), ("ีย", "ia", True), ("ือะ", "uea", False), ("ือ", "uea", True),
+    ("าะ", "o", False), ("า", "ao", False), ("อะ", "oe", False), ("อ", "oe", True),
+    ("ิ", "oe", True), ("ะ", "e", False),
+)
+
+# Vowel + final ย / ว spellings that RTGS writes as a diphthong.
+Y_FINALS = {"a": "ai", "ai": "ai", "e": "oei", "oe": "oei", "o": "oi", "u": "ui", "ua": "uai", "uea": "ueai"}
+W_FINALS = {"a": "ao", "e": "eo", "ae": "aeo", "i": "io", "ia": "iao"}
+
+DIGITS = {chr(0x0E50 + value): str(value) for value in range(10)}
+
+
+def contains_thai(text: str) -> bool:
+    return bool(text) and THAI_RUN_RE.search(text) is not None
+
+
+def _followed_by_vowel(run: str, index: int) -> bool:
+    return index + 1 < len(run) and run[index + 1] in FOLLOWING_VOWELS
+
+
+def _medial_w(run: str, index: int) -> bool:
+    """Whether the ว at ``index`` is the vowel "ua" (สวน) rather than a consonant."""
+    following = index + 1
+    return (
+        following < len(run)
+        and run[following] in FINALS
+        and run[following : following + 2] != "รร"
+        and not _followed_by_vowel(run, following)
+    )
+
+
+def _opens_syllable(run: str, index: int) -> bool:
+    """Whether the consonant at ``index`` starts a syllable rather than closing one."""
+    char = run[index]
+    if char not in FINALS:
+        return True
+    following = index + 1
+    if following >= len(run):
+        return False
+    after = run[following]
+    if after in FOLLOWING_VOWELS:
+        return True
+    if after == "อ" and not _followed_by_vowel(run, following):
+        return True
+    if char + after in CLUSTERS and _followed_by_vowel(run, following):
+        return True
+    if after == "ว" and _medial_w(run, following):
+        return True
+    # ง nearly always closes a syllable unless a vowel is written after it.
+    if char == "ง":
+        return False
+    # Two consonants with no vowel read consonant + o + final when the second
+    # closes the syllable (ถนน, but not the ดล in ชิดลม).
+    return after in FINALS and not _opens_syllable(run, following)
+
+
+def _onset(run: str, index: int, lead: str | None) -> tuple[str, int]:
+    char = run[index]
+    following = run[index + 1] if index + 1 < len(run) else ""
+    if following in SILENT_LEADS.get(char, ()) and not (following == "ว" and _medial_w(run, index + 1)):
+        after = run[index + 2] if index + 2 < len(run) else ""
+        # Unless the sonorant closes a syllable of ห's own: หล in พหลโยธิน,
+        # หง in แหง.
+        if not (after in LEADING_VOWELS or (not after and lead in ("เ", "แ", "โ"))):
+            return CONSONANTS[following], index + 2
+    if char + following in CLUSTERS:
+        if following == "ว":
+            clustered = _followed_by_vowel(run, index + 1)
+        else:
+            clustered = index + 2 < len(run)
+        if clustered:
+            return CONSONANTS[char] + CONSONANTS[following], index + 2
+    return CONSONANTS[char], index + 1
+
+
+def _vowel(run: str, index: int, lead: str | None) -> tuple[str, int, bool | None]:
+    """
+    ``(value, next index, closed)`` for the vowel after an initial. ``closed``
+    is True when a final consonant must follow, False when none can, and
+    None when one may.
+    """
+    rest = run[index:]
+    if lead == "เ":
+        for spelling, value, takes_final in E_VOWELS:
+            if rest.startswith(spelling):
+                return value, index + len(spelling), None if takes_final else False
+        return "e", index, None
+    if lead == "แ":
+        return ("ae", index + 1, False) if rest.startswith("ะ") else ("ae", index, None)
+    if lead == "โ":
+        return ("o", index + 1, False) if rest.startswith("ะ") else ("o", index, None)
+    if lead:
+        return "ai", index, None
+    for spelling, value, closed in (
+        ("ัว", "ua", None), ("ัย", "ai", False), ("ั", "a", True), ("ะ", "a", False),
+        ("ำ", "am", False), ("ือ", "ue", None),
+    ):
+        if rest.startswith(spelling):
+            return value, index + len(spelling), closed
+    if rest[:1] in FOLLOWING_VOWELS:
+        return VOWELS[rest[0]], index + 1, None
+    if rest.startswith("รร"):
+        if index + 2 < len(run) and run[index + 2] in FINALS:
+            return "a", index + 2, True
+        return "an", index + 2, False
+    if rest.startswith("อ") and not _followed_by_vowel(run, index):
+        return "o", index + 1, None
+    if rest.startswith("ว") and _medial_w(run, index):
+        return "ua", index + 1, None
+    # No vowel written: "o" in a closed syllable (คน), "a" in an open one (สยาม).
+    if rest[:1] in FINALS and not _opens_syllable(run, index):
+        return "o", index, True
+    return "a", index, False
+
+
+def _close(vowel: str, final: str) -> str:
+    if final == "ย":
+        return Y_FINALS.get(vowel, vowel + "i")
+    if final == "ว":
+        return W_FINALS.get(vowel, vowel + "o")
+    return vowel + FINALS[final]
+
+
+def _romanize_run(run: str) -> str:
+    output = []
+    index = 0
+    closed = False
+    while index < len(run):
+        char = run[index]
+        if char in DIGITS:
+            output.append(DIGITS[char])
+            index += 1
+            continue
+        lead = char if char in LEADING_VOWELS else None
+        start = index + 1 if lead else index
+        if start >= len(run) or run[start] not in CONSONANTS:
+            output.append(VOWELS.get(char, ""))
+            index += 1
+            continue
+        if run[start] in "ฤฦ":
+            output.append(CONSONANTS[run[start]])
+            index = start + 1
+            continue
+        # A trailing ร after a final consonant is silent (จักร).
+        if not lead and closed and start == len(run) - 1 and run[start] == "ร":
+            break
+
+        onset, index = _onset(run, start, lead)
+        vowel, index, must_close = _vowel(run, index, lead)
+        closed = False
+        if must_close is not False and index < len(run) and run[index] in FINALS:
+            final = run[index]
+            if vowel == "ai" and final != "ย":
+                pass
+            elif must_close or not _opens_syllable(run, index):
+                vowel = _close(vowel, final)
+                closed = final not in "ยว"
+                index += 1
+        output.append(onset + vowel)
+    return "".join(output)
+
+
+def _romanize_letters(run: str) -> str:
+    # Abbreviations (ทช.) are read letter by letter.
+    return "".join(CONSONANTS.get(char, DIGITS.get(char, "")) for char in run)
+
+
+def romanize(text: str) -> str:
+    """Approximate RTGS romanization; non-Thai characters pass through."""
+    # A thanthakhat (U+0E4C) silences the consonant before it.
+    text = re.sub(r".์", "", text)
+    text = THAI_TONE_AND_SIGN_RE.sub("", text)
+
+    def replace(match: re.Match) -> str:
+        run = match.group().replace("ฯ", "").replace("ๆ", "")
+        if match.string.startswith(".", match.end()):
+            return _romanize_letters(run)
+        return _romanize_run(run)
+
+    return THAI_RUN_RE.sub(replace, text)
+
+
+def segment(text: str) -> list[str]:
+    """Return overlapping bigrams for each Thai run in ``text``."""
+    tokens = []
+    for run in THAI_RUN_RE.findall(THAI_TONE_AND_SIGN_RE.sub("", text or "")):
+        if len(run) < 3:
+            tokens.append(run)
+            continue
+        tokens.extend(run[index : index + 2] for index in range(len(run) - 1))
+    return tokens
+
+
+def search_variants(*values: str) -> str:
+    """Extra index text for fields that may contain Thai script."""
+    parts = []
+    for value in values:
+        if not contains_thai(value):
+            continue
+        parts.extend(segment(value))
+        romanized = romanize(value).strip()
+        if romanized:
+            parts.append(romanized)
+    return " ".join(parts)
+
+
+def expand_query(query: str) -> str:
+    """Add bigrams and a romanized form to queries written in Thai."""
+    if not contains_thai(query):
+        return query
+    return " ".join(filter(None, [query, search_variants(query)]))
@@ -1,10 +1,20 @@
+from dataclasses import asdict
 from typing import Any, cast
 
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.http import JsonResponse
 from django.template.response import TemplateResponse
 
 from wagtail.models import Page
 
+from core.db import use_read_replica
+from search.cache import results_cache_key, results_timeout
+from search.results import build_search_results
+from search.suggest import DEFAULT_LIMIT, MAX_LIMIT, get_suggest_index
+from search.thai import expand_query
+
 # To enable logging of search queries for use with the "Promoted search results" module
 # <https://docs.wagtail.org/en/stable/reference/contrib/searchpromotions.html>
 # uncomment the following line and the lines indicated in the search function
@@ -12,25 +22,18 @@ from wagtail.models import Page
 
 # from wagtail.contrib.search_promotions.models import Query
 
+RESULTS_PER_PAGE = 10
 
-def search(request):
-    search_query = request.GET.get("query", None)
-    page = request.GET.get("page", 1)
 
-    # Search
+def _search_page(search_query, page, request):
+    """Run the search and build one page of results: ``(total, page number, results)``."""
     if search_query:
-        search_results = cast(Any, Page.objects).live().search(search_query)
-
-        # To log this query for use with the "Promoted search results" module:
-
-        # query = Query.get(search_query)
-        # query.add_hit()
-
+        search_results = cast(Any, Page.objects).live().search(expand_query(search_query))
     else:
         search_results = Page.objects.none()
 
     # Pagination
-    paginator = Paginator(search_results, 10)
+    paginator = Paginator(search_results, RESULTS_PER_PAGE)
     try:
         search_results = paginator.page(page)
     except PageNotAnInteger:
@@ -38,11 +41,65 @@ def search(request):
     except EmptyPage:
         search_results = paginator.page(paginator.num_pages)
 
+    results = build_search_results(search_results.object_list, request)
+    return paginator.count, search_results.number, results
+
+
+@use_read_replica
+async def search(request):
+    search_query = request.GET.get("query", None)
+    page = request.GET.get("page", 1)
+
+    cache_key = None
+    cached = None
+    if search_query:
+        cache_key = await sync_to_async(results_cache_key)(
+            search_query, page, request.get_host()
+        )
+        cached = await cache.aget(cache_key)
+
+        # To log this query for use with the "Promoted search results" module:
+
+        # query = Query.get(search_query)
+        # query.add_hit()
+
+    if cached is None:
+        # The search backend has no async API.
+        cached = await sync_to_async(_search_page)(search_query, page, request)
+        if cache_key:
+            await cache.aset(cache_key, cached, results_timeout())
+
+    # Rebuild the pagination state from the total; no query needed.
+    count, number, results = cached
+    search_results = Paginator(range(count), RESULTS_PER_PAGE).page(number)
+
     return TemplateResponse(
         request,
         "search/search.html",
         {
             "search_query": search_query,
             "search_results": search_results,
+            "results": results,
         },
     )
+
+
+@use_read_replica
+async def suggest(request):
+    query = (request.GET.get("q") or "").strip()
+    try:
+        limit = max(1, min(int(request.GET.get("limit", DEFAULT_LIMIT)), MAX_LIMIT))
+    except ValueError:
+        limit = DEFAULT_LIMIT
+
+    suggestions = []
+    if query:
+        # Rebuilding a stale index queries; a current one is a dict lookup.
+        index = await sync_to_async(get_suggest_index)()
+        suggestions = index.search(query, limit)
+    return JsonResponse(
+        {
+            "query": query,
+            "suggestions": [asdict(suggestion) for suggestion in suggestions],
+        }
+    )